@@ -1,4 +1,5 @@
 # py -m pip install requirements
+import multiprocessing
 import sys
 import os
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
@@ -6,6 +7,11 @@ from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
 from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QIcon, QPixmap, QPalette, QColor
 
+# --profile: timers/counters in data/profiler.py (Ctrl+Shift+P in the editor tab)
+if "--profile" in sys.argv:
+    sys.argv.remove("--profile")
+    os.environ["ITEMMANAGER_PROFILE"] = "1"
+
 if getattr(sys, 'frozen', False):
     base_path = os.path.dirname(sys.executable)
 else:
@@ -80,6 +86,7 @@ def set_dark_theme(app):
     app.setPalette(palette)
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     
     set_dark_theme(app)
@@ -0,0 +1,75 @@
+"""OTB load/save benchmark.
+
+Times OtbFile.load and OtbFile.save on the bundled assets/xml/items.otb (or
+--file), prints node/item counts and throughput, and exits with code 1 when
+saving the unchanged file does not reproduce it byte for byte:
+
+    python benchmarks/bench_otb.py --repeat 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT, "data")
+if DATA_DIR not in sys.path:
+    sys.path.insert(0, DATA_DIR)
+
+from otbParser import ESCAPE, OtbFile  # noqa: E402
+
+BUNDLED_OTB = os.path.join(ROOT, "assets", "xml", "items.otb")
+
+
+def count_nodes(otb):
+    total = 0
+    stack = list(otb.root_children)
+    while stack:
+        node = stack.pop()
+        total += 1
+        stack.extend(node.children)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OtbFile load/save benchmark")
+    parser.add_argument("--file", default=BUNDLED_OTB)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    with open(args.file, "rb") as f:
+        data = f.read()
+
+    load_samples = []
+    otb = OtbFile()
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        otb.load(args.file)
+        load_samples.append(time.perf_counter() - start)
+
+    save_samples = []
+    with tempfile.TemporaryDirectory(prefix="itemmanager-bench-") as workdir:
+        out_path = os.path.join(workdir, "items.otb")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            otb.save(out_path)
+            save_samples.append(time.perf_counter() - start)
+        with open(out_path, "rb") as f:
+            identical = f.read() == data
+
+    items = otb.get_all_items()
+    print(f"{os.path.basename(args.file)}: {len(data)} bytes, "
+          f"{data.count(bytes([ESCAPE]))} 0xFD bytes")
+    print(f"  nodes {count_nodes(otb)}, items {len(items)}")
+    for name, samples in (("load", load_samples), ("save", save_samples)):
+        best = min(samples)
+        print(f"  {name} best {best * 1000:.2f} ms, median {statistics.median(samples) * 1000:.2f} ms "
+              f"({len(data) / best / 1e6:.1f} MB/s, {len(items) / best:,.0f} items/s)")
+    print(f"  round trip: {'identical' if identical else 'DIFFERENT'}")
+    return 0 if identical else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""Cold start benchmark for ItemManager.
+
+Imports ItemManager.py in a fresh interpreter with ``-X importtime`` and fails
+(exit code 1) when the cumulative import time goes over the budget or when one
+of the heavy sub-tool dependencies is pulled in at startup.
+
+    python benchmarks/bench_startup.py --budget-ms 1500
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only be imported by the open_* handlers / AI actions.
+LAZY_MODULES = (
+    "pygame",
+    "OpenGL",
+    "torch",
+    "realesrgan",
+    "basicsr",
+    "rembg",
+    "cv2",
+    "google.generativeai",
+    "openai",
+    "qdarktheme",
+    "particleEditor",
+    "shaderEditor",
+    "spell_maker",
+    "looktype_generator",
+    "monster_generator",
+    "spriteEditor",
+    # numpy and the tools built on it: imported by their handlers / workers.
+    "numpy",
+    "otbFlags",
+    "otbChecker",
+    "spriteHash",
+    "obdHandler",
+    "obdBatch",
+    "spriteAtlas",
+    "clientMerge",
+    "clientDiff",
+    "clientFormat",
+    "sprConvert",
+)
+
+
+def measure_imports(runs=3):
+    """Returns (best_total_us, per_module_us) over ``runs`` cold imports."""
+    best_total = None
+    best_modules = {}
+
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import ItemManager"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"import ItemManager failed:\n{proc.stderr}")
+
+        modules = {}
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "[us]" in line:
+                continue
+            _self_us, cumulative, name = line[len("import time:"):].split("|")
+            modules[name.strip()] = int(cumulative)
+
+        total = modules.get("ItemManager", 0)
+        if best_total is None or total < best_total:
+            best_total = total
+            best_modules = modules
+
+    return best_total, best_modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=1500.0)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    total_us, modules = measure_imports(args.runs)
+
+    print(f"Cold import of ItemManager: {total_us / 1000:.1f} ms "
+          f"(budget {args.budget_ms:.0f} ms)")
+    print("Slowest imports (cumulative):")
+    for name, us in sorted(modules.items(), key=lambda kv: kv[1], reverse=True)[: args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    eager = [name for name in LAZY_MODULES if name in modules]
+    failed = False
+    if eager:
+        print(f"FAIL: imported at startup: {', '.join(eager)}")
+        failed = True
+    if total_us / 1000 > args.budget_ms:
+        print("FAIL: startup import time over budget")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
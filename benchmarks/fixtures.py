@@ -0,0 +1,300 @@
+"""Synthetic 10.98-style client files for the benchmarks.
+
+Generates a Tibia.dat / Tibia.spr pair (and a matching items.otb) with a
+configurable number of things. Contents are deterministic for a given seed so
+results are comparable across commits:
+
+- items: grounds, stackables, containers, lights/offsets/market data, some
+  2x2 and animated items;
+- outfits: idle + walk frame groups, 4 directions, addon/mount patterns and a
+  mask layer;
+- effects: animated 1x1/2x2 effects with per-frame durations;
+- missiles: 3x3 direction patterns;
+- sprites: standard (RGB) or transparency (RGBA) run-length encoding, with a
+  share of duplicated and empty sprites so the optimizer has work to do.
+"""
+import os
+import random
+import struct
+
+DAT_SIGNATURE_1098 = 0x42A3
+SPR_SIGNATURE_1098 = 0x57BBD603
+
+PRESETS = {
+    "small": {"items": 2000, "outfits": 60, "effects": 80, "missiles": 40, "sprites": 8000},
+    "medium": {"items": 10000, "outfits": 300, "effects": 200, "missiles": 80, "sprites": 40000},
+    "large": {"items": 30000, "outfits": 1200, "effects": 400, "missiles": 120, "sprites": 150000},
+}
+
+# DAT flag bytes (see METADATA_FLAGS in data/datspr.py)
+_FLAG_GROUND = 0x00
+_FLAG_CONTAINER = 0x04
+_FLAG_STACKABLE = 0x05
+_FLAG_UNPASSABLE = 0x0C
+_FLAG_UNMOVEABLE = 0x0D
+_FLAG_BLOCKMISSILE = 0x0E
+_FLAG_PICKUPABLE = 0x11
+_FLAG_LIGHT = 0x16
+_FLAG_OFFSET = 0x19
+_FLAG_ELEVATION = 0x1A
+_FLAG_ANIMATEALWAYS = 0x1C
+_FLAG_MINIMAP = 0x1D
+_FLAG_MARKET = 0x22
+_LAST_FLAG = 0xFF
+
+
+# --- Sprites ---------------------------------------------------------------
+
+def _random_pixels(rng):
+    """32x32 list of (r, g, b, a): a few filled shapes on transparency."""
+    pixels = [(0, 0, 0, 0)] * 1024
+    for _ in range(rng.randint(1, 3)):
+        x0, y0 = rng.randint(0, 24), rng.randint(0, 24)
+        x1, y1 = rng.randint(x0 + 2, 32), rng.randint(y0 + 2, 32)
+        color = (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255))
+        for y in range(y0, y1):
+            for x in range(x0, x1):
+                shade = rng.randint(-12, 12)
+                pixels[y * 32 + x] = (
+                    max(0, min(255, color[0] + shade)),
+                    max(0, min(255, color[1] + shade)),
+                    max(0, min(255, color[2] + shade)),
+                    255 if rng.random() > 0.05 else 128,
+                )
+    return pixels
+
+
+def encode_pixels(pixels, transparency):
+    """Run-length encodes 1024 RGBA tuples the way the 10.98 client stores
+    them (trailing transparent run omitted)."""
+    out = bytearray()
+    i = 0
+    while i < 1024:
+        start = i
+        while i < 1024 and pixels[i][3] == 0:
+            i += 1
+        transparent = i - start
+        start = i
+        while i < 1024 and pixels[i][3] != 0:
+            i += 1
+        colored = pixels[start:i]
+        if not colored:
+            break
+        out += struct.pack("<HH", transparent, len(colored))
+        for r, g, b, a in colored:
+            if transparency:
+                out += bytes((r, g, b, a))
+            else:
+                out += bytes((r, g, b))
+    return bytes(out)
+
+
+def write_spr(path, sprite_count, transparency=False, seed=1098,
+              duplicate_ratio=0.1, empty_ratio=0.02):
+    rng = random.Random(seed)
+    bodies = []
+    for _ in range(sprite_count):
+        roll = rng.random()
+        if roll < empty_ratio:
+            bodies.append(b"")
+        elif roll < empty_ratio + duplicate_ratio and bodies:
+            bodies.append(bodies[rng.randrange(len(bodies))])
+        else:
+            bodies.append(encode_pixels(_random_pixels(rng), transparency))
+
+    with open(path, "wb") as f:
+        f.write(struct.pack("<II", SPR_SIGNATURE_1098, sprite_count))
+        offset = 8 + sprite_count * 4
+        offsets = bytearray()
+        for body in bodies:
+            if body:
+                offsets += struct.pack("<I", offset)
+                offset += 3 + 2 + len(body)
+            else:
+                offsets += b"\x00\x00\x00\x00"
+        f.write(offsets)
+        for body in bodies:
+            if body:
+                # Color key + size + pixel data
+                f.write(b"\xFF\x00\xFF" + struct.pack("<H", len(body)) + body)
+
+
+# --- DAT ---------------------------------------------------------------------
+
+def _animation_block(rng, frames):
+    out = bytearray()
+    out.append(rng.randint(0, 1))                # async
+    out += struct.pack("<i", rng.choice((0, 0, 3)))  # loop count
+    out.append(0)                                # start frame
+    for _ in range(frames):
+        low = rng.choice((75, 100, 150, 200))
+        out += struct.pack("<II", low, low + rng.choice((0, 0, 50)))
+    return bytes(out)
+
+
+def _texture(rng, sprite_count, extended, width, height, layers, px, py, pz, frames):
+    out = bytearray(struct.pack("<BB", width, height))
+    if width > 1 or height > 1:
+        out.append(64)
+    out += struct.pack("<BBBBB", layers, px, py, pz, frames)
+    if frames > 1:
+        out += _animation_block(rng, frames)
+    fmt = "<I" if extended else "<H"
+    top = sprite_count if extended else min(sprite_count, 0xFFFF)
+    for _ in range(width * height * layers * px * py * pz * frames):
+        out += struct.pack(fmt, rng.randint(1, top) if top else 0)
+    return bytes(out)
+
+
+def _item_flags(rng, item_id):
+    out = bytearray()
+    kind = rng.random()
+    stackable = 0.35 <= kind < 0.5
+    if kind < 0.25:
+        out.append(_FLAG_GROUND)
+        out += struct.pack("<H", rng.choice((100, 120, 150, 200)))
+    elif kind < 0.35:
+        out.append(_FLAG_CONTAINER)
+    elif stackable:
+        out.append(_FLAG_STACKABLE)
+    if rng.random() < 0.3:
+        out += bytes((_FLAG_UNPASSABLE, _FLAG_BLOCKMISSILE))
+    if rng.random() < 0.3:
+        out.append(_FLAG_UNMOVEABLE)
+    elif rng.random() < 0.6:
+        out.append(_FLAG_PICKUPABLE)
+    if rng.random() < 0.1:
+        out.append(_FLAG_LIGHT)
+        out += struct.pack("<HH", rng.randint(1, 7), rng.randint(0, 215))
+    if rng.random() < 0.1:
+        out.append(_FLAG_OFFSET)
+        out += struct.pack("<hh", -8, -8)
+    if rng.random() < 0.1:
+        out.append(_FLAG_ELEVATION)
+        out += struct.pack("<H", 8)
+    if rng.random() < 0.5:
+        out.append(_FLAG_MINIMAP)
+        out += struct.pack("<H", rng.randint(0, 215))
+    if rng.random() < 0.05:
+        out.append(_FLAG_ANIMATEALWAYS)
+    if rng.random() < 0.1:
+        name = f"item {item_id}".encode("latin-1")
+        out.append(_FLAG_MARKET)
+        out += struct.pack("<HHHH", 1, item_id, item_id, len(name))
+        out += name + struct.pack("<HH", 0, 0)
+    out.append(_LAST_FLAG)
+    return bytes(out), stackable
+
+
+def write_dat(path, items, outfits, effects, missiles, sprite_count,
+              extended=True, seed=1098):
+    rng = random.Random(seed + 1)
+    last_item = 99 + items
+    with open(path, "wb") as f:
+        f.write(struct.pack("<IHHHH", DAT_SIGNATURE_1098, last_item, outfits, effects, missiles))
+
+        for item_id in range(100, last_item + 1):
+            flags, stackable = _item_flags(rng, item_id)
+            f.write(flags)
+            big = rng.random() < 0.15
+            frames = rng.choice((2, 3, 4, 8)) if rng.random() < 0.1 else 1
+            if stackable:
+                px, py = 4, 2
+            else:
+                px, py = 1, 1
+            f.write(_texture(
+                rng, sprite_count, extended,
+                2 if big else 1, 2 if big else 1, 1, px, py, 1, frames,
+            ))
+
+        for _ in range(outfits):
+            f.write(bytes((_LAST_FLAG,)))
+            mounted = rng.random() < 0.3
+            big = rng.random() < 0.4
+            f.write(bytes((2,)))  # frame groups
+            for group_type, frames in ((0, 1), (1, 8)):
+                f.write(bytes((group_type,)))
+                f.write(_texture(
+                    rng, sprite_count, extended,
+                    2 if big else 1, 2 if big else 1, 2, 4, 3, 2 if mounted else 1, frames,
+                ))
+
+        for _ in range(effects):
+            f.write(bytes((_LAST_FLAG,)))
+            big = rng.random() < 0.3
+            f.write(_texture(
+                rng, sprite_count, extended,
+                2 if big else 1, 2 if big else 1, 1, 1, 1, 1, rng.choice((4, 6, 8, 12)),
+            ))
+
+        for _ in range(missiles):
+            f.write(bytes((_LAST_FLAG,)))
+            f.write(_texture(rng, sprite_count, extended, 1, 1, 1, 3, 3, 1, 1))
+
+
+# --- OTB ---------------------------------------------------------------------
+
+def _escape(data):
+    out = bytearray()
+    for b in data:
+        if b in (0xFD, 0xFE, 0xFF):
+            out.append(0xFD)
+        out.append(b)
+    return bytes(out)
+
+
+def _otb_attr(attr_type, payload):
+    return bytes((attr_type,)) + struct.pack("<H", len(payload)) + payload
+
+
+def write_otb(path, items, seed=1098):
+    """items.otb with one node per item id 100..99+items (client id = server
+    id), using the attribute layout of the bundled assets/xml/items.otb."""
+    rng = random.Random(seed + 2)
+    out = bytearray(b"\x00\x00\x00\x00")
+    out.append(0xFE)
+    root = bytearray(b"\x00")  # node type
+    root += struct.pack("<I", 0)  # flags
+    version = struct.pack("<III", 3, 57, 62) + b"OTB 3.57.62-10.98".ljust(128, b"\x00")
+    root += _otb_attr(0x01, version)
+    out += _escape(root)
+
+    for sid in range(100, 100 + items):
+        group = rng.choice((0, 0, 0, 1, 2, 14))
+        node = bytearray((group,))
+        node += struct.pack("<I", rng.getrandbits(27))
+        node += _otb_attr(0x10, struct.pack("<H", sid))
+        node += _otb_attr(0x11, struct.pack("<H", sid))
+        if group == 1:
+            node += _otb_attr(0x14, struct.pack("<H", rng.choice((100, 150, 200))))
+        node += _otb_attr(0x20, bytes(rng.getrandbits(8) for _ in range(16)))
+        if rng.random() < 0.3:
+            node += _otb_attr(0x21, struct.pack("<H", rng.randint(0, 215)))
+        if rng.random() < 0.1:
+            node += _otb_attr(0x2A, struct.pack("<HH", rng.randint(1, 7), rng.randint(0, 215)))
+        if rng.random() < 0.3:
+            node += _otb_attr(0x2B, bytes((rng.randint(1, 3),)))
+        out.append(0xFE)
+        out += _escape(node)
+        out.append(0xFF)
+
+    out.append(0xFF)
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def generate(directory, items, outfits, effects, missiles, sprites,
+             transparency=False, extended=True, seed=1098):
+    """Writes Tibia.dat, Tibia.spr and items.otb into ``directory`` and
+    returns their paths."""
+    os.makedirs(directory, exist_ok=True)
+    paths = {
+        "dat": os.path.join(directory, "Tibia.dat"),
+        "spr": os.path.join(directory, "Tibia.spr"),
+        "otb": os.path.join(directory, "items.otb"),
+    }
+    write_spr(paths["spr"], sprites, transparency=transparency, seed=seed)
+    write_dat(paths["dat"], items, outfits, effects, missiles, sprites,
+              extended=extended, seed=seed)
+    write_otb(paths["otb"], items, seed=seed)
+    return paths
@@ -0,0 +1,220 @@
+"""Fuzz check for the OTB parser.
+
+Builds random OTB trees whose type bytes, flags and attribute payloads are
+full of 0xFD/0xFE/0xFF, escapes them the way the format requires and checks
+that OtbFile.load returns exactly the same tree and that OtbFile.save writes
+the file back byte for byte. Each case also checks that truncated copies of
+the file raise ValueError instead of crashing or returning garbage. Exits with code 1 on the first mismatch.
+
+    python benchmarks/fuzz_otb.py --cases 500 --seed 1
+"""
+import argparse
+import os
+import random
+import struct
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT, "data")
+if DATA_DIR not in sys.path:
+    sys.path.insert(0, DATA_DIR)
+
+from otbParser import (  # noqa: E402
+    ATTR_CLIENTID, ATTR_LIGHT2, ATTR_SERVERID, ATTR_SPEED, OtbFile,
+)
+
+_SPECIAL = (0xFD, 0xFE, 0xFF)
+
+
+def _escape(data):
+    out = bytearray()
+    for b in data:
+        if b in _SPECIAL:
+            out.append(0xFD)
+        out.append(b)
+    return bytes(out)
+
+
+def _random_bytes(rng, size):
+    # Half of the bytes are special so escapes show up everywhere.
+    return bytes(rng.choice(_SPECIAL) if rng.random() < 0.5 else rng.randrange(256)
+                 for _ in range(size))
+
+
+def _random_u16(rng):
+    return rng.choice((0xFDFD, 0xFEFF, 0xFFFD, 0x00FE, rng.randrange(1, 0x10000)))
+
+
+def _random_node(rng):
+    node = {
+        "type": rng.choice((0, 1, 2, 0xFD, 0xFE, 0xFF)),
+        "flags": struct.unpack("<I", _random_bytes(rng, 4))[0],
+        "attrs": [],
+        "children": [],
+    }
+    if rng.random() < 0.8:
+        node["attrs"].append((ATTR_SERVERID, struct.pack("<H", _random_u16(rng))))
+        node["attrs"].append((ATTR_CLIENTID, struct.pack("<H", _random_u16(rng))))
+    # Decoded attributes (speed, light) appear at most once per node, as in
+    # real files; save() rewrites them from the item fields.
+    decoded = set()
+    for _ in range(rng.randint(0, 4)):
+        attr_type = rng.choice((ATTR_SPEED, ATTR_LIGHT2, 0x12, 0x20, 0x2B, 0xFD, 0xFE, 0xFF))
+        if attr_type in decoded:
+            continue
+        if attr_type == ATTR_SPEED:
+            payload = struct.pack("<H", _random_u16(rng))
+            decoded.add(attr_type)
+        elif attr_type == ATTR_LIGHT2:
+            payload = struct.pack("<HH", _random_u16(rng), _random_u16(rng))
+            decoded.add(attr_type)
+        else:
+            payload = _random_bytes(rng, rng.choice((0, 1, 16, 255, 0x1FD)))
+        node["attrs"].append((attr_type, payload))
+    return node
+
+
+def random_tree(rng, max_nodes):
+    root = _random_node(rng)
+    nodes = [root]
+    for _ in range(rng.randint(0, max_nodes)):
+        child = _random_node(rng)
+        rng.choice(nodes)["children"].append(child)
+        nodes.append(child)
+    return root
+
+
+def deep_tree(rng, depth):
+    root = node = _random_node(rng)
+    for _ in range(depth):
+        child = _random_node(rng)
+        node["children"].append(child)
+        node = child
+    return root
+
+
+def encode(root, version=b"\x00\x00\x00\x00"):
+    out = bytearray(version)
+    # (node, index of the next child to write)
+    stack = [(root, -1)]
+    while stack:
+        node, index = stack.pop()
+        if index == -1:
+            props = bytearray((node["type"],))
+            props += struct.pack("<I", node["flags"])
+            for attr_type, payload in node["attrs"]:
+                props.append(attr_type)
+                props += struct.pack("<H", len(payload)) + payload
+            out.append(0xFE)
+            out += _escape(props)
+            index = 0
+        if index < len(node["children"]):
+            stack.append((node, index + 1))
+            stack.append((node["children"][index], -1))
+        else:
+            out.append(0xFF)
+    return bytes(out)
+
+
+def compare(expected, parsed, path="root"):
+    """Returns a description of the first difference or None."""
+    stack = [(expected, parsed, path)]
+    while stack:
+        exp, got, where = stack.pop()
+        if got.type_id != exp["type"]:
+            return f"{where}: type {got.type_id} != {exp['type']}"
+        if got.flags != exp["flags"]:
+            return f"{where}: flags {got.flags:#x} != {exp['flags']:#x}"
+
+        attributes = [(attr_type, bytes(payload)) for attr_type, payload in got.attributes]
+        if attributes != exp["attrs"]:
+            return f"{where}: attributes differ"
+
+        fields = {"server_id": 0, "client_id": 0, "speed": 0,
+                  "light_level": 0, "light_color": 0}
+        for attr_type, payload in exp["attrs"]:
+            if attr_type == ATTR_SERVERID:
+                fields["server_id"] = struct.unpack("<H", payload)[0]
+            elif attr_type == ATTR_CLIENTID:
+                fields["client_id"] = struct.unpack("<H", payload)[0]
+            elif attr_type == ATTR_SPEED:
+                fields["speed"] = struct.unpack("<H", payload)[0]
+            elif attr_type == ATTR_LIGHT2:
+                fields["light_level"], fields["light_color"] = struct.unpack("<HH", payload)
+        for name, value in fields.items():
+            if getattr(got, name) != value:
+                return f"{where}: {name} {getattr(got, name)} != {value}"
+
+        if len(got.children) != len(exp["children"]):
+            return f"{where}: {len(got.children)} children != {len(exp['children'])}"
+        for i, (e, g) in enumerate(zip(exp["children"], got.children)):
+            stack.append((e, g, f"{where}/{i}"))
+    return None
+
+
+def check(path, data, tree, rng, truncations):
+    with open(path, "wb") as f:
+        f.write(data)
+    otb = OtbFile()
+    otb.load(path)
+    if len(otb.root_children) != 1:
+        return f"{len(otb.root_children)} root nodes"
+    problem = compare(tree, otb.root_children[0])
+    if problem:
+        return problem
+
+    otb.save(path)
+    with open(path, "rb") as f:
+        if f.read() != data:
+            return "save() output differs from the input"
+
+    for _ in range(truncations):
+        cut = rng.randrange(5, len(data))
+        with open(path, "wb") as f:
+            f.write(data[:cut])
+        try:
+            OtbFile().load(path)
+        except ValueError:
+            continue
+        return f"truncated at {cut} of {len(data)} bytes did not raise ValueError"
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OTB parser fuzz check")
+    parser.add_argument("--cases", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=1098)
+    parser.add_argument("--max-nodes", type=int, default=60)
+    parser.add_argument("--truncations", type=int, default=5)
+    parser.add_argument("--depth", type=int, default=5000,
+                        help="depth of the extra single-chain tree (recursion check)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory(prefix="itemmanager-fuzz-") as workdir:
+        path = os.path.join(workdir, "fuzz.otb")
+
+        cases = [("case", lambda: random_tree(rng, args.max_nodes))] * args.cases
+        if args.depth:
+            cases.append(("deep", lambda: deep_tree(rng, args.depth)))
+
+        for number, (name, make) in enumerate(cases):
+            tree = make()
+            data = encode(tree)
+            problem = check(path, data, tree, rng, args.truncations)
+            if problem:
+                failed = os.path.join(os.getcwd(), f"fuzz-otb-{args.seed}-{number}.otb")
+                with open(failed, "wb") as f:
+                    f.write(data)
+                print(f"FAIL {name} {number} (seed {args.seed}): {problem}")
+                print(f"  input saved to {failed}")
+                return 1
+
+    print(f"OK: {args.cases} random trees"
+          f"{f' + depth {args.depth} chain' if args.depth else ''} (seed {args.seed})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+"""Benchmarks for the DAT/SPR/OBD/OTB code paths.
+
+Generates synthetic client files (benchmarks/fixtures.py), times each
+operation and writes the results as JSON so runs can be compared across
+commits:
+
+    python benchmarks/run_benchmarks.py --preset small
+    python benchmarks/run_benchmarks.py --preset small --compare benchmarks/results/<old>.json
+
+--compare exits with code 1 when an operation got slower than --max-regression
+percent (default 20).
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT, "data")
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (DATA_DIR, BENCH_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import fixtures  # noqa: E402
+from clientDiff import diff_clients  # noqa: E402
+from clientFormat import detect_client_format  # noqa: E402
+from clientMerge import merge_clients  # noqa: E402
+from datspr import DatEditor, SprEditor  # noqa: E402
+from obdBatch import export_obd_batch  # noqa: E402
+from obdHandler import ObdFile, ObdHandler  # noqa: E402
+from otbFlags import DatItemTable, compute_reload  # noqa: E402
+from otbParser import OtbFile  # noqa: E402
+from spriteAtlas import export_atlas, import_atlas  # noqa: E402
+from sprConvert import convert_spr  # noqa: E402
+from spriteOptmizer import OptimizerWorker  # noqa: E402
+
+BUNDLED_OTB = os.path.join(ROOT, "assets", "xml", "items.otb")
+
+
+def _time(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+class Bench:
+    def __init__(self, workdir, paths, args):
+        self.workdir = workdir
+        self.paths = paths
+        self.args = args
+        self.results = {}
+
+    def run(self, name, func, repeat=None, ops=1, setup=None):
+        repeat = repeat or self.args.repeat
+        samples = []
+        for _ in range(repeat):
+            if setup:
+                setup()
+            samples.extend(_time(func, 1))
+        best = min(samples)
+        self.results[name] = {
+            "best_ms": best * 1000.0,
+            "median_ms": statistics.median(samples) * 1000.0,
+            "runs": repeat,
+            "ops": ops,
+            "per_op_us": best * 1e6 / ops if ops else 0.0,
+        }
+        print(f"  {name:<28} best {best * 1000:10.2f} ms   "
+              f"median {statistics.median(samples) * 1000:10.2f} ms   ({ops} ops)")
+
+    def all(self):
+        args = self.args
+        out = lambda name: os.path.join(self.workdir, name)  # noqa: E731
+
+        dat = DatEditor(self.paths["dat"], extended=args.extended)
+        self.run("dat.load", dat.load)
+        self.run("dat.save", lambda: dat.save(out("out.dat")))
+
+        spr = SprEditor(self.paths["spr"], transparency=args.transparency)
+
+        def fresh_spr():
+            spr.sprites_data = {}
+
+        self.run("spr.load", spr.load, setup=fresh_spr)
+        self.run("spr.save", lambda: spr.save(out("out.spr")))
+
+        sample_ids = list(range(1, min(spr.sprite_count, args.decode_count) + 1))
+        images = {}
+
+        def decode():
+            for sid in sample_ids:
+                images[sid] = spr.get_sprite(sid)
+
+        self.run("spr.decode", decode, ops=len(sample_ids))
+
+        encode_images = [img for img in images.values() if img is not None]
+        scratch = SprEditor(out("scratch.spr"), transparency=args.transparency)
+
+        def encode():
+            for i, img in enumerate(encode_images, start=1):
+                scratch.replace_sprite(i, img)
+
+        self.run("spr.encode", encode, ops=len(encode_images))
+
+        self.run("client.detect", lambda: detect_client_format(self.paths["dat"]))
+
+        def optimize():
+            worker = OptimizerWorker(spr, dat)
+            worker.scan_sprites()
+
+        self.run("optimizer.scan", optimize, ops=spr.sprite_count)
+
+        # OBD: the largest outfit (most sprites) is the worst case.
+        outfits = dat.things["outfits"]
+        if outfits:
+            outfit_id = max(outfits, key=lambda oid: len(outfits[oid]["texture_bytes"]))
+            thing = outfits[outfit_id]
+            sprite_ids = DatEditor.extract_sprite_ids_from_outfit_texture(thing["texture_bytes"])
+            obd_images = [spr.get_sprite(sid) for sid in sprite_ids]
+            obd_images = [img for img in obd_images if img is not None]
+            obd_path = out("outfit.obd")
+            self.run(
+                "obd.export",
+                lambda: ObdHandler.save_obd(obd_path, thing["props"], obd_images, "Outfit"),
+                ops=len(obd_images),
+            )
+            self.run("obd.import", lambda: ObdHandler.load_obd(obd_path), ops=len(obd_images))
+
+            def open_lazy():
+                with ObdFile(obd_path) as obd:
+                    return obd.properties, obd.thumbnail()
+
+            self.run("obd.open_lazy", open_lazy, ops=1)
+
+            # Batch: every outfit, decoded/encoded once per distinct sprite
+            self.run(
+                "obd.export_batch",
+                lambda: export_obd_batch(dat, spr, "outfits", list(outfits), out("obd_batch")),
+                ops=len(outfits),
+            )
+
+        # Atlas: every sprite out, then back into the same SPR (all reused)
+        all_sprites = list(range(1, spr.sprite_count + 1))
+        self.run(
+            "atlas.export",
+            lambda: export_atlas(spr, all_sprites, out("atlas")),
+            ops=len(all_sprites),
+        )
+        self.run(
+            "atlas.import",
+            lambda: import_atlas(spr, os.path.join(out("atlas"), "sprites.json")),
+            ops=len(all_sprites),
+        )
+
+        # Merge: every item of the client into itself (all sprites reused)
+        items = sorted(dat.things["items"])
+        self.run(
+            "merge.items",
+            lambda: merge_clients(dat, spr, dat, spr, "items", items),
+            ops=len(items),
+        )
+
+        # Diff: the client against itself (hashes both SPRs, compares every thing)
+        self.run(
+            "diff.clients",
+            lambda: diff_clients(dat, spr, dat, spr),
+            ops=sum(len(things) for things in dat.things.values()),
+        )
+
+        # SPR format conversion, streamed from the fixture file
+        self.run(
+            "spr.convert",
+            lambda: convert_spr(spr.spr_path, out("converted.spr"), not spr.transparency),
+            ops=spr.sprite_count,
+        )
+
+        otb_sources = [("otb.synthetic", self.paths["otb"])]
+        if os.path.exists(BUNDLED_OTB):
+            otb_sources.append(("otb.bundled", BUNDLED_OTB))
+        for name, otb_path in otb_sources:
+            otb = OtbFile()
+            self.run(f"{name}.load", lambda: otb.load(otb_path))
+            self.run(f"{name}.save", lambda: otb.save(out("out.otb")))
+
+        # DAT -> OTB flag reload against the synthetic DAT (client id = server id)
+        otb = OtbFile()
+        otb.load(self.paths["otb"])
+        self.run(
+            "otb.reload",
+            lambda: compute_reload(otb.items, DatItemTable(dat)),
+            ops=len(otb.items),
+        )
+
+        return self.results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(current, previous_path, max_regression):
+    with open(previous_path, "r", encoding="utf-8") as f:
+        previous = json.load(f)
+
+    print(f"\nCompared with {previous_path} ({previous['meta'].get('commit')})")
+    regressions = []
+    for name, row in current["results"].items():
+        old = previous["results"].get(name)
+        if not old:
+            print(f"  {name:<28} new")
+            continue
+        change = (row["best_ms"] - old["best_ms"]) / old["best_ms"] * 100 if old["best_ms"] else 0.0
+        marker = ""
+        if change > max_regression:
+            marker = "  <-- regression"
+            regressions.append(name)
+        print(f"  {name:<28} {old['best_ms']:10.2f} -> {row['best_ms']:10.2f} ms "
+              f"({change:+6.1f}%){marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DAT/SPR/OBD/OTB benchmarks")
+    parser.add_argument("--preset", choices=sorted(fixtures.PRESETS), default="small")
+    for key in ("items", "outfits", "effects", "missiles", "sprites"):
+        parser.add_argument(f"--{key}", type=int, help=f"override the preset {key} count")
+    parser.add_argument("--transparency", action="store_true", help="RGBA sprites")
+    parser.add_argument("--no-extended", dest="extended", action="store_false",
+                        help="2-byte sprite ids in the DAT")
+    parser.add_argument("--decode-count", type=int, default=5000,
+                        help="sprites decoded/encoded per run")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1098)
+    parser.add_argument("--output", default=os.path.join(BENCH_DIR, "results"))
+    parser.add_argument("--compare", help="previous results JSON")
+    parser.add_argument("--max-regression", type=float, default=20.0)
+    args = parser.parse_args()
+
+    sizes = dict(fixtures.PRESETS[args.preset])
+    for key in sizes:
+        if getattr(args, key) is not None:
+            sizes[key] = getattr(args, key)
+
+    with tempfile.TemporaryDirectory(prefix="itemmanager-bench-") as workdir:
+        print(f"Generating fixtures {sizes} ...")
+        start = time.perf_counter()
+        paths = fixtures.generate(
+            workdir, transparency=args.transparency, extended=args.extended,
+            seed=args.seed, **sizes,
+        )
+        print(f"  done in {time.perf_counter() - start:.1f} s")
+
+        results = Bench(workdir, paths, args).all()
+
+    commit = _git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "preset": args.preset,
+            "sizes": sizes,
+            "transparency": args.transparency,
+            "extended": args.extended,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+    os.makedirs(args.output, exist_ok=True)
+    out_path = os.path.join(args.output, f"{args.preset}-{commit}.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {out_path}")
+
+    if args.compare:
+        if compare(report, args.compare, args.max_regression):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+import random
+import time
+
+from PyQt6.QtCore import QElapsedTimer, QObject, Qt, QTimer, pyqtSignal
+
+
+class AnimationPlayer(QObject):
+    """Plays frame indices using the durations from the DAT animation block.
+
+    A single precise single-shot timer is re-armed for every frame against an
+    absolute schedule (start time + sum of durations), so timer latency does
+    not accumulate; when the GUI falls behind, late frames are skipped instead
+    of slowing the animation down.
+
+    The animation dict is the one produced by DatEditor.parse_texture():
+        {"async", "loop_count", "start_frame", "durations": [(min, max), ...]}
+    loop_count 0 loops forever, > 0 plays that many loops and stops on the last
+    frame, < 0 plays back and forth (ping-pong).
+    """
+
+    frameChanged = pyqtSignal(int)
+    finished = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self._advance)
+        self._clock = QElapsedTimer()
+
+        self._durations = []
+        self._loop_count = 0
+        self._frame = 0
+        self._direction = 1
+        self._loops_done = 0
+        self._next_due = 0
+        self._running = False
+
+    def is_running(self):
+        return self._running
+
+    def current_frame(self):
+        return self._frame
+
+    def start(self, frame_count, animation=None):
+        self.stop()
+        if frame_count <= 1:
+            return
+
+        if animation and len(animation.get("durations", [])) == frame_count:
+            self._durations = [
+                (max(1, low), max(1, low, high)) for low, high in animation["durations"]
+            ]
+            self._loop_count = animation.get("loop_count", 0)
+            is_async = animation.get("async", False)
+            start_frame = animation.get("start_frame", 0)
+        else:
+            # Same default DatEditor.build_texture writes (datspr imports this module)
+            from datspr import DEFAULT_FRAME_DURATION
+
+            self._durations = [(DEFAULT_FRAME_DURATION, DEFAULT_FRAME_DURATION)] * frame_count
+            self._loop_count = 0
+            is_async = True
+            start_frame = 0
+
+        if is_async:
+            if start_frame < 0 or start_frame >= frame_count:
+                start_frame = random.randrange(frame_count)
+        else:
+            # Synchronous animations follow the global clock, like the client
+            # does for every instance of the same thing.
+            start_frame = self._sync_phase()
+
+        self._frame = start_frame
+        self._direction = 1
+        self._loops_done = 0
+        self._running = True
+        self._clock.start()
+        self._next_due = self._frame_duration(self._frame)
+        self.frameChanged.emit(self._frame)
+        self._timer.start(self._next_due)
+
+    def stop(self):
+        self._timer.stop()
+        self._running = False
+
+    def _frame_duration(self, frame):
+        low, high = self._durations[frame]
+        if high > low:
+            return random.randint(low, high)
+        return low
+
+    def _sync_phase(self):
+        total = sum(low for low, _high in self._durations)
+        if total <= 0:
+            return 0
+        elapsed = int(time.monotonic() * 1000) % total
+        for frame, (low, _high) in enumerate(self._durations):
+            if elapsed < low:
+                return frame
+            elapsed -= low
+        return 0
+
+    def _step(self):
+        """Moves to the next frame. Returns False when the animation ended."""
+        last = len(self._durations) - 1
+
+        if self._loop_count < 0:
+            if not 0 <= self._frame + self._direction <= last:
+                self._direction = -self._direction
+            self._frame += self._direction
+            return True
+
+        if self._frame < last:
+            self._frame += 1
+            return True
+
+        self._loops_done += 1
+        if self._loop_count > 0 and self._loops_done >= self._loop_count:
+            return False
+        self._frame = 0
+        return True
+
+    def _advance(self):
+        if not self._running:
+            return
+
+        now = self._clock.elapsed()
+        while True:
+            if not self._step():
+                self._running = False
+                self.frameChanged.emit(self._frame)
+                self.finished.emit()
+                return
+            self._next_due += self._frame_duration(self._frame)
+            if self._next_due > now:
+                break
+
+        self.frameChanged.emit(self._frame)
+        self._timer.start(max(0, self._next_due - self._clock.elapsed()))
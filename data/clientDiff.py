@@ -0,0 +1,478 @@
+"""Diff estrutural entre duas versões de um client (DAT/SPR).
+
+Things são alinhados por id em cada categoria e comparados em três níveis:
+flags (máscara de bits por flag do DAT + valores), estrutura do texture
+(tamanho, layers, patterns, frames, animação) e conteúdo das sprites (hash
+dos pixels, então sprites só renumeradas não contam como mudança visual).
+As sprites dos dois SPRs são comparadas pelo hash, id a id.
+
+As comparações rodam em arrays numpy (máscaras de flags e hashes das
+sprites); o relatório HTML opcional mostra antes/depois de cada thing com
+composições geradas uma vez só por conteúdo (CompositeCache).
+
+    python data/clientDiff.py old/Tibia.dat old/Tibia.spr new/Tibia.dat new/Tibia.spr \\
+        --extended --html diff.html --json diff.json
+"""
+import argparse
+import base64
+import datetime
+import html
+import io
+import json
+import os
+import sys
+
+import numpy as np
+from PIL import Image
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from spriteHash import EMPTY_HASH, compute_sprite_hashes, decode_rgba
+
+CATEGORIES = ("items", "outfits", "effects", "missiles")
+# Campos do group comparados como "estrutura do texture"
+LAYOUT_KEYS = ("type", "width", "height", "crop_size", "layers",
+               "pattern_x", "pattern_y", "pattern_z", "frames", "animation")
+# Limite de linhas por seção no HTML (o JSON sempre tem tudo)
+HTML_MAX_ROWS = 500
+
+
+def _flag_tables():
+    from datspr import METADATA_FLAGS
+
+    return {name: flag for flag, (name, _fmt) in METADATA_FLAGS.items()}
+
+
+def flag_mask(props, flag_bits):
+    """Bit ``flag`` ligado para cada flag do DAT presente em ``props``."""
+    mask = 0
+    for name, bit in flag_bits.items():
+        if props.get(name):
+            mask |= 1 << bit
+    return mask
+
+
+def _hash_table(spr, hashes):
+    """
+    Array (sprite_count + 1, 2) uint64 com o hash de cada sprite id; o id 0
+    e as vazias ficam com o hash da sprite vazia.
+    """
+    empty = np.frombuffer(EMPTY_HASH, dtype=np.uint64)
+    table = np.empty((spr.sprite_count + 1, 2), dtype=np.uint64)
+    table[:] = empty
+    if hashes:
+        ids = np.fromiter(hashes.keys(), dtype=np.int64, count=len(hashes))
+        keep = ids <= spr.sprite_count
+        values = np.frombuffer(b"".join(hashes.values()), dtype=np.uint64).reshape(-1, 2)
+        table[ids[keep]] = values[keep]
+    return table
+
+
+def _sprite_array(groups):
+    ids = [sid for group in groups for sid in group["sprite_ids"]]
+    return np.asarray(ids, dtype=np.int64)
+
+
+def _lookup(table, ids):
+    """Hashes dos ids (ids fora do SPR contam como sprite vazia)."""
+    return table[np.where(ids < len(table), ids, 0)]
+
+
+def _layout(groups):
+    return [tuple(group[key] for key in LAYOUT_KEYS) for group in groups]
+
+
+def _changed_flags(old_props, new_props, mask_xor, flag_bits):
+    names = [name for name, bit in flag_bits.items() if mask_xor >> bit & 1]
+    for name in flag_bits:
+        key = name + "_data"
+        if name not in names and old_props.get(name) and old_props.get(key) != new_props.get(key):
+            names.append(name)
+    return names
+
+
+def diff_category(old_dat, new_dat, category, old_table, new_table, sprite_changed, flag_bits):
+    """Diff de uma categoria: {"added", "removed", "changed": {id: {...}}, "unchanged"}."""
+    from datspr import DatEditor
+
+    is_outfit = category == "outfits"
+    old_things = old_dat.things.get(category, {})
+    new_things = new_dat.things.get(category, {})
+    result = {
+        "added": sorted(set(new_things) - set(old_things)),
+        "removed": sorted(set(old_things) - set(new_things)),
+        "changed": {},
+        "unchanged": 0,
+    }
+
+    common = sorted(set(old_things) & set(new_things))
+    if not common:
+        return result
+
+    # Máscaras de flags dos dois lados de uma vez
+    old_masks = np.fromiter(
+        (flag_mask(old_things[tid]["props"], flag_bits) for tid in common), dtype=np.uint64,
+        count=len(common),
+    )
+    new_masks = np.fromiter(
+        (flag_mask(new_things[tid]["props"], flag_bits) for tid in common), dtype=np.uint64,
+        count=len(common),
+    )
+    mask_xor = old_masks ^ new_masks
+    same_extended = old_dat.extended == new_dat.extended
+
+    for i, tid in enumerate(common):
+        old_thing, new_thing = old_things[tid], new_things[tid]
+        change = {}
+
+        flags = _changed_flags(old_thing["props"], new_thing["props"], int(mask_xor[i]), flag_bits)
+        if flags:
+            change["flags"] = flags
+
+        old_texture = old_thing.get("texture_bytes", b"")
+        new_texture = new_thing.get("texture_bytes", b"")
+        try:
+            old_groups = DatEditor.parse_texture(old_texture, is_outfit, old_dat.extended)
+            new_groups = DatEditor.parse_texture(new_texture, is_outfit, new_dat.extended)
+        except ValueError as e:
+            change["error"] = str(e)
+            result["changed"][tid] = change
+            continue
+
+        if same_extended and old_texture == new_texture:
+            # Mesmos ids: só muda se alguma das sprites mudou no SPR
+            ids = _sprite_array(old_groups)
+            ids = ids[ids < len(sprite_changed)]
+            if ids.size and sprite_changed[ids].any():
+                change["sprites"] = True
+        else:
+            if _layout(old_groups) != _layout(new_groups):
+                change["texture"] = True
+            old_ids = _sprite_array(old_groups)
+            new_ids = _sprite_array(new_groups)
+            if old_ids.shape != new_ids.shape or (
+                _lookup(old_table, old_ids) != _lookup(new_table, new_ids)
+            ).any():
+                change["sprites"] = True
+            elif not np.array_equal(old_ids, new_ids):
+                # Mesmos pixels com outros sprite ids
+                change["remapped"] = True
+
+        if change:
+            result["changed"][tid] = change
+        else:
+            result["unchanged"] += 1
+    return result
+
+
+def diff_clients(old_dat, old_spr, new_dat, new_spr, categories=CATEGORIES, workers=None,
+                 progress=None, cancelled=None):
+    """
+    Compara dois clients. ``progress(feitos, total, texto)``; com
+    ``cancelled()`` verdadeiro retorna None. Retorna
+    {"categories": {categoria: diff_category}, "sprites": {"old_count",
+    "new_count", "added", "removed", "changed": [ids]}, "hash_tables"}.
+    """
+    def report(done, total, text):
+        if progress:
+            progress(done, total, text)
+
+    tables = []
+    for label, spr in (("old", old_spr), ("new", new_spr)):
+        hashes = compute_sprite_hashes(
+            spr, workers,
+            lambda done, total: report(done, total, f"Hashing {label} sprites"),
+            cancelled,
+        )
+        if hashes is None:
+            return None
+        tables.append(_hash_table(spr, hashes))
+    old_table, new_table = tables
+
+    # Sprites com o mesmo id e pixels diferentes
+    common = min(len(old_table), len(new_table))
+    sprite_changed = np.zeros(max(len(old_table), len(new_table)), dtype=bool)
+    sprite_changed[:common] = (old_table[:common] != new_table[:common]).any(axis=1)
+    sprite_changed[common:] = True
+    changed_ids = np.flatnonzero(sprite_changed[:common])
+
+    diff = {
+        "categories": {},
+        "sprites": {
+            "old_count": old_spr.sprite_count,
+            "new_count": new_spr.sprite_count,
+            "added": max(0, new_spr.sprite_count - old_spr.sprite_count),
+            "removed": max(0, old_spr.sprite_count - new_spr.sprite_count),
+            "changed": changed_ids.tolist(),
+        },
+        # Tabelas de hash (antigo, novo), reaproveitadas pelo relatório HTML
+        "hash_tables": (old_table, new_table),
+    }
+
+    flag_bits = _flag_tables()
+    for done, category in enumerate(categories, start=1):
+        if cancelled and cancelled():
+            return None
+        report(done - 1, len(categories), f"Comparing {category}")
+        diff["categories"][category] = diff_category(
+            old_dat, new_dat, category, old_table, new_table, sprite_changed, flag_bits
+        )
+    report(len(categories), len(categories), "Done")
+    return diff
+
+
+def format_summary(diff):
+    lines = []
+    for category, result in diff["categories"].items():
+        lines.append(
+            f"{category}: {len(result['added'])} added, {len(result['removed'])} removed, "
+            f"{len(result['changed'])} changed, {result['unchanged']} unchanged"
+        )
+    sprites = diff["sprites"]
+    lines.append(
+        f"sprites: {sprites['old_count']} -> {sprites['new_count']} "
+        f"({sprites['added']} added, {sprites['removed']} removed, "
+        f"{len(sprites['changed'])} changed)"
+    )
+    return "\n".join(lines)
+
+
+def diff_to_json(diff, old=None, new=None):
+    """Diff pronto para json.dump (chaves de id viram texto)."""
+    return {
+        "generated": datetime.datetime.now().isoformat(timespec="seconds"),
+        "old": old,
+        "new": new,
+        "categories": {
+            category: dict(result, changed={str(k): v for k, v in result["changed"].items()})
+            for category, result in diff["categories"].items()
+        },
+        "sprites": diff["sprites"],
+    }
+
+
+class CompositeCache:
+    """
+    PNGs (base64) da vista principal de cada thing, uma por conteúdo: a
+    chave é a estrutura + o hash das sprites da vista, então o mesmo visual
+    nos dois clients (ou em vários things) é composto uma vez só.
+    """
+
+    def __init__(self):
+        self.images = {}
+        self.hits = 0
+
+    def render(self, thing, is_outfit, dat, spr, table):
+        from datspr import DatEditor
+
+        try:
+            groups = DatEditor.parse_texture(thing.get("texture_bytes", b""), is_outfit, dat.extended)
+        except ValueError:
+            return None
+        if not groups:
+            return None
+        group = groups[0]
+        width, height = group["width"], group["height"]
+        view = width * height
+        # Outfits: olhando para o sul (pattern x 2), senão a primeira vista
+        start = 0
+        if is_outfit and group["pattern_x"] >= 3:
+            start = 2 * group["layers"] * view
+        ids = np.asarray(group["sprite_ids"][start:start + view], dtype=np.int64)
+
+        key = (width, height, _lookup(table, ids).tobytes())
+        cached = self.images.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        canvas = np.zeros((height * 32, width * 32, 4), dtype=np.uint8)
+        for index, sid in enumerate(ids.tolist()):
+            rgba = decode_rgba(spr.sprites_data.get(sid, b""), spr.transparency)
+            sx, sy = index % width, index // width
+            x, y = (width - 1 - sx) * 32, (height - 1 - sy) * 32
+            canvas[y:y + 32, x:x + 32] = np.frombuffer(rgba, dtype=np.uint8).reshape(32, 32, 4)
+        buffer = io.BytesIO()
+        Image.fromarray(canvas, "RGBA").save(buffer, "PNG", compress_level=1)
+        self.images[key] = base64.b64encode(buffer.getvalue()).decode("ascii")
+        return self.images[key]
+
+
+def _img(data):
+    if not data:
+        return "<span class='none'>-</span>"
+    return f"<img src='data:image/png;base64,{data}'>"
+
+
+def write_html_report(diff, old_dat, old_spr, new_dat, new_spr, path, title="Client diff",
+                      max_rows=HTML_MAX_ROWS):
+    """Relatório HTML (um arquivo, imagens embutidas) com antes/depois dos things."""
+    cache = CompositeCache()
+    old_table, new_table = diff["hash_tables"]
+
+    def old_image(category, tid):
+        thing = old_dat.things[category][tid]
+        return cache.render(thing, category == "outfits", old_dat, old_spr, old_table)
+
+    def new_image(category, tid):
+        thing = new_dat.things[category][tid]
+        return cache.render(thing, category == "outfits", new_dat, new_spr, new_table)
+
+    out = [
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>",
+        f"<title>{html.escape(title)}</title><style>",
+        "body{font-family:sans-serif;background:#222;color:#ddd}",
+        "table{border-collapse:collapse;margin-bottom:24px}",
+        "td,th{border:1px solid #444;padding:4px 8px;vertical-align:middle}",
+        "img{image-rendering:pixelated;background:#555}.none{color:#777}",
+        "</style></head><body>",
+        f"<h1>{html.escape(title)}</h1>",
+        f"<pre>{html.escape(format_summary(diff))}</pre>",
+    ]
+
+    def section(heading, total, rows, header):
+        out.append(f"<h3>{html.escape(heading)} ({total})</h3>")
+        if total > max_rows:
+            out.append(f"<p>Showing the first {max_rows}.</p>")
+        out.append("<table><tr>" + "".join(f"<th>{h}</th>" for h in header) + "</tr>")
+        out.extend(rows)
+        out.append("</table>")
+
+    for category, result in diff["categories"].items():
+        out.append(f"<h2>{category}</h2>")
+        if result["added"]:
+            rows = [
+                f"<tr><td>{tid}</td><td>{_img(new_image(category, tid))}</td></tr>"
+                for tid in result["added"][:max_rows]
+            ]
+            section("Added", len(result["added"]), rows, ["ID", "New"])
+        if result["removed"]:
+            rows = [
+                f"<tr><td>{tid}</td><td>{_img(old_image(category, tid))}</td></tr>"
+                for tid in result["removed"][:max_rows]
+            ]
+            section("Removed", len(result["removed"]), rows, ["ID", "Old"])
+        if result["changed"]:
+            rows = []
+            for tid, change in list(result["changed"].items())[:max_rows]:
+                details = []
+                if change.get("flags"):
+                    details.append("flags: " + ", ".join(change["flags"]))
+                for key in ("texture", "sprites", "remapped", "error"):
+                    if change.get(key):
+                        details.append(key if change[key] is True else f"{key}: {change[key]}")
+                rows.append(
+                    f"<tr><td>{tid}</td><td>{_img(old_image(category, tid))}</td>"
+                    f"<td>{_img(new_image(category, tid))}</td>"
+                    f"<td>{html.escape('; '.join(details))}</td></tr>"
+                )
+            section("Changed", len(result["changed"]), rows, ["ID", "Old", "New", "Changes"])
+
+    changed_sprites = diff["sprites"]["changed"]
+    if changed_sprites:
+        rows = []
+        for sid in changed_sprites[:max_rows]:
+            cells = []
+            for spr in (old_spr, new_spr):
+                rgba = decode_rgba(spr.sprites_data.get(sid, b""), spr.transparency)
+                buffer = io.BytesIO()
+                Image.frombytes("RGBA", (32, 32), rgba).save(buffer, "PNG", compress_level=1)
+                cells.append(_img(base64.b64encode(buffer.getvalue()).decode("ascii")))
+            rows.append(f"<tr><td>{sid}</td><td>{cells[0]}</td><td>{cells[1]}</td></tr>")
+        out.append("<h2>sprites</h2>")
+        section("Changed", len(changed_sprites), rows, ["ID", "Old", "New"])
+
+    out.append("</body></html>")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(out))
+    return cache
+
+
+class DiffWorker(QThread):
+    """Carrega o outro client e roda diff_clients fora da thread da interface."""
+
+    progress = pyqtSignal(int, int, str)
+    finished_diff = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, old_dat_path, old_spr_path, extended, transparency, new_dat, new_spr,
+                 html_path=None, parent=None):
+        super().__init__(parent)
+        self.old_dat_path = old_dat_path
+        self.old_spr_path = old_spr_path
+        self.extended = extended
+        self.transparency = transparency
+        self.new_dat = new_dat
+        self.new_spr = new_spr
+        self.html_path = html_path
+
+    def run(self):
+        from datspr import DatEditor, SprEditor
+
+        try:
+            self.progress.emit(0, 0, "Loading the other client")
+            old_dat = DatEditor(self.old_dat_path, extended=self.extended)
+            old_dat.load()
+            old_spr = SprEditor(self.old_spr_path, transparency=self.transparency)
+            old_spr.load()
+            diff = diff_clients(
+                old_dat, old_spr, self.new_dat, self.new_spr,
+                progress=lambda done, total, text: self.progress.emit(done, total, text),
+                cancelled=self.isInterruptionRequested,
+            )
+            if diff is not None and self.html_path:
+                self.progress.emit(0, 0, "Writing HTML report")
+                write_html_report(
+                    diff, old_dat, old_spr, self.new_dat, self.new_spr, self.html_path,
+                    title=f"{os.path.basename(self.old_dat_path)} -> "
+                          f"{os.path.basename(self.new_dat.dat_path)}",
+                )
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.finished_diff.emit(diff)
+
+
+def main(argv=None):
+    from datspr import DatEditor, SprEditor
+
+    parser = argparse.ArgumentParser(description="Structural diff between two DAT/SPR clients")
+    parser.add_argument("old_dat")
+    parser.add_argument("old_spr")
+    parser.add_argument("new_dat")
+    parser.add_argument("new_spr")
+    parser.add_argument("--extended", action="store_true", help="both clients are extended")
+    parser.add_argument("--transparency", action="store_true", help="both SPRs are RGBA")
+    parser.add_argument("--new-extended", action="store_true",
+                        help="only the new client is extended")
+    parser.add_argument("--new-transparency", action="store_true",
+                        help="only the new SPR is RGBA")
+    parser.add_argument("--category", action="append", choices=CATEGORIES,
+                        help="limit to a category (repeatable)")
+    parser.add_argument("--json", help="write the full diff as JSON")
+    parser.add_argument("--html", help="write a visual before/after report")
+    args = parser.parse_args(argv)
+
+    old_dat = DatEditor(args.old_dat, extended=args.extended)
+    old_dat.load()
+    old_spr = SprEditor(args.old_spr, transparency=args.transparency)
+    old_spr.load()
+    new_dat = DatEditor(args.new_dat, extended=args.extended or args.new_extended)
+    new_dat.load()
+    new_spr = SprEditor(args.new_spr, transparency=args.transparency or args.new_transparency)
+    new_spr.load()
+
+    diff = diff_clients(old_dat, old_spr, new_dat, new_spr, tuple(args.category or CATEGORIES))
+    print(format_summary(diff))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(diff_to_json(diff, args.old_dat, args.new_dat), f, indent=2)
+        print(f"JSON written to {args.json}")
+    if args.html:
+        write_html_report(diff, old_dat, old_spr, new_dat, new_spr, args.html,
+                          title=f"{args.old_dat} -> {args.new_dat}")
+        print(f"HTML report written to {args.html}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
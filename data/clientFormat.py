@@ -0,0 +1,210 @@
+"""Detecção de extended / transparency de um client antes de carregar.
+
+extended (sprite ids de 4 bytes no DAT): com mais de 65535 sprites no SPR
+só pode ser extended; senão os primeiros things do DAT são lidos com ids
+de 2 e de 4 bytes e vence o modo que lê mais things válidos (flags
+conhecidas, tamanhos plausíveis, sprite ids dentro do SPR). No modo errado
+a leitura sai de sincronia em poucos things.
+
+transparency (pixels RGBA no SPR): algumas sprites espalhadas pelo SPR são
+percorridas como RGB e como RGBA; no formato certo os trechos (transparentes,
+coloridos) fecham exatamente no tamanho gravado da sprite.
+
+Só lê o cabeçalho e um pedaço de cada arquivo, então leva milissegundos.
+
+    python data/clientFormat.py Tibia.dat
+"""
+import argparse
+import os
+import struct
+import sys
+
+from sprConvert import read_header, read_sprite
+
+# Things do DAT lidos em cada modo
+SAMPLE_THINGS = 300
+# Bytes do início do DAT lidos para a amostra
+SAMPLE_BYTES = 1 << 20
+# Sprites decodificadas em cada modo
+SAMPLE_SPRITES = 64
+MAX_STANDARD_SPRITES = 0xFFFF
+# Limites plausíveis do texture (width/height, layers, patterns)
+MAX_SIZE = 16
+MAX_PATTERNS = 32
+LAST_FLAG = 0xFF
+CATEGORY_ORDER = (("items", 100), ("outfits", 1), ("effects", 1), ("missiles", 1))
+
+
+def _flag_sizes():
+    """flag -> bytes de dados (None = MarketItem, tamanho variável)."""
+    from datspr import METADATA_FLAGS
+
+    return {
+        flag: (None if fmt is None else struct.calcsize(fmt) if fmt else 0)
+        for flag, (_name, fmt) in METADATA_FLAGS.items()
+    }
+
+
+def _skip_thing(data, p, is_outfit, extended, sprite_count, flag_sizes):
+    """Posição depois do thing em ``p``; ValueError se algo não fizer sentido."""
+    while True:
+        flag = data[p]
+        p += 1
+        if flag == LAST_FLAG:
+            break
+        if flag not in flag_sizes:
+            raise ValueError(f"unknown flag 0x{flag:02X}")
+        size = flag_sizes[flag]
+        if size is None:
+            name_len = struct.unpack_from("<H", data, p + 6)[0]
+            size = 8 + name_len + 4
+        p += size
+
+    groups = 1
+    if is_outfit:
+        groups = data[p]
+        p += 1
+        if not 1 <= groups <= 8:
+            raise ValueError("bad frame group count")
+
+    spr_fmt = "<I" if extended else "<H"
+    spr_size = 4 if extended else 2
+    for _ in range(groups):
+        if is_outfit:
+            p += 1
+        width, height = data[p], data[p + 1]
+        p += 2
+        if not (1 <= width <= MAX_SIZE and 1 <= height <= MAX_SIZE):
+            raise ValueError("bad size")
+        if width > 1 or height > 1:
+            p += 1
+        layers, px, py, pz, frames = struct.unpack_from("<5B", data, p)
+        p += 5
+        if not (1 <= layers <= MAX_SIZE and frames >= 1
+                and all(1 <= n <= MAX_PATTERNS for n in (px, py, pz))):
+            raise ValueError("bad layout")
+        if frames > 1:
+            p += 6 + frames * 8
+        total = width * height * layers * px * py * pz * frames
+        if p + total * spr_size > len(data):
+            raise IndexError("sample ends inside the texture")
+        if sprite_count is not None:
+            for i in range(total):
+                if struct.unpack_from(spr_fmt, data, p + i * spr_size)[0] > sprite_count:
+                    raise ValueError("sprite id outside the SPR")
+        p += total * spr_size
+    return p
+
+
+def dat_score(data, extended, sprite_count=None, limit=SAMPLE_THINGS, flag_sizes=None):
+    """
+    Quantos dos primeiros ``limit`` things de ``data`` (início do DAT) são
+    lidos sem erro no modo ``extended``.
+    """
+    flag_sizes = flag_sizes or _flag_sizes()
+    if len(data) < 12:
+        return 0
+    counts = struct.unpack_from("<4H", data, 4)
+    p = 12
+    parsed = 0
+    try:
+        for (category, first), count in zip(CATEGORY_ORDER, counts):
+            for _ in range(first, count + 1):
+                if parsed >= limit:
+                    return parsed
+                p = _skip_thing(data, p, category == "outfits", extended, sprite_count,
+                                flag_sizes)
+                parsed += 1
+    except (IndexError, ValueError, struct.error):
+        return parsed
+    return parsed
+
+
+def rle_consistent(raw, channels):
+    """True se os trechos da sprite fecham no tamanho gravado com ``channels`` bytes por pixel."""
+    start = 3 if raw[:3] == b"\xFF\x00\xFF" else 0
+    if len(raw) < start + 2:
+        return False
+    size = struct.unpack_from("<H", raw, start)[0]
+    data = raw[start + 2:]
+    if len(data) != size:
+        return False
+    p = 0
+    pixels = 0
+    while p + 4 <= size:
+        transparent, colored = struct.unpack_from("<HH", data, p)
+        p += 4 + colored * channels
+        pixels += transparent + colored
+        if pixels > 1024 or p > size:
+            return False
+    return p == size
+
+
+def spr_scores(spr_path, samples=SAMPLE_SPRITES):
+    """(sprite count, sprites coerentes como RGB, como RGBA, amostradas)."""
+    with open(spr_path, "rb") as f:
+        _signature, count, offsets = read_header(f)
+        used = [offset for offset in offsets if offset]
+        step = max(1, len(used) // samples)
+        raws = [read_sprite(f, offset) for offset in used[::step][:samples]]
+    rgb = sum(rle_consistent(raw, 3) for raw in raws)
+    rgba = sum(rle_consistent(raw, 4) for raw in raws)
+    return count, rgb, rgba, len(raws)
+
+
+def detect_client_format(dat_path, spr_path=None, default_extended=True,
+                         default_transparency=False):
+    """
+    {"extended", "transparency", "sprite_count", "dat_scores", "spr_scores"}.
+    Sem SPR ou sem diferença entre os modos fica o valor padrão.
+    """
+    if spr_path is None:
+        spr_path = os.path.splitext(dat_path)[0] + ".spr"
+
+    result = {
+        "extended": default_extended,
+        "transparency": default_transparency,
+        "sprite_count": None,
+        "dat_scores": None,
+        "spr_scores": None,
+    }
+
+    if os.path.exists(spr_path):
+        count, rgb, rgba, sampled = spr_scores(spr_path)
+        result["sprite_count"] = count
+        result["spr_scores"] = {"standard": rgb, "transparency": rgba, "sampled": sampled}
+        if rgb != rgba:
+            result["transparency"] = rgba > rgb
+
+    with open(dat_path, "rb") as f:
+        data = f.read(SAMPLE_BYTES)
+
+    sprite_count = result["sprite_count"]
+    flag_sizes = _flag_sizes()
+    scores = {
+        "standard": dat_score(data, False, sprite_count, flag_sizes=flag_sizes),
+        "extended": dat_score(data, True, sprite_count, flag_sizes=flag_sizes),
+    }
+    result["dat_scores"] = scores
+    if sprite_count is not None and sprite_count > MAX_STANDARD_SPRITES:
+        result["extended"] = True
+    elif scores["standard"] != scores["extended"]:
+        result["extended"] = scores["extended"] > scores["standard"]
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Detect extended/transparency of a client")
+    parser.add_argument("dat")
+    parser.add_argument("--spr", help="default: the .spr next to the .dat")
+    args = parser.parse_args(argv)
+
+    result = detect_client_format(args.dat, args.spr)
+    print(f"extended: {result['extended']}  transparency: {result['transparency']}")
+    print(f"sprites: {result['sprite_count']}  DAT scores: {result['dat_scores']}  "
+          f"SPR scores: {result['spr_scores']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,351 @@
+"""Cópia de things de um client (DAT/SPR) para outro.
+
+Os things escolhidos (ids ou busca por nome) são copiados do client de
+origem para o de destino com flags e texture; os sprite ids do texture são
+remapeados para o SPR de destino pelo hash dos pixels: sprites que já
+existem no destino (SpriteHashIndex) são reaproveitadas e só as novas são
+anexadas. Origem e destino podem ter formatos diferentes (extended,
+transparency); quando o formato do SPR é o mesmo, a sprite nova é copiada
+byte a byte.
+
+Como nas importações de OBD, ``merge_clients`` só monta um plano (com o
+mapeamento de ids de things e de sprites) e ``apply_merge`` grava. Roda
+sem interface:
+
+    python data/clientMerge.py src/Tibia.dat src/Tibia.spr dst/Tibia.dat dst/Tibia.spr \\
+        --category items --ids 100-5000 --out-dat out/Tibia.dat --out-spr out/Tibia.spr \\
+        --report merge.json
+"""
+import argparse
+import copy
+import datetime
+import hashlib
+import json
+import struct
+import sys
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from spriteHash import (
+    SpriteHashIndex, _run_hash_tasks, decode_rgba, encode_rgba, normalize_rgba,
+)
+
+CATEGORY_FIRST_ID = {"items": 100, "outfits": 1, "effects": 1, "missiles": 1}
+# Maior sprite id que cabe no texture de um DAT não extended (u16)
+MAX_STANDARD_SPRITE_ID = 0xFFFF
+
+
+def _source_hashes(src_spr, sprite_ids, dst_transparency, workers, progress, cancelled):
+    """
+    sprite id de origem -> hash dos pixels como ficariam no SPR de destino.
+    Mesmo formato: o hash da sprite decodificada (pool de processos, como
+    compute_sprite_hashes); formatos diferentes: normaliza antes.
+    """
+    sprites = src_spr.sprites_data
+    tasks = [(sid, [sprites[sid]]) for sid in sprite_ids if sprites.get(sid)]
+    if src_spr.transparency == dst_transparency:
+        return _run_hash_tasks(tasks, src_spr.transparency, workers, progress, cancelled)
+
+    hashes = {}
+    for done, (sid, (raw,)) in enumerate(tasks, start=1):
+        if done % 256 == 0 and cancelled and cancelled():
+            return None
+        rgba = normalize_rgba(decode_rgba(raw, src_spr.transparency), dst_transparency)
+        hashes[sid] = hashlib.md5(rgba).digest()
+        if progress and done % 256 == 0:
+            progress(done, len(tasks))
+    return hashes
+
+
+def _converted_sprite(src_spr, sprite_id, dst_transparency):
+    """Dados da sprite de origem no formato do SPR de destino."""
+    raw = src_spr.sprites_data[sprite_id]
+    if src_spr.transparency == dst_transparency:
+        return raw
+    rgba = normalize_rgba(decode_rgba(raw, src_spr.transparency), dst_transparency)
+    encoded = encode_rgba(rgba, dst_transparency)
+    return struct.pack("<H", len(encoded)) + encoded
+
+
+def merge_clients(src_dat, src_spr, dst_dat, dst_spr, category, thing_ids, keep_ids=False,
+                  hash_index=None, workers=None, progress=None, cancelled=None):
+    """
+    Prepara a cópia dos things ``thing_ids`` de ``category`` do client de
+    origem para o de destino. Com ``keep_ids`` cada thing vai para o mesmo
+    id (substituindo o que houver); senão entra depois do último id do
+    destino, na ordem de ``thing_ids``.
+
+    ``progress(feitos, total, texto)``; com ``cancelled()`` verdadeiro
+    retorna None. Não altera nada: retorna o plano para apply_merge:
+    {"category", "things": {id destino: {"props", "texture_bytes"}},
+    "sprites": {novo id: dados}, "thing_mapping": {origem: destino},
+    "sprite_mapping": {origem: destino}, "reused", "failed": [(id, erro)]}.
+    """
+    from datspr import DatEditor
+
+    is_outfit = category == "outfits"
+    src_things = src_dat.things.get(category, {})
+    dst_transparency = dst_spr.transparency
+
+    def report(done, total, text):
+        if progress:
+            progress(done, total, text)
+
+    plan = {
+        "category": category,
+        "things": {},
+        "sprites": {},
+        "thing_mapping": {},
+        "sprite_mapping": {0: 0},
+        "reused": 0,
+        "failed": [],
+    }
+
+    # 1. Texture de cada thing e as sprites que ele usa
+    parsed = []
+    used = set()
+    for thing_id in thing_ids:
+        thing = src_things.get(thing_id)
+        if thing is None:
+            plan["failed"].append((thing_id, "not in the source DAT"))
+            continue
+        try:
+            groups = DatEditor.parse_texture(
+                thing.get("texture_bytes", b""), is_outfit=is_outfit, extended=src_dat.extended
+            )
+        except ValueError as e:
+            plan["failed"].append((thing_id, str(e)))
+            continue
+        parsed.append((thing_id, thing, groups))
+        for group in groups:
+            used.update(group["sprite_ids"])
+    used.discard(0)
+    used = sorted(used)
+
+    # 2. Hashes: destino inteiro (índice) e as sprites usadas da origem
+    if hash_index is None:
+        hash_index = SpriteHashIndex.from_spr(
+            dst_spr, workers=workers,
+            progress=lambda done, total: report(done, total, "Indexing target sprites"),
+            cancelled=cancelled,
+        )
+        if hash_index is None:
+            return None
+    src_hashes = _source_hashes(
+        src_spr, used, dst_transparency, workers,
+        lambda done, total: report(done, total, "Hashing source sprites"), cancelled,
+    )
+    if src_hashes is None:
+        return None
+
+    # 3. Por thing: remapeia as sprites (iguais -> existente, novas -> fim do
+    # SPR) e monta o texture. Os ids novos só são reservados se o thing
+    # couber no DAT, para um thing recusado não deixar sprites órfãs.
+    max_sprite_id = None if dst_dat.extended else MAX_STANDARD_SPRITE_ID
+    sprite_mapping = plan["sprite_mapping"]
+    next_sprite_id = dst_spr.sprite_count + 1
+    next_thing_id = max(dst_dat.counts.get(category, 0) + 1, CATEGORY_FIRST_ID[category])
+    for done, (thing_id, thing, groups) in enumerate(parsed, start=1):
+        if cancelled and cancelled():
+            return None
+
+        mapping = {}
+        new_sprites = {}
+        reused = 0
+        for group in groups:
+            for sid in group["sprite_ids"]:
+                if sid in sprite_mapping or sid in mapping:
+                    continue
+                digest = src_hashes.get(sid)
+                if digest is None:
+                    # Vazia ou inexistente na origem
+                    mapping[sid] = 0
+                    continue
+                target = hash_index.get(digest)
+                if target is not None:
+                    reused += 1
+                elif digest in new_sprites:
+                    target = new_sprites[digest][1]
+                else:
+                    target = next_sprite_id + len(new_sprites)
+                    new_sprites[digest] = (sid, target)
+                mapping[sid] = target
+
+        # Ids já em sprite_mapping vêm de things aceitos, então cabem
+        if max_sprite_id is not None and any(
+            target > max_sprite_id for target in mapping.values()
+        ):
+            plan["failed"].append((thing_id, "sprite id above 65535 in a non-extended DAT"))
+            continue
+
+        for digest, (sid, target) in new_sprites.items():
+            hash_index.add(digest, target)
+            plan["sprites"][target] = _converted_sprite(src_spr, sid, dst_transparency)
+        next_sprite_id += len(new_sprites)
+        plan["reused"] += reused
+        sprite_mapping.update(mapping)
+
+        for group in groups:
+            group["sprite_ids"] = [sprite_mapping[sid] for sid in group["sprite_ids"]]
+        if keep_ids:
+            target_id = thing_id
+        else:
+            target_id = next_thing_id
+            next_thing_id += 1
+        plan["things"][target_id] = {
+            "props": copy.deepcopy(thing["props"]),
+            "texture_bytes": DatEditor.build_texture(groups, is_outfit, dst_dat.extended),
+        }
+        plan["thing_mapping"][thing_id] = target_id
+        if done % 256 == 0:
+            report(done, len(parsed), "Copying things")
+
+    report(len(parsed), len(parsed), "Done")
+    return plan
+
+
+def apply_merge(plan, dst_dat, dst_spr):
+    """Grava no DAT/SPR de destino o plano de merge_clients."""
+    from obdBatch import apply_obd_import
+
+    apply_obd_import(plan, dst_dat, dst_spr)
+
+
+def merge_report(plan, source=None, target=None):
+    """Resumo + mapeamentos do plano, pronto para json.dump."""
+    return {
+        "generated": datetime.datetime.now().isoformat(timespec="seconds"),
+        "source": source,
+        "target": target,
+        "category": plan["category"],
+        "summary": {
+            "things": len(plan["things"]),
+            "new_sprites": len(plan["sprites"]),
+            "reused_sprites": plan["reused"],
+            "failed": len(plan["failed"]),
+        },
+        "thing_mapping": {str(k): v for k, v in plan["thing_mapping"].items()},
+        "sprite_mapping": {str(k): v for k, v in sorted(plan["sprite_mapping"].items()) if k},
+        "failed": [{"id": thing_id, "error": error} for thing_id, error in plan["failed"]],
+    }
+
+
+def format_summary(plan):
+    return (
+        f"{len(plan['things'])} {plan['category']} copied, "
+        f"{len(plan['sprites'])} new sprites appended, "
+        f"{plan['reused']} sprites reused from the target, "
+        f"{len(plan['failed'])} failed."
+    )
+
+
+class MergeWorker(QThread):
+    """Roda merge_clients fora da thread da interface (carrega a origem e monta o plano)."""
+
+    progress = pyqtSignal(int, int, str)
+    finished_merge = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, src_dat_path, src_spr_path, src_extended, src_transparency,
+                 dst_dat, dst_spr, category, thing_ids, keep_ids=False, parent=None):
+        super().__init__(parent)
+        self.src_dat_path = src_dat_path
+        self.src_spr_path = src_spr_path
+        self.src_extended = src_extended
+        self.src_transparency = src_transparency
+        self.dst_dat = dst_dat
+        self.dst_spr = dst_spr
+        self.category = category
+        self.thing_ids = thing_ids
+        self.keep_ids = keep_ids
+
+    def run(self):
+        from datspr import DatEditor, SprEditor
+
+        try:
+            self.progress.emit(0, 0, "Loading source client")
+            src_dat = DatEditor(self.src_dat_path, extended=self.src_extended)
+            src_dat.load()
+            src_spr = SprEditor(self.src_spr_path, transparency=self.src_transparency)
+            src_spr.load()
+
+            thing_ids = self.thing_ids
+            if thing_ids is None:
+                thing_ids = sorted(src_dat.things.get(self.category, {}))
+            plan = merge_clients(
+                src_dat, src_spr, self.dst_dat, self.dst_spr, self.category, thing_ids,
+                keep_ids=self.keep_ids,
+                progress=lambda done, total, text: self.progress.emit(done, total, text),
+                cancelled=self.isInterruptionRequested,
+            )
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.finished_merge.emit(plan)
+
+
+def main(argv=None):
+    from datspr import DatEditor, SprEditor
+    from spriteAtlas import parse_id_ranges
+
+    parser = argparse.ArgumentParser(description="Copy things between DAT/SPR clients")
+    parser.add_argument("src_dat")
+    parser.add_argument("src_spr")
+    parser.add_argument("dst_dat")
+    parser.add_argument("dst_spr")
+    parser.add_argument("--category", default="items",
+                        choices=["items", "outfits", "effects", "missiles"])
+    parser.add_argument("--ids", help="source thing ids (Ex: 100-200, 305); default: all")
+    parser.add_argument("--name", help="source items whose items.xml name contains this text")
+    parser.add_argument("--keep-ids", action="store_true",
+                        help="copy to the same ids (replacing) instead of appending")
+    parser.add_argument("--src-extended", action="store_true")
+    parser.add_argument("--src-transparency", action="store_true")
+    parser.add_argument("--dst-extended", action="store_true")
+    parser.add_argument("--dst-transparency", action="store_true")
+    parser.add_argument("--out-dat", required=True)
+    parser.add_argument("--out-spr", required=True)
+    parser.add_argument("--report", help="write the id mappings as JSON")
+    args = parser.parse_args(argv)
+    if args.name and args.category != "items":
+        parser.error("--name only selects items (items.xml has no other categories)")
+
+    src_dat = DatEditor(args.src_dat, extended=args.src_extended)
+    src_dat.load()
+    src_spr = SprEditor(args.src_spr, transparency=args.src_transparency)
+    src_spr.load()
+    dst_dat = DatEditor(args.dst_dat, extended=args.dst_extended)
+    dst_dat.load()
+    dst_spr = SprEditor(args.dst_spr, transparency=args.dst_transparency)
+    dst_spr.load()
+
+    if args.name:
+        from itemsXml import load_item_names
+
+        names = load_item_names(args.src_dat)
+        if names is None:
+            parser.error("--name needs items.xml and items.otb next to the source .dat")
+        thing_ids = names.search(args.name)
+    elif args.ids:
+        thing_ids = parse_id_ranges(args.ids)
+    else:
+        thing_ids = sorted(src_dat.things.get(args.category, {}))
+
+    plan = merge_clients(src_dat, src_spr, dst_dat, dst_spr, args.category, thing_ids,
+                         keep_ids=args.keep_ids)
+    apply_merge(plan, dst_dat, dst_spr)
+    dst_dat.save(args.out_dat)
+    dst_spr.save(args.out_spr)
+
+    print(format_summary(plan))
+    for thing_id, error in plan["failed"][:20]:
+        print(f"  {thing_id}: {error}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(merge_report(plan, args.src_dat, args.dst_dat), f, indent=2)
+        print(f"Report written to {args.report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,3 @@
-import google.generativeai as genai
 from .base_ai import BaseAI
 
 
@@ -15,6 +14,8 @@ class GeminiAI(BaseAI):
     def connect(self, api_key: str) -> tuple[bool, str]:
         """Conecta ao Google Gemini"""
         try:
+            import google.generativeai as genai
+
             self.api_key = api_key
             genai.configure(api_key=api_key)
             
@@ -49,6 +50,8 @@ class GeminiAI(BaseAI):
     def get_available_models(self) -> list[str]:
         """Retorna modelos Gemini disponíveis"""
         try:
+            import google.generativeai as genai
+
             models = []
             for m in genai.list_models():
                 if 'generateContent' in m.supported_generation_methods:
@@ -60,6 +63,8 @@ class GeminiAI(BaseAI):
     def set_model(self, model_name: str) -> bool:
         """Troca o modelo sendo usado"""
         try:
+            import google.generativeai as genai
+
             self.model_name = model_name
             self.model = genai.GenerativeModel(model_name)
             return True
@@ -1,5 +1,4 @@
 import os
-from openai import OpenAI
 from .base_ai import BaseAI
 
 class PerplexityAI(BaseAI):
@@ -15,6 +14,8 @@ class PerplexityAI(BaseAI):
     def connect(self, api_key: str) -> tuple[bool, str]:
         """Conecta ao Perplexity"""
         try:
+            from openai import OpenAI
+
             self.api_key = api_key
             self.client = OpenAI(
                 api_key=api_key,
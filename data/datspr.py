@@ -1,5 +1,6 @@
 import atexit
 import io
+import json
 import os
 import re
 import shutil
@@ -10,31 +11,39 @@ import uuid
 from collections import OrderedDict
 from copy import deepcopy
 
-from particleEditor import ParticleGenerator
-from shaderEditor import ShaderEditor
-from spell_maker import SpellMakerWindow
-from obdHandler import ObdHandler
-from looktype_generator import LookTypeGeneratorWindow
-from monster_generator import MonsterGeneratorWindow
-from spriteEditor import SliceWindow
-from spriteOptmizer import SpriteOptimizerWindow
+from animationPlayer import AnimationPlayer
+from itemsXml import load_item_names
+from searchIndex import SearchIndexWorker, update_monster_file, update_spells_file
+from previewCompositor import PreviewCompositor
+import profiler
+from profiler import profiled
+
+# Sub-tools (pygame, OpenGL, AI clients, rembg/Real-ESRGAN) are imported by
+# the open_* handlers on first use so they stay out of the startup path. The
+# same goes for the numpy-based tools (clientDiff, clientMerge, clientFormat,
+# obdBatch/obdHandler, spriteAtlas, spriteHash, sprConvert), imported by the
+# handlers and workers that use them.
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 ICON_PATH = os.path.join(BASE_DIR, "..", "assets", "window")
 
 
 from PIL import Image, ImageDraw, ImageFilter
-from PyQt6.QtCore import QMimeData, QPoint, Qt, QTimer, pyqtSignal, QSize, QRect
+from PyQt6.QtCore import QMimeData, QPoint, Qt, QThread, QTimer, pyqtSignal, QSize, QRect, QUrl
 from PyQt6.QtGui import (
     QColor,
     QContextMenuEvent,
     QCursor,
+    QDesktopServices,
     QDrag,
+    QFont,
     QIcon,
     QImage,
     QKeyEvent,
+    QKeySequence,
     QPainter,
     QPixmap,
+    QShortcut,
     QWheelEvent,
 )
 from PyQt6.QtWidgets import (
@@ -43,6 +52,7 @@ from PyQt6.QtWidgets import (
     QCheckBox,
     QColorDialog,
     QComboBox,
+    QDialog,
     QDoubleSpinBox,
     QFileDialog,
     QFrame,
@@ -54,6 +64,7 @@ from PyQt6.QtWidgets import (
     QGridLayout,
     QGroupBox,
     QHBoxLayout,
+    QInputDialog,
     QLabel,
     QLineEdit,
     QListWidget,
@@ -61,6 +72,7 @@ from PyQt6.QtWidgets import (
     QLayout,
     QMenu,
     QMessageBox,
+    QProgressDialog,
     QPushButton,
     QScrollArea,
     QSizePolicy,
@@ -69,6 +81,7 @@ from PyQt6.QtWidgets import (
     QSpinBox,
     QSplitter,
     QTabWidget,
+    QTextEdit,
     QVBoxLayout,
     QWidget,
 )
@@ -118,6 +131,9 @@ METADATA_FLAGS = {
 REVERSE_METADATA_FLAGS = {info[0]: flag for flag, info in METADATA_FLAGS.items()}
 LAST_FLAG = 0xFF
 
+# Duração (ms) de cada frame sem durações gravadas (texture novo e preview)
+DEFAULT_FRAME_DURATION = 75
+
 
 def ob_index_to_rgb(idx):
     idx = max(0, min(215, int(idx)))
@@ -146,6 +162,7 @@ class DatEditor:
         self.counts = {"items": 0, "outfits": 0, "effects": 0, "missiles": 0}
         self.things = {"items": {}, "outfits": {}, "effects": {}, "missiles": {}}
 
+    @profiled("DatEditor.load")
     def load(self):
         with open(self.dat_path, "rb") as f:
             self.signature = struct.unpack("<I", f.read(4))[0]
@@ -404,6 +421,257 @@ class DatEditor:
                             else:
                                 print(f"Erro: Dados de {name} não são bytes.")
 
+    @staticmethod
+    def parse_texture(texture_bytes, is_outfit=False, extended=True):
+        """
+        Decodifica texture_bytes em uma lista de frame groups (itens/efeitos/missiles
+        têm um único grupo). Cada grupo é um dict:
+            type, width, height, crop_size, layers, pattern_x, pattern_y,
+            pattern_z, frames, animation, sprite_ids
+        animation é None (1 frame) ou
+            {"async": bool, "loop_count": int, "start_frame": int,
+             "durations": [(min_ms, max_ms), ...]}
+        Lança ValueError se os bytes estiverem truncados.
+        """
+        from obdHandler import group_sprite_count
+
+        spr_fmt = "I" if extended else "H"
+        groups = []
+        try:
+            for group, offset in DatEditor.texture_headers(texture_bytes, is_outfit, extended):
+                total = group_sprite_count(group)
+                group["sprite_ids"] = list(
+                    struct.unpack_from(f"<{total}{spr_fmt}", texture_bytes, offset)
+                )
+                groups.append(group)
+        except struct.error as e:
+            raise ValueError(f"Invalid texture data: {e}")
+
+        return groups
+
+    @staticmethod
+    def texture_headers(texture_bytes, is_outfit=False, extended=True):
+        """
+        Só os cabeçalhos dos frame groups: [(group sem sprite_ids, offset dos
+        sprite ids em texture_bytes)]. Lança ValueError se estiverem truncados.
+        """
+        from obdHandler import group_sprite_count
+
+        headers = []
+        if not texture_bytes:
+            return headers
+
+        spr_size = 4 if extended else 2
+
+        try:
+            offset = 0
+            if is_outfit:
+                fg_count = texture_bytes[0]
+                offset = 1
+            else:
+                fg_count = 1
+
+            for _ in range(fg_count):
+                fg_type = 0
+                if is_outfit:
+                    fg_type = texture_bytes[offset]
+                    offset += 1
+
+                width, height = struct.unpack_from("<BB", texture_bytes, offset)
+                offset += 2
+                crop_size = 32
+                if width > 1 or height > 1:
+                    crop_size = texture_bytes[offset]
+                    offset += 1
+
+                layers, px, py, pz, frames = struct.unpack_from(
+                    "<BBBBB", texture_bytes, offset
+                )
+                offset += 5
+
+                animation = None
+                if frames > 1:
+                    is_async, loop_count, start_frame = struct.unpack_from(
+                        "<Bib", texture_bytes, offset
+                    )
+                    offset += 6
+                    raw = struct.unpack_from(f"<{frames * 2}I", texture_bytes, offset)
+                    offset += frames * 8
+                    animation = {
+                        "async": bool(is_async),
+                        "loop_count": loop_count,
+                        "start_frame": start_frame,
+                        "durations": list(zip(raw[0::2], raw[1::2])),
+                    }
+
+                group = {
+                    "type": fg_type,
+                    "width": width,
+                    "height": height,
+                    "crop_size": crop_size,
+                    "layers": layers,
+                    "pattern_x": px,
+                    "pattern_y": py,
+                    "pattern_z": pz,
+                    "frames": frames,
+                    "animation": animation,
+                }
+                headers.append((group, offset))
+                offset += group_sprite_count(group) * spr_size
+                if offset > len(texture_bytes):
+                    raise ValueError("Invalid texture data: sprite ids truncated")
+        except (struct.error, IndexError) as e:
+            raise ValueError(f"Invalid texture data: {e}")
+
+        return headers
+
+    @staticmethod
+    def layout_props(groups, is_outfit=False):
+        """
+        Props de layout (Width, Height, CropSize, Layers, Pattern*, Animation)
+        do primeiro frame group, como o parser do DAT preenche; usar sempre
+        que texture_bytes for refeito.
+        """
+        group = groups[0]
+        props = OrderedDict()
+        if is_outfit:
+            props["FrameGroupCount"] = len(groups)
+            props["FrameGroupType"] = group.get("type", 0)
+        width, height = group["width"], group["height"]
+        props["Width"] = width
+        props["Height"] = height
+        props["CropSize"] = group.get("crop_size", 32) if width > 1 or height > 1 else 0
+        props["Layers"] = group["layers"]
+        props["PatternX"] = group["pattern_x"]
+        props["PatternY"] = group["pattern_y"]
+        props["PatternZ"] = group["pattern_z"]
+        props["Animation"] = group["frames"]
+        return props
+
+    @staticmethod
+    def build_texture(groups, is_outfit=False, extended=True):
+        """
+        Inverso de parse_texture: monta texture_bytes a partir dos frame
+        groups (mesmas chaves; type, crop_size e animation são opcionais).
+        Lança ValueError se sprite_ids não tiver o tamanho do grupo ou se
+        algum valor não couber no formato (ex: mais de 255 frames).
+        """
+        from obdHandler import group_sprite_count
+
+        spr_fmt = "I" if extended else "H"
+        out = bytearray()
+        try:
+            if is_outfit:
+                out.append(len(groups))
+
+            for group in groups:
+                if is_outfit:
+                    out.append(group.get("type", 0))
+
+                width, height = group["width"], group["height"]
+                out.extend(struct.pack("<BB", width, height))
+                if width > 1 or height > 1:
+                    out.append(group.get("crop_size", 32))
+
+                layers = group["layers"]
+                px, py, pz = group["pattern_x"], group["pattern_y"], group["pattern_z"]
+                frames = group["frames"]
+                out.extend(struct.pack("<BBBBB", layers, px, py, pz, frames))
+
+                if frames > 1:
+                    animation = group.get("animation") or {}
+                    durations = animation.get("durations") or (
+                        [(DEFAULT_FRAME_DURATION, DEFAULT_FRAME_DURATION)] * frames
+                    )
+                    if len(durations) != frames:
+                        raise ValueError(f"{len(durations)} durations for {frames} frames")
+                    out.extend(struct.pack(
+                        "<Bib",
+                        int(bool(animation.get("async", False))),
+                        animation.get("loop_count", 0),
+                        animation.get("start_frame", 0),
+                    ))
+                    for min_ms, max_ms in durations:
+                        out.extend(struct.pack("<II", min_ms, max_ms))
+
+                sprite_ids = group["sprite_ids"]
+                total = group_sprite_count(group)
+                if len(sprite_ids) != total:
+                    raise ValueError(f"{len(sprite_ids)} sprite ids, expected {total}")
+                out.extend(struct.pack(f"<{total}{spr_fmt}", *sprite_ids))
+        except struct.error as e:
+            # Ex: frames > 255 ou sprite id > 65535 sem extended
+            raise ValueError(f"Invalid texture values: {e}")
+
+        return bytes(out)
+
+    @staticmethod
+    def sprite_index(group, frame=0, pattern_x=0, pattern_y=0, pattern_z=0, layer=0, x=0, y=0):
+        """
+        Posição em group["sprite_ids"] da sprite (x, y) da layer / patterns /
+        frame dados; ordem do texture: frame, z, y, x, layer, y, x.
+        Lança ValueError fora dos limites do grupo.
+        """
+        limits = (
+            (frame, group["frames"], "frame"),
+            (pattern_z, group["pattern_z"], "pattern_z"),
+            (pattern_y, group["pattern_y"], "pattern_y"),
+            (pattern_x, group["pattern_x"], "pattern_x"),
+            (layer, group["layers"], "layer"),
+            (y, group["height"], "y"),
+            (x, group["width"], "x"),
+        )
+        index = 0
+        for value, size, name in limits:
+            if not 0 <= value < size:
+                raise ValueError(f"{name} {value} outside 0..{size - 1}")
+            index = index * size + value
+        return index
+
+    def set_sprite_at(self, category, thing_id, index, sprite_id, group_index=0):
+        """
+        Troca o sprite id na posição ``index`` do frame group sem remontar o
+        texture: só os 2/4 bytes do id mudam. Retorna o id anterior.
+        Lança ValueError se o thing não tiver texture ou o índice não existir.
+        """
+        from obdHandler import group_sprite_count
+
+        thing = self.things.get(category, {}).get(thing_id)
+        if not thing or not thing.get("texture_bytes"):
+            raise ValueError(f"{category} {thing_id} has no texture")
+        texture_bytes = thing["texture_bytes"]
+
+        headers = self.texture_headers(texture_bytes, category == "outfits", self.extended)
+        if not 0 <= group_index < len(headers):
+            raise ValueError(f"frame group {group_index} not in {category} {thing_id}")
+        group, offset = headers[group_index]
+        if not 0 <= index < group_sprite_count(group):
+            raise ValueError(f"sprite index {index} outside the frame group")
+
+        spr_fmt = "<I" if self.extended else "<H"
+        if not 0 <= sprite_id <= (0xFFFFFFFF if self.extended else 0xFFFF):
+            raise ValueError(f"sprite id {sprite_id} does not fit the DAT format")
+        position = offset + index * struct.calcsize(spr_fmt)
+        patched = bytearray(texture_bytes)
+        old_id = struct.unpack_from(spr_fmt, patched, position)[0]
+        struct.pack_into(spr_fmt, patched, position, sprite_id)
+        thing["texture_bytes"] = bytes(patched)
+        return old_id
+
+    def set_sprite(self, category, thing_id, sprite_id, group_index=0, frame=0, pattern_x=0,
+                   pattern_y=0, pattern_z=0, layer=0, x=0, y=0):
+        """set_sprite_at pela posição (frame, patterns, layer, x, y). Retorna o id anterior."""
+        thing = self.things.get(category, {}).get(thing_id)
+        headers = self.texture_headers(
+            thing.get("texture_bytes", b"") if thing else b"", category == "outfits", self.extended
+        )
+        if not 0 <= group_index < len(headers):
+            raise ValueError(f"frame group {group_index} not in {category} {thing_id}")
+        index = self.sprite_index(
+            headers[group_index][0], frame, pattern_x, pattern_y, pattern_z, layer, x, y
+        )
+        return self.set_sprite_at(category, thing_id, index, sprite_id, group_index)
+
     @staticmethod
     def extract_sprite_ids_from_texture_bytes(texture_bytes):
         if not texture_bytes:
@@ -621,7 +889,10 @@ class SprEditor:
         self.sprite_count = 0
         self.sprites_data = {}
         self.modified = False
+        self.decoded_cache_size = 4096
+        self._decoded = OrderedDict()
 
+    @profiled("SprEditor.load")
     def load(self):
         
         if not os.path.exists(self.spr_path):
@@ -660,6 +931,7 @@ class SprEditor:
                 f.seek(offset)
                 self.sprites_data[sprite_id] = f.read(size)
 
+    @profiled("SprEditor.save")
     def save(self, output_path):
         
         with open(output_path, "wb") as f:
@@ -686,6 +958,7 @@ class SprEditor:
             for off in final_offsets:
                 f.write(struct.pack("<I", off))
 
+    @profiled("SprEditor.get_sprite")
     def get_sprite(self, sprite_id):
         raw_data = self.sprites_data.get(sprite_id)
         if not raw_data:
@@ -710,6 +983,26 @@ class SprEditor:
         else:
             return self._decode_standard(sprite_content)
 
+    def get_sprite_cached(self, sprite_id):
+        """
+        get_sprite() com cache LRU. A imagem retornada é compartilhada, não modificar.
+        A entrada é descartada quando sprites_data[sprite_id] é substituído.
+        """
+        raw_data = self.sprites_data.get(sprite_id)
+        entry = self._decoded.get(sprite_id)
+        if entry is not None and entry[0] is raw_data:
+            self._decoded.move_to_end(sprite_id)
+            profiler.count("sprite_cache.hit")
+            return entry[1]
+
+        profiler.count("sprite_cache.miss")
+        img = self.get_sprite(sprite_id)
+        self._decoded[sprite_id] = (raw_data, img)
+        self._decoded.move_to_end(sprite_id)
+        if len(self._decoded) > self.decoded_cache_size:
+            self._decoded.popitem(last=False)
+        return img
+
     def replace_sprite(self, sprite_id, image):
         
         if sprite_id < 1:
@@ -732,12 +1025,16 @@ class SprEditor:
         full_data.extend(struct.pack("<H", size))
         full_data.extend(encoded_bytes)
 
+        self.set_sprite_data(sprite_id, bytes(full_data))
+
+    def set_sprite_data(self, sprite_id, full_data):
+        """Grava uma sprite já codificada (u16 de tamanho + pixels RLE)."""
         if sprite_id > self.sprite_count:
             for i in range(self.sprite_count + 1, sprite_id):
                 self.sprites_data[i] = b""
             self.sprite_count = sprite_id
 
-        self.sprites_data[sprite_id] = bytes(full_data)
+        self.sprites_data[sprite_id] = full_data
         self.modified = True
 
     def _decode_standard(self, data):
@@ -1125,13 +1422,28 @@ class DraggableLabel(ClickableLabel):
 
 class DroppablePreviewLabel(ClickableLabel):
     spriteDropped = pyqtSignal(int, QPoint)
+    obdDropped = pyqtSignal(str)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.setAcceptDrops(True)
 
+    @staticmethod
+    def dropped_obd(mime_data):
+        """Primeiro .obd entre as URLs arrastadas (biblioteca de OBD / explorer) ou None."""
+        for url in mime_data.urls():
+            path = url.toLocalFile()
+            if path.lower().endswith(".obd"):
+                return path
+        return None
+
     def dragEnterEvent(self, event):
-        if event.mimeData().hasText():
+        if event.mimeData().hasUrls():
+            if self.dropped_obd(event.mimeData()):
+                event.acceptProposedAction()
+            else:
+                event.ignore()
+        elif event.mimeData().hasText():
             try:
                 int(event.mimeData().text())
                 event.acceptProposedAction()
@@ -1141,6 +1453,11 @@ class DroppablePreviewLabel(ClickableLabel):
             event.ignore()
 
     def dropEvent(self, event):
+        obd_path = self.dropped_obd(event.mimeData())
+        if obd_path:
+            self.obdDropped.emit(obd_path)
+            event.acceptProposedAction()
+            return
         try:
             sprite_id = int(event.mimeData().text())
 
@@ -1152,6 +1469,36 @@ class DroppablePreviewLabel(ClickableLabel):
             event.ignore()
 
 
+class SprConvertWorker(QThread):
+    """Roda convert_spr (sprConvert) fora da thread da interface."""
+
+    progress = pyqtSignal(int, int)
+    finished_convert = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, src_path, dst_path, to_transparency, parent=None):
+        super().__init__(parent)
+        self.src_path = src_path
+        self.dst_path = dst_path
+        self.to_transparency = to_transparency
+
+    def run(self):
+        from sprConvert import convert_spr
+
+        try:
+            report = convert_spr(
+                self.src_path,
+                self.dst_path,
+                self.to_transparency,
+                progress=lambda done, total: self.progress.emit(done, total),
+                cancelled=self.isInterruptionRequested,
+            )
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.finished_convert.emit(report)
+
+
 class DatSprTab(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -1171,8 +1518,20 @@ class DatSprTab(QWidget):
         self.outfit_walk_enabled = False
 
 
-        self.anim_timer = QTimer()
-        self.anim_timer.timeout.connect(self.update_animation_step)
+        self.anim_player = AnimationPlayer(self)
+        self.anim_player.frameChanged.connect(self.on_animation_frame)
+        self.anim_player.finished.connect(self.on_animation_finished)
+
+        self.compositor = PreviewCompositor()
+        self.current_preview_thing_id = None
+
+        # Nomes do items.xml por client id (ver load_item_names_for)
+        self.item_names = None
+
+        # Busca de itens/monstros/spells (montada em background)
+        self.search_index = None
+        self.search_worker = None
+        self.pending_search_updates = []
 
         self.visible_sprite_widgets = {}
         self.current_ids = []
@@ -1194,6 +1553,13 @@ class DatSprTab(QWidget):
         top_frame = QHBoxLayout()
 
 
+        self.chk_autodetect = QCheckBox("Auto-detect")
+        self.chk_autodetect.setChecked(True)
+        self.chk_autodetect.setToolTip(
+            "Detect Extended/Transparency from the files when opening a client"
+        )
+        top_frame.addWidget(self.chk_autodetect)
+
         self.chk_extended = QCheckBox("Extended")
         self.chk_extended.setChecked(True)
         top_frame.addWidget(self.chk_extended)
@@ -1231,7 +1597,7 @@ class DatSprTab(QWidget):
         id_frame = QHBoxLayout()
         id_frame.addWidget(QLabel("ID: (Ex: 100, 105-110):"))
         self.id_entry = QLineEdit()
-        self.id_entry.setPlaceholderText("Enter the item IDs here")
+        self.id_entry.setPlaceholderText("Enter the item IDs or a name here")
         self.id_entry.returnPressed.connect(self.load_ids_from_entry)
         id_frame.addWidget(self.id_entry, 1)
 
@@ -1240,6 +1606,23 @@ class DatSprTab(QWidget):
         id_frame.addWidget(self.load_ids_button)
         middle_layout.addLayout(id_frame)
 
+        # Busca por nome em itens, monstros e spells
+        search_frame = QHBoxLayout()
+        search_frame.addWidget(QLabel("Search:"))
+        self.search_entry = QLineEdit()
+        self.search_entry.setPlaceholderText("Items, monsters and spells by name...")
+        self.search_entry.setEnabled(False)
+        self.search_entry.textChanged.connect(self.on_search_text_changed)
+        self.search_entry.returnPressed.connect(self.open_first_search_result)
+        search_frame.addWidget(self.search_entry, 1)
+        middle_layout.addLayout(search_frame)
+
+        self.search_results = QListWidget()
+        self.search_results.setMaximumHeight(140)
+        self.search_results.hide()
+        self.search_results.itemActivated.connect(self.on_search_result_activated)
+        middle_layout.addWidget(self.search_results)
+
         main_grid = QGridLayout()
         main_grid.setColumnStretch(0, 1)
         main_grid.setColumnStretch(1, 1)
@@ -1422,6 +1805,7 @@ class DatSprTab(QWidget):
         self.image_label.setText("No sprite")
         self.image_label.doubleClicked.connect(self.on_preview_click)
         self.image_label.spriteDropped.connect(self.handle_preview_drop)
+        self.image_label.obdDropped.connect(self.handle_obd_drop)
         preview_layout.addWidget(self.image_label, 0, Qt.AlignmentFlag.AlignCenter)
 
         prev_controls = QHBoxLayout()
@@ -1553,6 +1937,13 @@ class DatSprTab(QWidget):
         self.particle_button.setToolTip("Particle Editor")
         self.particle_button.clicked.connect(self.open_particle)
         id_operations_frame.addWidget(self.particle_button)         
+
+        self.obd_library_button = QPushButton()
+        self.obd_library_button.setIcon(QIcon(os.path.join(ICON_PATH, "viewer_icon.png")))
+        self.obd_library_button.setIconSize(QSize(24, 24))
+        self.obd_library_button.setToolTip("OBD Library")
+        self.obd_library_button.clicked.connect(self.open_obd_library)
+        id_operations_frame.addWidget(self.obd_library_button)
      
 
         self.apply_button = QPushButton()
@@ -1591,33 +1982,54 @@ class DatSprTab(QWidget):
         self.context_menu = QMenu(self)
         self.context_menu.addAction("Import", self.on_context_import)
         self.context_menu.addAction("Export", self.on_context_export)
+        self.context_menu.addAction("Export OBD (batch)...", self.on_batch_export_obd)
+        self.context_menu.addAction("Import OBD folder...", self.on_batch_import_obd)
+        self.context_menu.addAction("Export sprite atlas...", self.on_export_atlas)
+        self.context_menu.addAction("Import sprite atlas...", self.on_import_atlas)
+        self.context_menu.addAction("Merge from another client...", self.on_merge_from_client)
+        self.context_menu.addAction("Compare with another client...", self.on_compare_client)
+        self.context_menu.addAction("Convert SPR format...", self.on_convert_spr)
         self.context_menu.addAction("Replace", self.on_context_replace)
         self.context_menu.addAction("Clear", self.on_context_delete)
         self.right_click_target = None
 
+        if profiler.ENABLED:
+            self.profiler_shortcut = QShortcut(QKeySequence("Ctrl+Shift+P"), self)
+            self.profiler_shortcut.activated.connect(self.show_profiler_report)
+
         self.id_buttons = {}
         self.ids_per_page = 1000
         self.current_page = 0
         
   
     def open_shader(self):
+        from shaderEditor import ShaderEditor
+
         self.shader_win = ShaderEditor(
         )
         self.shader_win.show()       
         
     def open_particle(self):
+        from particleEditor import ParticleGenerator
+
         self.particle_win = ParticleGenerator(
         )
         self.particle_win.run()   
         
     def open_monster_generator(self):
+        from monster_generator import MonsterGeneratorWindow
+
         self.monster_win = MonsterGeneratorWindow(
         )
+        self.monster_win.monsterSaved.connect(self.on_monster_saved)
         self.monster_win.show()
         
     def open_spell_maker(self):
+        from spell_maker import SpellMakerWindow
+
         self.spell_win = SpellMakerWindow(
         )
+        self.spell_win.spellsSaved.connect(self.on_spells_saved)
         self.spell_win.show()        
     
     def open_looktype_generator(self):
@@ -1626,7 +2038,9 @@ class DatSprTab(QWidget):
                 self, "Warning", "Upload the DAT and SPR files first.."
             )
             return
-       
+
+        from looktype_generator import LookTypeGeneratorWindow
+
         self.looktype_win = LookTypeGeneratorWindow(
             spr_editor=self.spr,
             dat_editor=self.editor,
@@ -1708,74 +2122,51 @@ class DatSprTab(QWidget):
         self.show_preview_at_index(0)
 
     def build_outfit_texture_bytes(
-        self, width, height, frames, sprite_ids, layer_type=0
+        self, width, height, frames, sprite_ids, layer_type=0, crop_size=32, animation=None
     ):
-
-        out = bytearray()
-
-        out.append(1)
-
-        # Byte 2: Frame Group Type (0 = Idle/Normal)
-        out.append(layer_type)
-
-   
-        out.extend(struct.pack("<BB", width, height))
-
-        if width > 1 or height > 1:
-            out.append(32)  # CropSize
-
-        layers = 1
-        px = 1
-        py = 1
-        pz = 1
-
-        out.extend(struct.pack("<BBBBB", layers, px, py, pz, frames))
-
-        # Improved Animations
-        if frames > 1:
-            out.append(0)  # Async/Mode (0 = Sync)
-            out.extend(struct.pack("<I", 0))  
-            out.append(0)  
-            for _ in range(frames):
-
-                out.extend(struct.pack("<I", 75))
-
-        # Sprite IDs
-        use_extended = self.editor.extended
-        fmt = "<I" if use_extended else "<H"
-
-        for sid in sprite_ids:
-            out.extend(struct.pack(fmt, sid))
-
-        return bytes(out)
+        """Texture de outfit com um frame group (1 layer, patterns 1) via DatEditor.build_texture."""
+        group = {
+            "type": layer_type,
+            "width": width,
+            "height": height,
+            "crop_size": crop_size,
+            "layers": 1,
+            "pattern_x": 1,
+            "pattern_y": 1,
+            "pattern_z": 1,
+            "frames": frames,
+            "animation": animation,
+            "sprite_ids": list(sprite_ids),
+        }
+        return DatEditor.build_texture([group], is_outfit=True, extended=self.editor.extended)
 
     def handle_preview_drop(self, new_sprite_id, drop_pos):
-
+        """Sprite solta no preview: troca só o sprite id daquela posição do texture."""
         if not self.current_ids or not self.editor:
             return
 
-        cat_map = {
-            "Item": "items",
-            "Outfit": "outfits",
-            "Effect": "effects",
-            "Missile": "missiles",
-        }
-        current_cat_key = cat_map.get(self.category_combo.currentText(), "items")
+        current_cat_key = self.get_current_category_key()
         target_id = self.current_ids[0]
-
-        if target_id not in self.editor.things[current_cat_key]:
+        things = self.editor.things[current_cat_key]
+        if target_id not in things:
             return
+        is_outfit = current_cat_key == "outfits"
+
+        if not things[target_id].get("texture_bytes"):
+            # Thing sem texture: cria um 1x1 vazio para receber a sprite
+            things[target_id]["texture_bytes"] = DatEditor.build_texture(
+                [{"width": 1, "height": 1, "layers": 1, "pattern_x": 1, "pattern_y": 1,
+                  "pattern_z": 1, "frames": 1, "sprite_ids": [0]}],
+                is_outfit,
+                self.editor.extended,
+            )
+            self.prepare_preview_for_current_ids(current_cat_key)
 
-        item_data = self.editor.things[current_cat_key][target_id]
-        props = item_data.get("props", {})
-
-        width = props.get("Width", 1)
-        height = props.get("Height", 1)
-        width = 1 if width == 0 else width
-        height = 1 if height == 0 else height
+        width = max(1, self.current_item_width)
+        height = max(1, self.current_item_height)
 
         pixmap = self.image_label.pixmap()
-        if not pixmap:
+        if not pixmap or pixmap.isNull():
             return
         pm_w = pixmap.width()
         pm_h = pixmap.height()
@@ -1789,62 +2180,70 @@ class DatSprTab(QWidget):
         if click_x < 0 or click_x >= pm_w or click_y < 0 or click_y >= pm_h:
             return
 
-        sprite_size = 32
-        col = int(click_x / sprite_size)
-        row = int(click_y / sprite_size)
-
-        if col >= width:
-            col = width - 1
-        if row >= height:
-            row = height - 1
-
-        inverted_row = (height - 1) - row
-        inverted_col = (width - 1) - col
-
-        target_row = inverted_row
-        target_col = inverted_col
-
-        sprites_per_frame = width * height * props.get("Layers", 1)
-        base_frame_index = self.current_preview_index * sprites_per_frame
-
-
-        local_index = (target_row * width) + target_col
-   
-
-        final_index = base_frame_index + local_index
-
-        current_sprites = self.current_preview_sprite_list
-        if not current_sprites:
-            current_sprites = [0] * (final_index + 1)
-
-        if final_index >= len(current_sprites):
-            current_sprites.extend([0] * (final_index - len(current_sprites) + 1))
+        # O pixmap do preview é ampliado; cada sprite ocupa pm_w / width pixels
+        col = min(int(click_x * width / pm_w), width - 1)
+        row = min(int(click_y * height / pm_h), height - 1)
 
-        if 0 <= final_index < len(current_sprites):
-            current_sprites[final_index] = new_sprite_id
+        # Preview desenha x/y invertidos (sprite 0 no canto inferior direito)
+        target_col = (width - 1) - col
+        target_row = (height - 1) - row
 
+        start, layers_to_render = self.preview_view(self.current_preview_index)
+        layer = layers_to_render[0] if len(layers_to_render) else 0
+        slot = start + layer * width * height + target_row * width + target_col
+        group_index = self.current_framegroup_index if is_outfit else 0
 
-            original_bytes = item_data.get("texture_bytes", b"")
-            new_texture_bytes = self.rebuild_texture_bytes(
-                original_bytes, current_sprites
-            )
-            self.editor.things[current_cat_key][target_id]["texture_bytes"] = (
-                new_texture_bytes
+        try:
+            self.editor.set_sprite_at(
+                current_cat_key, target_id, slot, new_sprite_id, group_index
             )
+        except ValueError as e:
+            self.status_label.setText(f"Drop ignored: {e}")
+            self.status_label.setStyleSheet("color: orange;")
+            return
 
-            self.prepare_preview_for_current_ids(current_cat_key)
-            self.show_preview_at_index(self.current_preview_index)
+        if slot < len(self.current_preview_sprite_list):
+            self.current_preview_sprite_list[slot] = new_sprite_id
+        self.compositor.patch_thing(
+            current_cat_key,
+            target_id,
+            slot,
+            things[target_id]["texture_bytes"],
+            group_index if is_outfit else None,
+        )
+        self.show_preview_at_index(self.current_preview_index)
 
     def open_slicer(self):
         if not self.spr:
             QMessageBox.warning(self, "Aviso", "Carregue um arquivo .spr primeiro.")
             return
 
+        from spriteEditor import SliceWindow
+
         self.slicer_win = SliceWindow()
 
         self.slicer_win.sprites_imported.connect(self.handle_slicer_import)
         self.slicer_win.show()
 
+    def open_obd_library(self):
+        from obdLibrary import ObdLibraryWindow
+
+        if getattr(self, "obd_library_win", None) is None:
+            self.obd_library_win = ObdLibraryWindow(self)
+            self.obd_library_win.obdActivated.connect(self.handle_obd_drop)
+        self.obd_library_win.show()
+        self.obd_library_win.raise_()
+
+    def handle_obd_drop(self, file_path):
+        """.obd arrastado/ativado na biblioteca: importa no thing aberto."""
+        if not self.editor or not self.spr:
+            QMessageBox.warning(self, "Aviso", "Carregue os arquivos DAT e SPR primeiro.")
+            return
+        if not self.current_ids:
+            QMessageBox.warning(self, "Aviso", "Selecione um ID para receber o OBD.")
+            return
+        self.import_file_into(self.current_ids[0], self.get_current_category_key(), file_path)
+
     def open_optimizer(self):
         if not self.spr or not self.editor:
             QMessageBox.warning(
@@ -1852,6 +2251,7 @@ class DatSprTab(QWidget):
             )
             return
 
+        from spriteOptmizer import SpriteOptimizerWindow
 
         self.opt_win = SpriteOptimizerWindow(self.spr, self.editor, self)
         self.opt_win.show()
@@ -1889,63 +2289,23 @@ class DatSprTab(QWidget):
 
 
 
-    def animate_loop(self):
-        if not self.is_animating or not self.current_preview_sprite_list:
-            self.is_animating = False
-            self.anim_btn.setText("▶")
-            self.anim_btn.setStyleSheet("background-color: #444444;")
-            return
-
-        group_size = (
-            self.current_item_width
-            * self.current_item_height
-            * self.current_item_layers
-        )
-        if group_size == 0:
-            group_size = 1
-        total_views = len(self.current_preview_sprite_list) // group_size
-
-        if total_views <= 1:
-            self.toggle_animation()
-            return
-
-        next_index = self.current_preview_index + 1
-        if next_index >= total_views:
-            next_index = 0
-
-        self.show_preview_at_index(next_index)
-
-        self.anim_timer = QTimer()
-        self.anim_timer.timeout.connect(self.animate_loop)
-        self.anim_timer.setSingleShot(True)
-        self.anim_timer.start(100)
-
     def build_texture_bytes(
-        self, width, height, layers, px, py, pz, frames, sprite_ids
+        self, width, height, layers, px, py, pz, frames, sprite_ids, crop_size=32, animation=None
     ):
-        out = bytearray()
-
-        out.extend(struct.pack("<BB", width, height))
-
-        if width > 1 or height > 1:
-            out.append(32)
-
-        out.extend(struct.pack("<BBBBB", layers, px, py, pz, frames))
-
-        if frames > 1:
-            out.append(0)  
-            out.extend(struct.pack("<I", 0)) 
-            out.append(0)  
-            for _ in range(frames):
-                out.extend(struct.pack("<I", 75))
-
-        use_extended = self.editor.extended
-        fmt = "<I" if use_extended else "<H"
-
-        for sid in sprite_ids:
-            out.extend(struct.pack(fmt, sid))
-
-        return bytes(out)
+        """Texture de item/efeito/missile via DatEditor.build_texture."""
+        group = {
+            "width": width,
+            "height": height,
+            "crop_size": crop_size,
+            "layers": layers,
+            "pattern_x": px,
+            "pattern_y": py,
+            "pattern_z": pz,
+            "frames": frames,
+            "animation": animation,
+            "sprite_ids": list(sprite_ids),
+        }
+        return DatEditor.build_texture([group], is_outfit=False, extended=self.editor.extended)
 
     def get_current_category_key(self):
         cat_map = {
@@ -1956,40 +2316,6 @@ class DatSprTab(QWidget):
         }
         return cat_map.get(self.category_combo.currentText(), "items")
 
-    def rebuild_texture_bytes(self, original_bytes, new_sprite_ids):
-        if not original_bytes:
-            header = b"\x01\x01\x01\x01\x01\x01\x01"
-        else:
-            offset = 0
-            width, height = struct.unpack_from("<BB", original_bytes, offset)
-            offset += 2
-
-            if width > 1 or height > 1:
-                offset += 1
-
-            layers, px, py, pz, frames = struct.unpack_from(
-                "<BBBBB", original_bytes, offset
-            )
-            offset += 5
-
-            anim_detail_size = 0
-            if frames > 1:
-                anim_detail_size = 1 + 4 + 1 + (frames * 8)
-
-            offset += anim_detail_size
-
-            header = original_bytes[:offset]
-
-        ids_data = bytearray()
-
-        is_extended = self.editor.extended
-        fmt = "<I" if is_extended else "<H"
-
-        for sid in new_sprite_ids:
-            ids_data.extend(struct.pack(fmt, int(sid)))
-
-        return header + ids_data
-
     def show_context_menu(self, event, item_id, context_type):
         self.right_click_target = {"id": item_id, "type": context_type}
         if isinstance(event, QContextMenuEvent):
@@ -2000,6 +2326,8 @@ class DatSprTab(QWidget):
             self.context_menu.exec(QPoint(event.x(), event.y()))
 
     def on_context_export(self):
+        from obdBatch import export_obd
+
         if not self.current_ids:
             return
 
@@ -2030,29 +2358,11 @@ class DatSprTab(QWidget):
         if not file_path:
             return
 
-        texture_bytes = thing.get("texture_bytes", b"")
-        sprite_ids = self.editor.extract_sprite_ids_from_texture_bytes(texture_bytes)
-
-        images = []
-        if not sprite_ids:
-
-            print("Aviso: Nenhuma sprite encontrada nos dados do item.")
-        else:
-            for sid in sprite_ids:
-                img = self.spr.get_sprite(sid)
-                if img:
-                    images.append(img)
-                else:
-
-                    images.append(Image.new("RGBA", (32, 32), (0, 0, 0, 0)))
-
-
         if filter_used == "Object Builder (*.obd)" or file_path.endswith(".obd"):
             try:
-
-                ObdHandler.save_obd(file_path, thing["props"], images, ob_type)
+                count = export_obd(self.editor, self.spr, cat_key, target_id, file_path)
                 QMessageBox.information(
-                    self, "Sucesso", f"Exportado {len(images)} sprites para OBD."
+                    self, "Sucesso", f"Exportado {count} sprites para OBD."
                 )
             except Exception as e:
                 QMessageBox.critical(self, "Erro", f"Falha ao salvar OBD: {e}")
@@ -2060,51 +2370,556 @@ class DatSprTab(QWidget):
 
             pass
 
-    def on_context_delete(self):
-        if not self.right_click_target:
-            return
+    def on_batch_export_obd(self):
+        """Exporta vários things (ids ou nome) para uma pasta, um .obd por thing."""
+        from obdBatch import ObdExportWorker
 
-        target_id = self.right_click_target["id"]
-        target_type = self.right_click_target["type"]
+        if not self.editor or not self.spr:
+            return
+        cat_key = self.get_current_category_key()
 
-        reply = QMessageBox.question(
-            self,
-            "Confirm Clear",
-            f"Are you sure you want to clear {target_type} ID {target_id}?\nThis action cannot be undone.",
-            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+        default = ", ".join(map(str, self.current_ids[:1])) if self.current_ids else ""
+        if len(self.current_ids) > 1:
+            default = f"{self.current_ids[0]}-{self.current_ids[-1]}"
+        text, ok = QInputDialog.getText(
+            self, "Export OBD (batch)", "IDs (Ex: 100, 105-110) or item name:", text=default
         )
-        if reply != QMessageBox.StandardButton.Yes:
+        if not ok or not text.strip():
             return
 
-        if target_type == "id_list":
-            if not self.editor:
-                return
+        if self.is_name_search(text):
+            ids = self.search_item_names(text)
+            cat_key = self.get_current_category_key()
+        else:
+            ids = self.parse_ids(text)
+        if not ids:
+            QMessageBox.warning(self, "Export OBD", "No things match.")
+            return
 
-            cat_map = {
-                "Item": "items",
-                "Outfit": "outfits",
-                "Effect": "effects",
-                "Missile": "missiles",
-            }
-            current_cat_key = cat_map.get(self.category_combo.currentText(), "items")
+        out_dir = QFileDialog.getExistingDirectory(self, "Export OBD to folder")
+        if not out_dir:
+            return
 
-            if target_id in self.editor.things[current_cat_key]:
-                minimal_texture = b"\x01\x01\x01\x01\x01\x01\x01\x00\x00\x00\x00"
+        progress = QProgressDialog("Exporting OBD...", "Cancel", 0, len(ids), self)
+        progress.setWindowTitle("Export OBD (batch)")
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(0)
+
+        self.obd_export_worker = ObdExportWorker(self.editor, self.spr, cat_key, ids, out_dir)
+        worker = self.obd_export_worker
+        progress.canceled.connect(worker.requestInterruption)
+        worker.progress.connect(
+            lambda done, total, thing_id: (
+                progress.setValue(done),
+                progress.setLabelText(f"{cat_key} {thing_id} ({done}/{total})"),
+            )
+        )
+        worker.finished_export.connect(
+            lambda report: self.on_batch_export_finished(report, out_dir, progress)
+        )
+        worker.failed.connect(
+            lambda error: (
+                progress.close(),
+                QMessageBox.critical(self, "Export OBD", f"Falha ao exportar: {error}"),
+            )
+        )
+        worker.start()
 
-                self.editor.things[current_cat_key][target_id] = {
-                    "props": OrderedDict(),
-                    "texture_bytes": minimal_texture,
-                }
+    def on_batch_export_finished(self, report, out_dir, progress):
+        progress.close()
+        if report is None:
+            self.status_label.setText("OBD export cancelled.")
+            self.status_label.setStyleSheet("color: orange;")
+            return
+        message = (
+            f"{len(report['written'])} OBD files written to {out_dir}\n"
+            f"{report['sprites']} distinct sprites encoded."
+        )
+        if report["missing"]:
+            message += f"\n{len(report['missing'])} IDs not found/invalid were skipped."
+        self.status_label.setText(f"{len(report['written'])} OBD files exported.")
+        self.status_label.setStyleSheet("color: green;")
+        QMessageBox.information(self, "Export OBD", message)
 
-                self.refresh_id_list()
-                self.load_single_id(target_id)
-                self.status_label.setText(f"ID {target_id} cleared successfully.")
-                self.status_label.setStyleSheet("color: green;")
+    def on_batch_import_obd(self):
+        """Importa todos os .obd de uma pasta (123.obd -> ID 123), reaproveitando sprites iguais."""
+        from obdBatch import ObdImportWorker
 
-        elif target_type == "sprite_list":
-            QMessageBox.information(
-                self,
-                "Not Implemented",
+        if not self.editor or not self.spr:
+            return
+        cat_key = self.get_current_category_key()
+
+        folder = QFileDialog.getExistingDirectory(self, "Import OBD folder")
+        if not folder:
+            return
+
+        progress = QProgressDialog("Importing OBD...", "Cancel", 0, 0, self)
+        progress.setWindowTitle("Import OBD folder")
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(0)
+
+        self.obd_import_worker = ObdImportWorker(self.editor, self.spr, cat_key, folder)
+        worker = self.obd_import_worker
+        progress.canceled.connect(worker.requestInterruption)
+        worker.progress.connect(
+            lambda done, total, text: (
+                progress.setMaximum(total),
+                progress.setValue(done),
+                progress.setLabelText(f"{text} ({done}/{total})"),
+            )
+        )
+        worker.finished_import.connect(lambda plan: self.on_batch_import_finished(plan, progress))
+        worker.failed.connect(
+            lambda error: (
+                progress.close(),
+                QMessageBox.critical(self, "Import OBD", f"Falha ao importar: {error}"),
+            )
+        )
+        worker.start()
+
+    def on_batch_import_finished(self, plan, progress):
+        from obdBatch import apply_obd_import
+
+        progress.close()
+        if plan is None:
+            self.status_label.setText("OBD import cancelled.")
+            self.status_label.setStyleSheet("color: orange;")
+            return
+
+        apply_obd_import(plan, self.editor, self.spr)
+        self.compositor.clear()
+        self.refresh_id_list()
+        self.refresh_sprite_list()
+        if self.current_ids:
+            self.load_ids_from_entry()
+
+        message = (
+            f"{len(plan['things'])} things imported ({len(plan['new_things'])} new IDs).\n"
+            f"{len(plan['sprites'])} new sprites appended, {plan['reused']} frames reused existing sprites."
+        )
+        if plan["failed"]:
+            message += f"\n{len(plan['failed'])} files failed:\n" + "\n".join(
+                f"{os.path.basename(path)}: {error}" for path, error in plan["failed"][:10]
+            )
+        self.status_label.setText(f"{len(plan['things'])} OBD files imported.")
+        self.status_label.setStyleSheet("color: green;")
+        QMessageBox.information(self, "Import OBD", message)
+
+    def on_export_atlas(self):
+        """Exporta sprites (faixa de ids ou as dos things da categoria) em atlas PNG + JSON."""
+        from spriteAtlas import AtlasExportWorker, parse_id_ranges, things_sprite_ids
+
+        if not self.editor or not self.spr:
+            return
+        cat_key = self.get_current_category_key()
+
+        text, ok = QInputDialog.getText(
+            self,
+            "Export sprite atlas",
+            f"Sprite IDs (Ex: 1-5000, 7000) or empty for every sprite used by {cat_key}:",
+        )
+        if not ok:
+            return
+        try:
+            if text.strip():
+                sprite_ids = parse_id_ranges(text)
+            else:
+                sprite_ids = things_sprite_ids(self.editor, cat_key)
+        except ValueError:
+            QMessageBox.warning(self, "Export sprite atlas", "Invalid ID format.")
+            return
+        if not sprite_ids:
+            QMessageBox.warning(self, "Export sprite atlas", "No sprites to export.")
+            return
+
+        out_dir = QFileDialog.getExistingDirectory(self, "Export sprite atlas to folder")
+        if not out_dir:
+            return
+
+        progress = QProgressDialog("Exporting sprites...", "Cancel", 0, len(sprite_ids), self)
+        progress.setWindowTitle("Export sprite atlas")
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(0)
+
+        self.atlas_export_worker = AtlasExportWorker(self.spr, sprite_ids, out_dir)
+        worker = self.atlas_export_worker
+        progress.canceled.connect(worker.requestInterruption)
+        worker.progress.connect(lambda done, total: progress.setValue(done))
+        worker.finished_export.connect(
+            lambda manifest: self.on_export_atlas_finished(manifest, out_dir, progress)
+        )
+        worker.failed.connect(
+            lambda error: (
+                progress.close(),
+                QMessageBox.critical(self, "Export sprite atlas", f"Falha ao exportar: {error}"),
+            )
+        )
+        worker.start()
+
+    def on_export_atlas_finished(self, manifest, out_dir, progress):
+        progress.close()
+        if manifest is None:
+            self.status_label.setText("Atlas export cancelled.")
+            self.status_label.setStyleSheet("color: orange;")
+            return
+        slots = sum(atlas["count"] for atlas in manifest["atlases"])
+        self.status_label.setText(f"{len(manifest['sprites'])} sprites exported.")
+        self.status_label.setStyleSheet("color: green;")
+        QMessageBox.information(
+            self,
+            "Export sprite atlas",
+            f"{len(manifest['sprites'])} sprites ({slots} distinct) in "
+            f"{len(manifest['atlases'])} atlases written to {out_dir}\n"
+            f"{len(manifest['empty'])} empty sprites skipped.",
+        )
+
+    def on_import_atlas(self):
+        """Anexa ao SPR as sprites de um manifesto de atlas, reaproveitando as iguais."""
+        from spriteAtlas import AtlasImportWorker
+
+        if not self.spr:
+            return
+
+        manifest_path, _ = QFileDialog.getOpenFileName(
+            self, "Import sprite atlas", "", "Atlas manifest (*.json)"
+        )
+        if not manifest_path:
+            return
+
+        progress = QProgressDialog("Importing sprites...", "Cancel", 0, 0, self)
+        progress.setWindowTitle("Import sprite atlas")
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(0)
+
+        self.atlas_import_worker = AtlasImportWorker(self.spr, manifest_path)
+        worker = self.atlas_import_worker
+        progress.canceled.connect(worker.requestInterruption)
+        worker.progress.connect(
+            lambda done, total, text: (
+                progress.setMaximum(total),
+                progress.setValue(done),
+                progress.setLabelText(f"{text} ({done}/{total})"),
+            )
+        )
+        worker.finished_import.connect(
+            lambda plan: self.on_import_atlas_finished(plan, manifest_path, progress)
+        )
+        worker.failed.connect(
+            lambda error: (
+                progress.close(),
+                QMessageBox.critical(self, "Import sprite atlas", f"Falha ao importar: {error}"),
+            )
+        )
+        worker.start()
+
+    def on_import_atlas_finished(self, plan, manifest_path, progress):
+        from spriteAtlas import apply_atlas_import, save_mapping
+
+        progress.close()
+        if plan is None:
+            self.status_label.setText("Atlas import cancelled.")
+            self.status_label.setStyleSheet("color: orange;")
+            return
+
+        apply_atlas_import(plan, self.spr)
+        self.refresh_sprite_list()
+
+        message = (
+            f"{len(plan['sprites'])} new sprites appended, "
+            f"{plan['reused']} already existed in the SPR."
+        )
+        # Mapeamento id do manifesto -> id no SPR, para remapear textures depois
+        mapping_path = os.path.splitext(manifest_path)[0] + ".mapping.json"
+        try:
+            save_mapping(plan, mapping_path)
+            message += f"\nID mapping written to {mapping_path}"
+        except OSError as e:
+            message += f"\nCould not write the ID mapping: {e}"
+        self.status_label.setText(f"{len(plan['sprites'])} sprites imported.")
+        self.status_label.setStyleSheet("color: green;")
+        QMessageBox.information(self, "Import sprite atlas", message)
+
+    def on_merge_from_client(self):
+        """Copia things de outro DAT/SPR para a categoria atual, reaproveitando sprites iguais."""
+        from clientMerge import MergeWorker
+        from spriteAtlas import parse_id_ranges
+
+        if not self.editor or not self.spr:
+            return
+        cat_key = self.get_current_category_key()
+
+        src_dat_path, _ = QFileDialog.getOpenFileName(
+            self, "Merge from client: source .dat", "", "DAT files (*.dat);;All files (*.*)"
+        )
+        if not src_dat_path:
+            return
+        src_spr_path = os.path.splitext(src_dat_path)[0] + ".spr"
+        if not os.path.exists(src_spr_path):
+            QMessageBox.warning(self, "Merge from client", f"{src_spr_path} not found.")
+            return
+
+        text, ok = QInputDialog.getText(
+            self,
+            "Merge from client",
+            f"Source {cat_key} IDs (Ex: 100-200, 305) or empty for all.\n"
+            "The source uses the Extended/Transparency options of the loaded client.",
+        )
+        if not ok:
+            return
+        try:
+            thing_ids = parse_id_ranges(text) if text.strip() else None
+        except ValueError:
+            QMessageBox.warning(self, "Merge from client", "Invalid ID format.")
+            return
+
+        progress = QProgressDialog("Merging...", "Cancel", 0, 0, self)
+        progress.setWindowTitle("Merge from client")
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(0)
+
+        self.merge_worker = MergeWorker(
+            src_dat_path,
+            src_spr_path,
+            self.chk_extended.isChecked(),
+            self.chk_transparency.isChecked(),
+            self.editor,
+            self.spr,
+            cat_key,
+            thing_ids,
+        )
+        worker = self.merge_worker
+        progress.canceled.connect(worker.requestInterruption)
+        worker.progress.connect(
+            lambda done, total, text: (
+                progress.setMaximum(total),
+                progress.setValue(done),
+                progress.setLabelText(f"{text} ({done}/{total})"),
+            )
+        )
+        worker.finished_merge.connect(
+            lambda plan: self.on_merge_finished(plan, src_dat_path, progress)
+        )
+        worker.failed.connect(
+            lambda error: (
+                progress.close(),
+                QMessageBox.critical(self, "Merge from client", f"Falha ao copiar: {error}"),
+            )
+        )
+        worker.start()
+
+    def on_merge_finished(self, plan, src_dat_path, progress):
+        from clientMerge import apply_merge, format_summary, merge_report
+
+        progress.close()
+        if plan is None:
+            self.status_label.setText("Merge cancelled.")
+            self.status_label.setStyleSheet("color: orange;")
+            return
+
+        apply_merge(plan, self.editor, self.spr)
+        self.compositor.clear()
+        self.refresh_id_list()
+        self.refresh_sprite_list()
+        if self.current_ids:
+            self.load_ids_from_entry()
+
+        message = format_summary(plan)
+        if plan["failed"]:
+            message += "\n" + "\n".join(
+                f"{thing_id}: {error}" for thing_id, error in plan["failed"][:10]
+            )
+        # Mapeamento de ids (things e sprites) ao lado do DAT de destino
+        report_path = os.path.splitext(self.editor.dat_path)[0] + ".merge.json"
+        try:
+            with open(report_path, "w", encoding="utf-8") as f:
+                json.dump(merge_report(plan, src_dat_path, self.editor.dat_path), f, indent=2)
+            message += f"\nID mapping written to {report_path}"
+        except OSError as e:
+            message += f"\nCould not write the ID mapping: {e}"
+        self.status_label.setText(f"{len(plan['things'])} things merged.")
+        self.status_label.setStyleSheet("color: green;")
+        QMessageBox.information(self, "Merge from client", message)
+
+    def on_compare_client(self):
+        """Diff do client aberto contra outra versão (a antiga), com relatório HTML opcional."""
+        from clientDiff import DiffWorker
+
+        if not self.editor or not self.spr:
+            return
+
+        old_dat_path, _ = QFileDialog.getOpenFileName(
+            self, "Compare with client: old .dat", "", "DAT files (*.dat);;All files (*.*)"
+        )
+        if not old_dat_path:
+            return
+        old_spr_path = os.path.splitext(old_dat_path)[0] + ".spr"
+        if not os.path.exists(old_spr_path):
+            QMessageBox.warning(self, "Compare clients", f"{old_spr_path} not found.")
+            return
+
+        # Sem arquivo escolhido: só o resumo
+        html_path, _ = QFileDialog.getSaveFileName(
+            self, "Save HTML report (cancel to skip)", "client_diff.html", "HTML (*.html)"
+        )
+
+        progress = QProgressDialog("Comparing...", "Cancel", 0, 0, self)
+        progress.setWindowTitle("Compare clients")
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(0)
+
+        self.diff_worker = DiffWorker(
+            old_dat_path,
+            old_spr_path,
+            self.chk_extended.isChecked(),
+            self.chk_transparency.isChecked(),
+            self.editor,
+            self.spr,
+            html_path or None,
+        )
+        worker = self.diff_worker
+        progress.canceled.connect(worker.requestInterruption)
+        worker.progress.connect(
+            lambda done, total, text: (
+                progress.setMaximum(total),
+                progress.setValue(done),
+                progress.setLabelText(f"{text} ({done}/{total})"),
+            )
+        )
+        worker.finished_diff.connect(
+            lambda diff: self.on_compare_finished(diff, html_path, progress)
+        )
+        worker.failed.connect(
+            lambda error: (
+                progress.close(),
+                QMessageBox.critical(self, "Compare clients", f"Falha ao comparar: {error}"),
+            )
+        )
+        worker.start()
+
+    def on_compare_finished(self, diff, html_path, progress):
+        from clientDiff import format_summary
+
+        progress.close()
+        if diff is None:
+            self.status_label.setText("Compare cancelled.")
+            self.status_label.setStyleSheet("color: orange;")
+            return
+
+        self.status_label.setText("Client diff done.")
+        self.status_label.setStyleSheet("color: green;")
+        message = format_summary(diff)
+        if html_path:
+            message += f"\n\nHTML report written to {html_path}"
+        QMessageBox.information(self, "Compare clients", message)
+        if html_path:
+            QDesktopServices.openUrl(QUrl.fromLocalFile(html_path))
+
+    def on_convert_spr(self):
+        """Grava uma cópia do .spr aberto no outro formato (RGB <-> RGBA)."""
+        if not self.spr:
+            return
+        to_transparency = not self.spr.transparency
+        target = "RGBA (transparency)" if to_transparency else "RGB (standard)"
+        suffix = "_rgba.spr" if to_transparency else "_rgb.spr"
+
+        if self.spr.modified:
+            QMessageBox.warning(
+                self,
+                "Convert SPR format",
+                "The SPR has unsaved changes; the conversion reads the file on disk.",
+            )
+        dst_path, _ = QFileDialog.getSaveFileName(
+            self,
+            f"Convert SPR to {target}",
+            os.path.splitext(self.spr.spr_path)[0] + suffix,
+            "SPR files (*.spr)",
+        )
+        if not dst_path:
+            return
+
+        progress = QProgressDialog(
+            f"Converting sprites to {target}...", "Cancel", 0, self.spr.sprite_count, self
+        )
+        progress.setWindowTitle("Convert SPR format")
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(0)
+
+        self.spr_convert_worker = SprConvertWorker(self.spr.spr_path, dst_path, to_transparency)
+        worker = self.spr_convert_worker
+        progress.canceled.connect(worker.requestInterruption)
+        worker.progress.connect(lambda done, total: progress.setValue(done))
+        worker.finished_convert.connect(
+            lambda report: self.on_convert_spr_finished(report, dst_path, target, progress)
+        )
+        worker.failed.connect(
+            lambda error: (
+                progress.close(),
+                QMessageBox.critical(self, "Convert SPR format", f"Falha ao converter: {error}"),
+            )
+        )
+        worker.start()
+
+    def on_convert_spr_finished(self, report, dst_path, target, progress):
+        progress.close()
+        if report is None:
+            self.status_label.setText("SPR conversion cancelled.")
+            self.status_label.setStyleSheet("color: orange;")
+            return
+        self.status_label.setText(f"SPR converted to {target}.")
+        self.status_label.setStyleSheet("color: green;")
+        QMessageBox.information(
+            self,
+            "Convert SPR format",
+            f"{report['sprites']} sprites ({report['empty']} empty) converted to {target}.\n"
+            f"{report['bytes_in']} -> {report['bytes_out']} bytes\n"
+            f"Written to {dst_path}",
+        )
+
+    def on_context_delete(self):
+        if not self.right_click_target:
+            return
+
+        target_id = self.right_click_target["id"]
+        target_type = self.right_click_target["type"]
+
+        reply = QMessageBox.question(
+            self,
+            "Confirm Clear",
+            f"Are you sure you want to clear {target_type} ID {target_id}?\nThis action cannot be undone.",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+
+        if target_type == "id_list":
+            if not self.editor:
+                return
+
+            cat_map = {
+                "Item": "items",
+                "Outfit": "outfits",
+                "Effect": "effects",
+                "Missile": "missiles",
+            }
+            current_cat_key = cat_map.get(self.category_combo.currentText(), "items")
+
+            if target_id in self.editor.things[current_cat_key]:
+                minimal_texture = b"\x01\x01\x01\x01\x01\x01\x01\x00\x00\x00\x00"
+
+                self.editor.things[current_cat_key][target_id] = {
+                    "props": OrderedDict(),
+                    "texture_bytes": minimal_texture,
+                }
+
+                self.refresh_id_list()
+                self.load_single_id(target_id)
+                self.status_label.setText(f"ID {target_id} cleared successfully.")
+                self.status_label.setStyleSheet("color: green;")
+
+        elif target_type == "sprite_list":
+            QMessageBox.information(
+                self,
+                "Not Implemented",
                 "Sprite clearing requires SPR write logic.\nImplement 'replace_sprite' first.",
             )
 
@@ -2124,14 +2939,44 @@ class DatSprTab(QWidget):
         if not file_path:
             return
 
+        self.import_file_into(target_id, cat_key, file_path)
+
+    def import_file_into(self, target_id, cat_key, file_path):
+        """Troca as sprites (e flags, se .obd) do thing pelas do arquivo."""
+        from obdBatch import encode_frame
+        from obdHandler import ObdFile
+        from spriteHash import EMPTY_SPRITE
+
         new_props = {}
         new_images = []
+        # OBD: frames vão direto para o formato do SPR, sem passar por PIL no SprEditor
+        new_sprites = []
+        # OBD versão 2: frame groups gravados no arquivo
+        obd_groups = None
 
         if file_path.endswith(".obd"):
-            new_props, new_images = ObdHandler.load_obd(file_path)
-            if not new_images:
+            try:
+                with ObdFile(file_path) as obd:
+                    new_props = obd.properties
+                    obd_groups = obd.groups
+                    for frame in obd.frames:
+                        try:
+                            new_sprites.append(frame.sprite_data(self.spr.transparency))
+                        except Exception as img_err:
+                            if obd_groups is not None:
+                                raise
+                            print(f"Erro lendo imagem {frame.name}: {img_err}")
+            except Exception as e:
+                print(f"Erro abrindo OBD: {e}")
+                new_sprites = []
+            if not new_sprites:
                 QMessageBox.warning(self, "Aviso", "OBD parece vazio ou inválido.")
                 return
+            if obd_groups is not None and len(obd_groups) > 1 and cat_key != "outfits":
+                QMessageBox.warning(
+                    self, "Aviso", "Este OBD tem vários frame groups; importe-o como Outfit."
+                )
+                return
         else:
             try:
                 img = Image.open(file_path).convert("RGBA")
@@ -2141,13 +2986,22 @@ class DatSprTab(QWidget):
                 QMessageBox.critical(self, "Erro", f"Erro ao abrir imagem: {e}")
                 return
 
+        # Sem frame groups cada sprite vira um frame (máx. 255), checado antes de gravar
+        if obd_groups is None and len(new_images) + len(new_sprites) > 255:
+            QMessageBox.warning(
+                self,
+                "Aviso",
+                f"{len(new_images) + len(new_sprites)} sprites: a texture holds at most 255 frames.",
+            )
+            return
+
+        thing = self.editor.things[cat_key][target_id]
         if new_props:
-            current_props = self.editor.things[cat_key][target_id]["props"]
-            current_props.update(new_props)
-            self.load_ids_from_entry()
+            thing["props"].update(new_props)
 
         new_sprite_ids = []
         last_spr_id = self.spr.sprite_count
+        first_new_id = last_spr_id + 1
 
         for pil_img in new_images:
             if pil_img.size != (32, 32):
@@ -2157,33 +3011,81 @@ class DatSprTab(QWidget):
             self.spr.replace_sprite(last_spr_id, pil_img)
             new_sprite_ids.append(last_spr_id)
 
-        self.status_label.setText(
-            f"Sprites adicionadas ao SPR. IDs: {new_sprite_ids[0]} - {new_sprite_ids[-1]}"
-        )
+        if obd_groups is not None:
+            # Sprites repetidas no arquivo entram uma vez só; vazias ficam 0
+            reused = {encode_frame(EMPTY_SPRITE, self.spr.transparency): 0}
+            for sprite_data in new_sprites:
+                sid = reused.get(sprite_data)
+                if sid is None:
+                    last_spr_id += 1
+                    sid = reused[sprite_data] = last_spr_id
+                    self.spr.set_sprite_data(sid, sprite_data)
+                new_sprite_ids.append(sid)
+        else:
+            for sprite_data in new_sprites:
+                last_spr_id += 1
+                self.spr.set_sprite_data(last_spr_id, sprite_data)
+                new_sprite_ids.append(last_spr_id)
+
+        if last_spr_id > first_new_id - 1:
+            self.status_label.setText(
+                f"Sprites adicionadas ao SPR. IDs: {first_new_id} - {last_spr_id}"
+            )
 
         is_outfit = cat_key == "outfits"
 
+        if obd_groups is not None:
+            position = 0
+            for group in obd_groups:
+                count = len(group["sprite_ids"])
+                group["sprite_ids"] = new_sprite_ids[position:position + count]
+                position += count
+            thing["texture_bytes"] = DatEditor.build_texture(
+                obd_groups, is_outfit, self.editor.extended
+            )
+            thing["props"].update(DatEditor.layout_props(obd_groups, is_outfit))
+            self.load_ids_from_entry()
+            self.on_preview_click()
+            QMessageBox.information(self, "Sucesso", "Importado com sucesso!")
+            return
+
         width = 1
         height = 1
-        layers = 1
-        pattern_x = 1
-        pattern_y = 1
-        pattern_z = 1
         frames = len(new_sprite_ids)
 
+        # Mantém a animação (durações) do thing quando o número de frames bate
+        animation = None
+        try:
+            current_groups = DatEditor.parse_texture(
+                thing.get("texture_bytes", b""),
+                is_outfit,
+                self.editor.extended,
+            )
+        except ValueError:
+            current_groups = []
+        if current_groups and current_groups[0]["frames"] == frames:
+            animation = current_groups[0]["animation"]
+
         if is_outfit:
 
             new_texture_bytes = self.build_outfit_texture_bytes(
-                width, height, frames, new_sprite_ids
+                width, height, frames, new_sprite_ids, animation=animation
             )
         else:
 
             new_texture_bytes = self.build_texture_bytes(
-                width, height, 1, 1, 1, 1, frames, new_sprite_ids
+                width, height, 1, 1, 1, 1, frames, new_sprite_ids, animation=animation
             )
 
-        self.editor.things[cat_key][target_id]["texture_bytes"] = new_texture_bytes
+        thing["texture_bytes"] = new_texture_bytes
+        thing["props"].update(
+            DatEditor.layout_props(
+                DatEditor.parse_texture(new_texture_bytes, is_outfit, self.editor.extended),
+                is_outfit,
+            )
+        )
 
+        self.load_ids_from_entry()
         self.on_preview_click()
         QMessageBox.information(self, "Sucesso", "Importado com sucesso!")
 
@@ -2433,6 +3335,7 @@ class DatSprTab(QWidget):
             self.current_page -= 1
         self.refresh_id_list()
 
+    @profiled("DatSprTab.refresh_id_list")
     def refresh_id_list(self):
         while self.ids_list_frame.scroll_layout.count():
             item = self.ids_list_frame.scroll_layout.takeAt(0)
@@ -2519,6 +3422,12 @@ class DatSprTab(QWidget):
             )
             item_layout.addWidget(id_label, 1)
 
+            if current_cat_key == "items" and self.item_names:
+                tooltip = self.item_names.describe(item_id)
+                if tooltip:
+                    sprite_label.setToolTip(tooltip)
+                    id_label.setToolTip(tooltip)
+
             def make_load_handler(iid):
                 return lambda: self.load_single_id(iid)
 
@@ -2557,6 +3466,7 @@ class DatSprTab(QWidget):
         # self.ids_list_frame.scroll_layout.addStretch() # FlowLayout doesn't usually need explicit stretch for this use case
         self.hide_loading()
 
+    @profiled("DatSprTab.refresh_sprite_list")
     def refresh_sprite_list(self):
         # Clear existing widgets
         while self.sprite_list_frame.scroll_layout.count():
@@ -2830,7 +3740,10 @@ class DatSprTab(QWidget):
                     "background-color: gray15; color: white; padding: 5px;"
                 )
 
-        self.status_label.setText(f"ID {item_id} ({current_cat_key}) loaded.")
+        name = self.item_names.name(item_id) if self.item_names and current_cat_key == "items" else ""
+        self.status_label.setText(
+            f"ID {item_id} ({current_cat_key}){' - ' + name if name else ''} loaded."
+        )
         self.status_label.setStyleSheet("color: cyan;")
 
     def disable_editing(self):
@@ -2858,12 +3771,27 @@ class DatSprTab(QWidget):
             entry.setEnabled(True)
 
     def load_dat_file(self):
+        from clientFormat import detect_client_format
+
         filepath, _ = QFileDialog.getOpenFileName(
             self, "Select the .dat file", "", "DAT files (*.dat);;All files (*.*)"
         )
         if not filepath:
             return
 
+        if self.chk_autodetect.isChecked():
+            try:
+                detected = detect_client_format(
+                    filepath,
+                    default_extended=self.chk_extended.isChecked(),
+                    default_transparency=self.chk_transparency.isChecked(),
+                )
+                self.chk_extended.setChecked(detected["extended"])
+                self.chk_transparency.setChecked(detected["transparency"])
+            except (OSError, ValueError) as e:
+                # Fica o que está marcado
+                print(f"Format detection failed: {e}")
+
         self.show_loading("Loading...\nPlease wait.")
 
         is_extended = self.chk_extended.isChecked()
@@ -2872,8 +3800,13 @@ class DatSprTab(QWidget):
         try:
             self.editor = DatEditor(filepath, extended=is_extended)
             self.editor.load()
+            self.compositor.clear()
             self.current_page = 0
 
+            self.show_loading("Loading item names...")
+            self.load_item_names_for(filepath)
+            self.start_search_index()
+
             self.enable_editing()
 
             base_path = os.path.splitext(filepath)[0]
@@ -2921,6 +3854,108 @@ class DatSprTab(QWidget):
             )
             self.status_label.setStyleSheet("color: cyan;")
 
+    def load_item_names_for(self, dat_path):
+        """Carrega os nomes do items.xml (via items.otb) do client aberto."""
+        self.item_names = None
+        try:
+            self.item_names = load_item_names(dat_path)
+        except Exception as e:
+            # Sem nomes o editor funciona normalmente
+            print(f"items.xml: {e}")
+
+    def start_search_index(self):
+        """Monta (de novo) o índice de busca numa thread."""
+        if self.search_worker and self.search_worker.isRunning():
+            self.search_worker.finished_index.disconnect()
+            self.search_worker.requestInterruption()
+            self.search_worker.wait()
+
+        self.search_entry.setEnabled(False)
+        self.search_entry.setPlaceholderText("Building search index...")
+        self.search_worker = SearchIndexWorker(self.item_names)
+        self.search_worker.finished_index.connect(self.on_search_index_ready)
+        self.search_worker.start()
+
+    def on_search_index_ready(self, index):
+        if index is None:
+            return
+        self.search_index = index
+        # Salvos nos editores enquanto o índice era montado
+        for update, path in self.pending_search_updates:
+            update(index, path)
+        self.pending_search_updates = []
+
+        self.search_entry.setEnabled(True)
+        self.search_entry.setPlaceholderText(
+            f"Items, monsters and spells by name... ({len(index)} entries)"
+        )
+        if self.search_entry.text():
+            self.on_search_text_changed(self.search_entry.text())
+
+    def queue_search_update(self, update, path):
+        if self.search_worker and self.search_worker.isRunning():
+            self.pending_search_updates.append((update, path))
+        elif self.search_index is not None:
+            update(self.search_index, path)
+            if self.search_entry.text():
+                self.on_search_text_changed(self.search_entry.text())
+
+    def on_monster_saved(self, path):
+        self.queue_search_update(update_monster_file, path)
+
+    def on_spells_saved(self, path):
+        self.queue_search_update(update_spells_file, path)
+
+    def on_search_text_changed(self, text):
+        self.search_results.clear()
+        results = self.search_index.search(text, limit=50) if self.search_index else []
+        for result in results:
+            entry = QListWidgetItem(f"[{result['kind']}] {result['title']}  -  {result['detail']}")
+            entry.setData(Qt.ItemDataRole.UserRole, result)
+            self.search_results.addItem(entry)
+        self.search_results.setVisible(bool(results))
+
+    def open_first_search_result(self):
+        if self.search_results.count():
+            self.on_search_result_activated(self.search_results.item(0))
+
+    def on_search_result_activated(self, entry):
+        result = entry.data(Qt.ItemDataRole.UserRole)
+        if not result or not self.editor:
+            return
+        payload = result["payload"]
+
+        if result["kind"] == "item":
+            self.open_search_target("Item", payload["client_id"])
+        elif result["kind"] == "monster" and payload.get("looktype"):
+            self.open_search_target("Outfit", payload["looktype"])
+        elif result["kind"] == "monster" and payload.get("corpse"):
+            self.open_search_target("Item", payload["corpse"])
+        else:
+            self.status_label.setText(f"{result['title']}: {result['detail']}")
+            self.status_label.setStyleSheet("color: cyan;")
+
+    def open_search_target(self, category, thing_id):
+        if self.category_combo.currentText() != category:
+            self.category_combo.setCurrentText(category)
+        self.id_entry.setText(str(thing_id))
+        self.load_ids_from_entry()
+
+    def is_name_search(self, text):
+        text = text.strip()
+        return bool(text) and not re.fullmatch(r"[\d\s,\-]+", text)
+
+    def search_item_names(self, text):
+        """Client ids cujo nome do items.xml contém ``text`` (categoria Item)."""
+        if not self.item_names:
+            self.status_label.setText("No items.xml/items.otb loaded for name search.")
+            self.status_label.setStyleSheet("color: orange;")
+            return []
+        if self.get_current_category_key() != "items":
+            self.category_combo.setCurrentText("Item")
+        items = self.editor.things.get("items", {})
+        return [cid for cid in self.item_names.search(text) if cid in items]
+
     def parse_ids(self, id_string):
         ids = set()
         if not id_string:
@@ -2948,7 +3983,14 @@ class DatSprTab(QWidget):
             return
 
         id_string = self.id_entry.text()
-        self.current_ids = self.parse_ids(id_string)
+        if self.is_name_search(id_string):
+            self.current_ids = self.search_item_names(id_string)
+            if not self.current_ids:
+                self.status_label.setText(f"No item named '{id_string.strip()}'.")
+                self.status_label.setStyleSheet("color: orange;")
+                return
+        else:
+            self.current_ids = self.parse_ids(id_string)
 
         if not self.current_ids:
             if id_string:
@@ -3289,7 +4331,9 @@ class DatSprTab(QWidget):
             self.status_label.setStyleSheet("color: red;")
 
     def prepare_preview_for_current_ids(self, category="items"):
+        self.preview_info.setToolTip("")
         self.current_preview_sprite_list = []
+        self.current_preview_thing_id = None
         self.current_preview_index = 0
         self.current_item_width = 1
         self.current_item_height = 1
@@ -3334,8 +4378,17 @@ class DatSprTab(QWidget):
 
             if sprite_ids:
                 self.current_preview_sprite_list = sprite_ids
+                self.current_preview_thing_id = item_id
                 break
 
+        if category == "items" and self.item_names and self.current_preview_thing_id is not None:
+            name = self.item_names.name(self.current_preview_thing_id)
+            self.preview_info.setText(
+                f"ID {self.current_preview_thing_id}: {name}" if name
+                else f"ID {self.current_preview_thing_id}"
+            )
+            self.preview_info.setToolTip(self.item_names.describe(self.current_preview_thing_id))
+
         if not self.current_preview_sprite_list:
             self.clear_preview()
             return
@@ -3360,67 +4413,73 @@ class DatSprTab(QWidget):
 
     def toggle_animation(self):
         if self.is_animating:
-            self.anim_timer.stop()
+            self.anim_player.stop()
             self.is_animating = False
             self.anim_btn.setText("▶")
         else:
             if not self.current_ids:
                 return
 
-            cat_key = self.get_current_category_key()
-            if self.current_ids[0] in self.editor.things[cat_key]:
-                props = self.editor.things[cat_key][self.current_ids[0]].get("props", {})
-                anim_count = props.get("Animation", 1)
-            else:
-                anim_count = 1
+            group = self.get_current_preview_group()
+            frames = group["frames"] if group else 1
 
-            if anim_count > 1:
+            if frames > 1:
                 self.is_animating = True
                 self.anim_btn.setText("■")
-         
-                self.current_preview_index = 0
-                self.anim_timer.start(200)  
+
+                # Renderiza todos os frames antes de começar, o timer só troca pixmaps
+                for frame in range(frames):
+                    self.render_preview_pixmap(frame)
+
+                self.anim_player.start(frames, group["animation"])
             else:
                 self.status_label.setText("Item has only 1 animation frame.")
 
-    def update_animation_step(self):
+    def on_animation_frame(self, frame):
         if not self.is_animating:
             return
+        self.current_preview_index = frame
+        self.show_preview_at_index(frame)
 
-        catkey = self.get_current_category_key()
-        if not self.current_ids:
-            self.toggle_animation()
-            return
-
-        item_data = self.editor.things[catkey].get(self.current_ids[0])
-        if not item_data:
-            return
+    def on_animation_finished(self):
+        self.is_animating = False
+        self.anim_btn.setText("▶")
 
-     
-        anim_frames = item_data["props"].get("Animation", 1)
+    def get_current_preview_group(self):
+        """Frame group (DatEditor.parse_texture) mostrado no preview, ou None."""
+        if not self.editor or not self.current_ids:
+            return None
 
-   
-        self.current_preview_index += 1
+        catkey = self.get_current_category_key()
+        thing_id = self.current_preview_thing_id
+        if thing_id is None:
+            thing_id = self.current_ids[0]
+        thing = self.editor.things[catkey].get(thing_id)
+        if not thing:
+            return None
 
-        if self.current_preview_index >= anim_frames:
-            self.current_preview_index = 0
+        try:
+            groups = DatEditor.parse_texture(
+                thing.get("texture_bytes", b""),
+                is_outfit=(catkey == "outfits"),
+                extended=self.editor.extended,
+            )
+        except ValueError:
+            return None
+        if not groups:
+            return None
 
-        self.show_preview_at_index(self.current_preview_index)
+        index = self.current_framegroup_index if catkey == "outfits" else 0
+        if index >= len(groups):
+            index = 0
+        return groups[index]
 
     def change_preview_index(self, delta):
         if not self.current_preview_sprite_list:
             return
             
-        catkey = self.get_current_category_key()
-        if self.current_ids:
-            item_data = self.editor.things[catkey].get(self.current_ids[0])
-            if item_data:
-                props = item_data.get("props", {})
-                frames = props.get("Animation", 1)
-            else:
-                frames = 1
-        else:
-            frames = 1
+        group = self.get_current_preview_group()
+        frames = group["frames"] if group else 1
 
         new_index = self.current_preview_index + delta
 
@@ -3434,12 +4493,66 @@ class DatSprTab(QWidget):
         self.show_preview_at_index(self.current_preview_index)
 
 
+    @profiled("DatSprTab.show_preview_at_index")
     def show_preview_at_index(self, anim_frame_index):
         if not self.current_preview_sprite_list:
             self.image_label.setPixmap(QPixmap())
             self.image_label.setText("No Sprite")
             return
 
+        catkey = self.get_current_category_key()
+        qpix = self.render_preview_pixmap(anim_frame_index)
+        self.image_label.setPixmap(qpix)
+        
+        addon_status = ""
+        if catkey == "outfits":
+            if self.outfit_addon1_enabled:
+                addon_status += " | Addon 1"
+            elif self.outfit_addon2_enabled:
+                addon_status += " | Addon 2"
+            if self.outfit_mount_enabled:
+                addon_status += " | Mount"
+            if self.outfit_mask_enabled:
+                addon_status += " | MASK"
+        
+        self.prev_index_label.setText(
+            f"Frame {anim_frame_index} | Dir: {self.current_direction_key}{addon_status}"
+        )
+
+    def render_preview_pixmap(self, anim_frame_index):
+        """Pixmap do frame do preview, usando o cache do compositor."""
+        catkey = self.get_current_category_key()
+        thing = None
+        if self.editor and self.current_preview_thing_id is not None:
+            thing = self.editor.things[catkey].get(self.current_preview_thing_id)
+
+        if thing is None:
+            qpix, _, _ = self.compose_preview_frame(anim_frame_index)
+            return qpix
+
+        key = (
+            catkey,
+            self.current_preview_thing_id,
+            self.current_framegroup_index,
+            anim_frame_index,
+            self.current_direction_key,
+            self.outfit_addon1_enabled,
+            self.outfit_addon2_enabled,
+            self.outfit_mount_enabled,
+            self.outfit_mask_enabled,
+        )
+        return self.compositor.get(
+            key,
+            thing.get("texture_bytes", b""),
+            self.spr,
+            lambda: self.compose_preview_frame(anim_frame_index),
+        )
+
+    def preview_view(self, anim_frame_index):
+        """
+        (índice da primeira sprite, layers desenhadas) do frame do preview em
+        current_preview_sprite_list, conforme direção / addons / mount / máscara.
+        """
         catkey = self.get_current_category_key()
         width = getattr(self, "current_item_width", 1)
         height = getattr(self, "current_item_height", 1)
@@ -3494,10 +4607,6 @@ class DatSprTab(QWidget):
             sprites_per_anim_step = sprites_per_view * 1
             final_start_index = anim_frame_index * sprites_per_anim_step
 
-        total_w = width * 32
-        total_h = height * 32
-        combined_image = Image.new("RGBA", (total_w, total_h), (0, 0, 0, 0))
-
      
         if catkey == "outfits":
             if self.outfit_mask_enabled:
@@ -3513,6 +4622,25 @@ class DatSprTab(QWidget):
   
             layers_to_render = range(layers)
 
+        return final_start_index, layers_to_render
+
+    def compose_preview_frame(self, anim_frame_index):
+        """Renderiza o frame atual do preview. Retorna (QPixmap, sprite_ids usados, slots).
+
+        slots são os índices de current_preview_sprite_list desenhados (inclusive
+        os vazios), para o compositor descartar só as vistas afetadas por um drop.
+        """
+        width = getattr(self, "current_item_width", 1)
+        height = getattr(self, "current_item_height", 1)
+
+        final_start_index, layers_to_render = self.preview_view(anim_frame_index)
+
+        total_w = width * 32
+        total_h = height * 32
+        combined_image = Image.new("RGBA", (total_w, total_h), (0, 0, 0, 0))
+
+        used_sprite_ids = []
+        used_slots = []
         try:
             for l in layers_to_render:
  
@@ -3528,9 +4656,11 @@ class DatSprTab(QWidget):
                             break
                             
                         sprite_id = self.current_preview_sprite_list[sprite_idx]
-                        
+                        used_slots.append(sprite_idx)
+
                         if sprite_id > 0 and self.spr:
-                            img_data = self.spr.get_sprite(sprite_id)
+                            used_sprite_ids.append(sprite_id)
+                            img_data = self.spr.get_sprite_cached(sprite_id)
                             if img_data:
                                 px = (width - 1 - x) * 32
                                 py = (height - 1 - y) * 32
@@ -3559,22 +4689,7 @@ class DatSprTab(QWidget):
                     painter.drawRect(x0, y0, sprite_screen_size - 1, sprite_screen_size - 1)
             painter.end()
 
-        self.image_label.setPixmap(qpix)
-        
-        addon_status = ""
-        if catkey == "outfits":
-            if self.outfit_addon1_enabled:
-                addon_status += " | Addon 1"
-            elif self.outfit_addon2_enabled:
-                addon_status += " | Addon 2"
-            if self.outfit_mount_enabled:
-                addon_status += " | Mount"
-            if self.outfit_mask_enabled:
-                addon_status += " | MASK"
-        
-        self.prev_index_label.setText(
-            f"Frame {anim_frame_index} | Dir: {self.current_direction_key}{addon_status}"
-        )
+        return qpix, used_sprite_ids, used_slots
 
 
 
@@ -3638,6 +4753,32 @@ class DatSprTab(QWidget):
 
             QApplication.processEvents()
 
+    def show_profiler_report(self):
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Profiler")
+        dialog.resize(760, 420)
+        layout = QVBoxLayout(dialog)
+
+        text = QTextEdit()
+        text.setReadOnly(True)
+        text.setFont(QFont("Consolas", 9))
+        text.setPlainText(profiler.report())
+        layout.addWidget(text)
+
+        buttons = QHBoxLayout()
+        btn_reset = QPushButton("Reset")
+        btn_reset.clicked.connect(
+            lambda: (profiler.reset(), text.setPlainText(profiler.report()))
+        )
+        buttons.addWidget(btn_reset)
+        btn_dump = QPushButton("Dump to log")
+        btn_dump.clicked.connect(lambda: print(profiler.report()))
+        buttons.addWidget(btn_dump)
+        buttons.addStretch()
+        layout.addLayout(buttons)
+
+        dialog.exec()
+
     def hide_loading(self):
         if hasattr(self, "loading_overlay"):
             self.loading_overlay.hide()
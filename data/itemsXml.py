@@ -0,0 +1,244 @@
+"""Índice do items.xml do servidor (nomes e atributos por server id).
+
+O XML é lido em streaming com iterparse (cada <item> é descartado depois de
+lido) e o resultado vai para um cache binário ao lado do arquivo
+(``items.xml.cache``), invalidado quando o mtime/tamanho do XML muda. O
+índice por client id sai do cruzamento com o items.otb (server id ->
+client id).
+"""
+import marshal
+import os
+import struct
+import xml.etree.ElementTree as ET
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSETS_XML_DIR = os.path.join(BASE_DIR, "..", "assets", "xml")
+
+CACHE_SUFFIX = ".cache"
+CACHE_MAGIC = b"IXML"
+CACHE_VERSION = 1
+# magic, versão do cache, versão do marshal, mtime_ns e tamanho do XML
+_CACHE_HEADER = struct.Struct("<4sHHqq")
+
+
+def _parse_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _item_attributes(elem):
+    """(key, value) dos <attribute> do item; os aninhados viram "pai.filho"."""
+    attributes = []
+    stack = [("", child) for child in reversed(list(elem))]
+    while stack:
+        prefix, node = stack.pop()
+        if node.tag != "attribute":
+            continue
+        key = node.get("key")
+        if key is None:
+            continue
+        key = prefix + key
+        value = node.get("value")
+        if value is not None:
+            attributes.append((key, value))
+        stack.extend((key + ".", child) for child in reversed(list(node)))
+    return tuple(attributes)
+
+
+def parse_items_xml(path):
+    """Lê o items.xml em streaming: server id -> (name, article, attributes)."""
+    entries = {}
+    depth = 0
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        if elem.tag != "item":
+            continue
+        if event == "start":
+            depth += 1
+            continue
+
+        depth -= 1
+        if depth:
+            # <item> dentro de <item> não existe no formato, ignora
+            continue
+
+        item_id = _parse_id(elem.get("id"))
+        if item_id is not None:
+            ids = (item_id,)
+        else:
+            from_id = _parse_id(elem.get("fromid"))
+            to_id = _parse_id(elem.get("toid"))
+            ids = range(from_id, to_id + 1) if from_id is not None and to_id is not None else ()
+
+        if ids:
+            entry = (elem.get("name", ""), elem.get("article", ""), _item_attributes(elem))
+            for sid in ids:
+                entries[sid] = entry
+        elem.clear()
+    return entries
+
+
+def _cache_path(path):
+    return path + CACHE_SUFFIX
+
+
+def _read_cache(path, stat):
+    try:
+        with open(_cache_path(path), "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) < _CACHE_HEADER.size:
+        return None
+
+    magic, version, marshal_version, mtime_ns, size = _CACHE_HEADER.unpack_from(data)
+    if (magic != CACHE_MAGIC or version != CACHE_VERSION or marshal_version != marshal.version
+            or mtime_ns != stat.st_mtime_ns or size != stat.st_size):
+        return None
+    try:
+        ids, names, articles, attributes = marshal.loads(data[_CACHE_HEADER.size:])
+    except (EOFError, ValueError, TypeError):
+        return None
+    # Entradas de um mesmo fromid/toid voltam compartilhando a tupla
+    return {sid: entry for sid, entry in zip(ids, zip(names, articles, attributes))}
+
+
+def _write_cache(path, stat, entries):
+    ids = tuple(entries)
+    values = entries.values()
+    payload = marshal.dumps((
+        ids,
+        tuple(e[0] for e in values),
+        tuple(e[1] for e in values),
+        tuple(e[2] for e in values),
+    ))
+    header = _CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, marshal.version,
+                                stat.st_mtime_ns, stat.st_size)
+    tmp = _cache_path(path) + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(header + payload)
+        os.replace(tmp, _cache_path(path))
+    except OSError:
+        # Pasta sem permissão de escrita: segue sem cache
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+class ItemsXml:
+    """server id -> (name, article, attributes) de um items.xml."""
+
+    def __init__(self, entries=None, path=None):
+        self.entries = entries or {}
+        self.path = path
+        self.from_cache = False
+
+    @classmethod
+    def load(cls, path, use_cache=True):
+        stat = os.stat(path)
+        entries = _read_cache(path, stat) if use_cache else None
+        from_cache = entries is not None
+        if entries is None:
+            entries = parse_items_xml(path)
+            if use_cache:
+                _write_cache(path, stat, entries)
+        index = cls(entries, path)
+        index.from_cache = from_cache
+        return index
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, server_id):
+        return self.entries.get(server_id)
+
+    def name(self, server_id):
+        entry = self.entries.get(server_id)
+        return entry[0] if entry else ""
+
+
+class ItemNameIndex:
+    """
+    Nomes do items.xml por client id, cruzando com o items.otb. Um client id
+    pode ter vários server ids; o nome é o do primeiro server id que tem
+    nome no XML.
+    """
+
+    def __init__(self, items_xml, otb):
+        self.items_xml = items_xml
+        self.server_ids = {}   # client id -> [server ids]
+        self.names = {}        # client id -> nome
+        for cid, otb_items in otb.items_by_client_id.items():
+            sids = sorted(item.server_id for item in otb_items)
+            self.server_ids[cid] = sids
+            for sid in sids:
+                name = items_xml.name(sid)
+                if name:
+                    self.names[cid] = name
+                    break
+        self._search_keys = sorted((name.lower(), cid) for cid, name in self.names.items())
+
+    def __len__(self):
+        return len(self.names)
+
+    def name(self, client_id):
+        return self.names.get(client_id, "")
+
+    def describe(self, client_id):
+        """Texto de várias linhas (nome, server ids, atributos) para tooltips."""
+        sids = self.server_ids.get(client_id)
+        if not sids:
+            return ""
+        lines = []
+        for sid in sids:
+            entry = self.items_xml.get(sid)
+            if not entry:
+                lines.append(f"[{sid}] (not in items.xml)")
+                continue
+            name, article, attributes = entry
+            lines.append(f"[{sid}] {article + ' ' if article else ''}{name}")
+            lines.extend(f"    {key}: {value}" for key, value in attributes)
+        return "\n".join(lines)
+
+    def search(self, text, limit=None):
+        """Client ids cujo nome contém ``text`` (sem diferenciar maiúsculas), em ordem de id."""
+        text = text.strip().lower()
+        if not text:
+            return []
+        found = sorted(cid for name, cid in self._search_keys if text in name)
+        return found[:limit] if limit else found
+
+
+def locate_item_files(dat_path=None):
+    """
+    (items.xml, items.otb) para o client aberto: primeiro na pasta do .dat,
+    depois os de assets/xml. Cada um pode ser None.
+    """
+    folders = []
+    if dat_path:
+        folders.append(os.path.dirname(os.path.abspath(dat_path)))
+    folders.append(os.path.normpath(ASSETS_XML_DIR))
+
+    def first(name):
+        for folder in folders:
+            candidate = os.path.join(folder, name)
+            if os.path.isfile(candidate):
+                return candidate
+        return None
+
+    return first("items.xml"), first("items.otb")
+
+
+def load_item_names(dat_path=None, use_cache=True):
+    """ItemNameIndex para o client de ``dat_path`` ou None se faltar o XML ou o OTB."""
+    from otbParser import OtbFile
+
+    xml_path, otb_path = locate_item_files(dat_path)
+    if not xml_path or not otb_path:
+        return None
+    otb = OtbFile()
+    otb.load(otb_path)
+    return ItemNameIndex(ItemsXml.load(xml_path, use_cache=use_cache), otb)
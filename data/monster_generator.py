@@ -7,7 +7,7 @@ from PyQt6.QtWidgets import (
     QComboBox, QCheckBox, QLineEdit, QTabWidget, QScrollArea,
     QMessageBox, QFileDialog, QListWidget, QFormLayout  
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QPixmap
 from PIL import Image
 import struct
@@ -420,6 +420,8 @@ class EditLootDialog(QDialog):
             
 class MonsterGeneratorWindow(QDialog):
 
+    # Caminho do xml salvo (o DatSprTab reindexa a busca)
+    monsterSaved = pyqtSignal(str)
 
     def __init__(self, spr_editor=None, dat_editor=None, parent=None):
         super().__init__(parent)
@@ -2005,6 +2007,7 @@ class MonsterGeneratorWindow(QDialog):
             try:
                 with open(filename, 'w', encoding='utf-8') as f:
                     f.write(self.xml_display.toPlainText())
+                self.monsterSaved.emit(filename)
                 QMessageBox.information(self, "Success", f"Monster saved to {filename}")
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to save file:\n{e}")
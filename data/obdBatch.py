@@ -0,0 +1,516 @@
+"""Exportação/importação de OBD em lote.
+
+Cada thing vira ``<id>.obd`` na pasta de destino, no formato versão 2 do
+ObdHandler (data.xml com os frame groups + uma sprite sheet PNG por grupo),
+então exportar e importar de volta mantém tamanho, layers, patterns,
+frame groups e durações. As sheets são montadas e codificadas num pool de
+threads (a compressão do PNG no Pillow solta o GIL); o zip de um thing é
+escrito conforme as sheets dele ficam prontas, enquanto os próximos things
+já estão no pool.
+
+A importação lê uma pasta de .obd (versão 2 ou antigos, um PNG por sprite):
+as sprites são decodificadas e normalizadas no pool, comparadas pelo hash
+dos pixels com as que já existem no SPR (SpriteHashIndex) e só as novas são
+codificadas e anexadas. O resultado é um "plano" aplicado depois, na thread
+da interface.
+"""
+import hashlib
+import io
+import os
+import re
+import struct
+import zipfile
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from PIL import Image
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from obdHandler import OB_TYPES, ObdFile, ObdHandler, compose_sheet, slice_sheet
+from spriteHash import SpriteHashIndex, decode_rgba, encode_rgba, normalize_rgba
+
+# Things já enviados ao pool além do que está sendo escrito
+LOOKAHEAD = 8
+# Sprites decodificadas guardadas por lote (4 KB cada)
+MAX_CACHED_SPRITES = 16384
+# Sheets grandes: nível 1 do zlib sai com quase o mesmo tamanho na metade do tempo
+SHEET_COMPRESS_LEVEL = 1
+# Maior sprite id de um DAT sem extended (u16)
+MAX_STANDARD_SPRITE_ID = 0xFFFF
+
+
+def thing_groups(thing, category, extended):
+    """
+    Frame groups do texture do thing (DatEditor.parse_texture). Sem texture
+    vira um grupo 1x1 com a sprite 0, como o save_obd antigo (um frame vazio).
+    """
+    from datspr import DatEditor
+
+    groups = DatEditor.parse_texture(
+        thing.get("texture_bytes", b""), is_outfit=category == "outfits", extended=extended
+    )
+    return groups or frame_layout(None, category, extended, 1)
+
+
+def thing_sprite_ids(thing, category, extended):
+    """Ids das sprites do texture, de todos os frame groups, na ordem do DAT."""
+    sprite_ids = []
+    for group in thing_groups(thing, category, extended):
+        sprite_ids.extend(group["sprite_ids"])
+    return sprite_ids
+
+
+class SpriteRgbaCache:
+    """
+    Pixels RGBA de cada sprite id, decodificados uma vez por lote e
+    compartilhados entre as sheets. Sprites vazias/inexistentes são None.
+    """
+
+    def __init__(self, spr_editor, max_entries=MAX_CACHED_SPRITES):
+        self.spr = spr_editor
+        self.max_entries = max_entries
+        self.pixels = {}
+
+    def get(self, sprite_id):
+        rgba = self.pixels.get(sprite_id)
+        if rgba is None:
+            raw = self.spr.sprites_data.get(sprite_id) if sprite_id > 0 else None
+            if not raw:
+                return None
+            rgba = decode_rgba(raw, self.spr.transparency)
+            if len(self.pixels) >= self.max_entries:
+                self.pixels.clear()
+            self.pixels[sprite_id] = rgba
+        return rgba
+
+
+def encode_sheet(group, cache):
+    """PNG da sprite sheet do grupo."""
+    out = io.BytesIO()
+    compose_sheet(group, [cache.get(sid) for sid in group["sprite_ids"]]).save(
+        out, format="PNG", compress_level=SHEET_COMPRESS_LEVEL
+    )
+    return out.getvalue()
+
+
+def _submit_sheets(pool, cache, groups):
+    return [pool.submit(encode_sheet, group, cache) for group in groups]
+
+
+def _write_obd(path, xml_bytes, sheet_futures):
+    """Escreve o .obd; cada sheet entra no zip assim que o future termina."""
+    indexes = {future: index for index, future in enumerate(sheet_futures)}
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("data.xml", xml_bytes)
+        for future in as_completed(indexes):
+            # PNG já é comprimido
+            z.writestr(ObdHandler.sheet_name(indexes[future]), future.result(),
+                       compress_type=zipfile.ZIP_STORED)
+
+
+def export_obd(dat_editor, spr_editor, category, thing_id, path, workers=None):
+    """Exporta um thing para ``path`` (mesmo pipeline do lote)."""
+    thing = dat_editor.things.get(category, {}).get(thing_id)
+    if thing is None:
+        raise KeyError(thing_id)
+    groups = thing_groups(thing, category, dat_editor.extended)
+    with ThreadPoolExecutor(max_workers=max(1, workers or os.cpu_count() or 1)) as pool:
+        _write_obd(
+            path,
+            ObdHandler.build_xml(thing.get("props", {}), OB_TYPES.get(category, "Item"), groups),
+            _submit_sheets(pool, SpriteRgbaCache(spr_editor), groups),
+        )
+    return sum(len(group["sprite_ids"]) for group in groups)
+
+
+def export_obd_batch(dat_editor, spr_editor, category, ids, out_dir, workers=None,
+                     progress=None, cancelled=None):
+    """
+    Exporta os things ``ids`` de ``category`` para ``out_dir/<id>.obd``.
+
+    ``progress(feitos, total, thing_id)`` é chamado a cada thing escrito;
+    com ``cancelled()`` verdadeiro para e retorna None. Retorna
+    {"written": [caminhos], "missing": [ids], "sprites": sprites distintas}.
+    """
+    things = dat_editor.things.get(category, {})
+    ob_type = OB_TYPES.get(category, "Item")
+    os.makedirs(out_dir, exist_ok=True)
+
+    report = {"written": [], "missing": [], "sprites": 0}
+    sprite_ids = set()
+    total = len(ids)
+    done = 0
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    cache = SpriteRgbaCache(spr_editor)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending = deque()
+
+        def cancel_pending():
+            for _thing_id, _path, _xml, futures in pending:
+                for future in futures:
+                    future.cancel()
+
+        def write_next():
+            nonlocal done
+            thing_id, path, xml_bytes, sheet_futures = pending.popleft()
+            _write_obd(path, xml_bytes, sheet_futures)
+            report["written"].append(path)
+            done += 1
+            if progress:
+                progress(done, total, thing_id)
+
+        for thing_id in ids:
+            if cancelled and cancelled():
+                cancel_pending()
+                return None
+
+            thing = things.get(thing_id)
+            try:
+                groups = thing_groups(thing, category, dat_editor.extended) if thing else None
+            except ValueError:
+                groups = None
+            if groups is None:
+                report["missing"].append(thing_id)
+                done += 1
+                if progress:
+                    progress(done, total, thing_id)
+                continue
+
+            for group in groups:
+                sprite_ids.update(group["sprite_ids"])
+            pending.append((
+                thing_id,
+                os.path.join(out_dir, f"{thing_id}.obd"),
+                ObdHandler.build_xml(thing.get("props", {}), ob_type, groups),
+                _submit_sheets(pool, cache, groups),
+            ))
+            if len(pending) > LOOKAHEAD:
+                write_next()
+
+        while pending:
+            if cancelled and cancelled():
+                cancel_pending()
+                return None
+            write_next()
+
+    sprite_ids.discard(0)
+    report["sprites"] = len(sprite_ids)
+    return report
+
+
+def _obd_number(path):
+    """Id do thing pelo nome do arquivo (``123.obd``) ou None."""
+    match = re.fullmatch(r"(\d+)\.obd", os.path.basename(path), re.IGNORECASE)
+    return int(match.group(1)) if match else None
+
+
+def list_obd_files(folder):
+    """Arquivos .obd da pasta: numerados em ordem de id, depois os outros por nome."""
+    files = [
+        os.path.join(folder, name) for name in os.listdir(folder)
+        if name.lower().endswith(".obd")
+    ]
+    return sorted(files, key=lambda p: (_obd_number(p) is None, _obd_number(p) or 0, p))
+
+
+def read_obd_frames(path):
+    """
+    (props, groups, [png bytes]) de um .obd, sem decodificar as imagens. Na
+    versão 2 vem uma sheet por frame group; num .obd antigo ``groups`` é
+    None e vem um PNG por sprite.
+    """
+    with ObdFile(path) as obd:
+        if obd.groups is None:
+            return obd.properties, None, [frame.png() for frame in obd.frames]
+        return obd.properties, obd.groups, [obd.read(name) for name in obd.sheets]
+
+
+def _normalized(rgba, transparency):
+    rgba = normalize_rgba(rgba, transparency)
+    return rgba, hashlib.md5(rgba).digest()
+
+
+def decode_frame(png, transparency):
+    """PNG -> [(pixels RGBA normalizados para o SPR, hash dos pixels)] (uma sprite)."""
+    img = Image.open(io.BytesIO(png)).convert("RGBA")
+    if img.size != (32, 32):
+        img = img.resize((32, 32), Image.NEAREST)
+    return [_normalized(img.tobytes(), transparency)]
+
+
+def decode_sheet(png, group, transparency):
+    """Sheet de um frame group -> [(pixels normalizados, hash)] na ordem do texture."""
+    img = Image.open(io.BytesIO(png))
+    return [_normalized(rgba, transparency) for rgba in slice_sheet(img, group)]
+
+
+def encode_frame(rgba, transparency):
+    """Sprite pronta para SprEditor.set_sprite_data (u16 de tamanho + RLE)."""
+    encoded = encode_rgba(rgba, transparency)
+    return struct.pack("<H", len(encoded)) + encoded
+
+
+def frame_layout(thing, category, extended, frame_count):
+    """
+    Frame groups para um thing com ``frame_count`` sprites. Se o thing já
+    existe com o mesmo total de sprites, o layout dele (frame groups,
+    tamanho, patterns, durações) é mantido; senão vira 1x1 com
+    ``frame_count`` frames.
+    """
+    from datspr import DatEditor
+
+    if thing:
+        try:
+            groups = DatEditor.parse_texture(
+                thing.get("texture_bytes", b""), is_outfit=category == "outfits", extended=extended
+            )
+        except ValueError:
+            groups = []
+        if groups and sum(len(g["sprite_ids"]) for g in groups) == frame_count:
+            return groups
+
+    return [{
+        "type": 0,
+        "width": 1,
+        "height": 1,
+        "crop_size": 32,
+        "layers": 1,
+        "pattern_x": 1,
+        "pattern_y": 1,
+        "pattern_z": 1,
+        "frames": frame_count,
+        "animation": None,
+        "sprite_ids": [0] * frame_count,
+    }]
+
+
+def import_obd_folder(dat_editor, spr_editor, category, folder, hash_index=None,
+                      workers=None, progress=None, cancelled=None):
+    """
+    Prepara a importação de todos os .obd de ``folder`` para ``category``.
+    ``123.obd`` vai para o thing 123; arquivos sem número viram things novos
+    depois do último id. Não altera nada: retorna o plano para
+    apply_obd_import, ou None se cancelado.
+
+    ``progress(feitos, total, texto)``: primeiro a indexação das sprites do
+    SPR, depois um passo por arquivo.
+    """
+    from datspr import DatEditor
+
+    transparency = spr_editor.transparency
+    is_outfit = category == "outfits"
+    things = dat_editor.things.get(category, {})
+
+    if hash_index is None:
+        hash_index = SpriteHashIndex.from_spr(
+            spr_editor,
+            workers=workers,
+            progress=(lambda done, total: progress(done, total, "Indexing sprites")) if progress else None,
+            cancelled=cancelled,
+        )
+        if hash_index is None:
+            return None
+
+    files = list_obd_files(folder)
+    plan = {
+        "category": category,
+        "things": {},
+        "sprites": {},
+        "new_things": [],
+        "reused": 0,
+        "failed": [],
+    }
+
+    next_sprite_id = spr_editor.sprite_count + 1
+    next_thing_id = dat_editor.counts.get(category, 0) + 1
+    max_sprite_id = None if dat_editor.extended else MAX_STANDARD_SPRITE_ID
+    numbered = {_obd_number(path) for path in files}
+    encodes = {}
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending = deque()
+
+        def finish_next():
+            path, props, groups, futures = pending.popleft()
+            try:
+                finish_file(path, props, groups, futures)
+            except Exception as e:
+                plan["failed"].append((path, str(e)))
+
+        def finish_file(path, props, groups, futures):
+            nonlocal next_sprite_id, next_thing_id
+            if groups is not None and len(groups) > 1 and not is_outfit:
+                raise ValueError(f"{len(groups)} frame groups, only outfits have more than one")
+
+            pixels = []
+            for future in futures:
+                pixels.extend(future.result())
+
+            # Ids novos (sprites e thing) só são reservados depois que o texture
+            # foi montado: um arquivo recusado não deixa sprites órfãs no plano
+            sprite_ids = []
+            new_sprites = {}
+            reused = 0
+            for rgba, digest in pixels:
+                sid = hash_index.get(digest)
+                if sid is None and digest in new_sprites:
+                    sid = new_sprites[digest][0]
+                if sid is None:
+                    sid = next_sprite_id + len(new_sprites)
+                    new_sprites[digest] = (sid, rgba)
+                else:
+                    reused += 1
+                sprite_ids.append(sid)
+            if max_sprite_id is not None and sprite_ids and max(sprite_ids) > max_sprite_id:
+                raise ValueError("sprite id above 65535 in a non-extended DAT")
+
+            thing_id = _obd_number(path)
+            if thing_id is None:
+                thing_id = next_thing_id
+                while thing_id in things or thing_id in numbered:
+                    thing_id += 1
+                new_next_thing_id = thing_id + 1
+            else:
+                new_next_thing_id = next_thing_id
+            thing = things.get(thing_id)
+
+            # .obd antigo: sem estrutura gravada, mantém a do thing se couber
+            if groups is None:
+                groups = frame_layout(thing, category, dat_editor.extended, len(sprite_ids))
+            position = 0
+            for group in groups:
+                count = len(group["sprite_ids"])
+                group["sprite_ids"] = sprite_ids[position:position + count]
+                position += count
+            texture_bytes = DatEditor.build_texture(groups, is_outfit, dat_editor.extended)
+
+            new_props = OrderedDict(thing["props"]) if thing else OrderedDict()
+            new_props.update(props)
+            new_props.update(DatEditor.layout_props(groups, is_outfit))
+
+            for digest, (sid, rgba) in new_sprites.items():
+                hash_index.add(digest, sid)
+                encodes[sid] = pool.submit(encode_frame, rgba, transparency)
+            next_sprite_id += len(new_sprites)
+            next_thing_id = new_next_thing_id
+            plan["reused"] += reused
+            if thing is None:
+                plan["new_things"].append(thing_id)
+            plan["things"][thing_id] = {"props": new_props, "texture_bytes": texture_bytes}
+
+        for done, path in enumerate(files, start=1):
+            if cancelled and cancelled():
+                return None
+            try:
+                props, groups, pngs = read_obd_frames(path)
+            except (OSError, zipfile.BadZipFile, ValueError, SyntaxError) as e:
+                plan["failed"].append((path, str(e)))
+                continue
+            if not pngs:
+                plan["failed"].append((path, "no frames"))
+                continue
+
+            if groups is None:
+                futures = [pool.submit(decode_frame, png, transparency) for png in pngs]
+            else:
+                futures = [
+                    pool.submit(decode_sheet, png, group, transparency)
+                    for png, group in zip(pngs, groups)
+                ]
+            pending.append((path, props, groups, futures))
+            if len(pending) > LOOKAHEAD:
+                finish_next()
+            if progress:
+                progress(done, len(files), os.path.basename(path))
+
+        while pending:
+            if cancelled and cancelled():
+                return None
+            finish_next()
+
+        plan["sprites"] = {sid: future.result() for sid, future in encodes.items()}
+
+    return plan
+
+
+def apply_obd_import(plan, dat_editor, spr_editor):
+    """Grava no DAT/SPR o plano de import_obd_folder."""
+    category = plan["category"]
+    things = dat_editor.things.setdefault(category, {})
+
+    for sid in sorted(plan["sprites"]):
+        spr_editor.set_sprite_data(sid, plan["sprites"][sid])
+
+    for thing_id, data in plan["things"].items():
+        thing = things.setdefault(thing_id, {})
+        thing["props"] = data["props"]
+        thing["texture_bytes"] = data["texture_bytes"]
+        if thing_id > dat_editor.counts.get(category, 0):
+            dat_editor.counts[category] = thing_id
+
+
+class ObdExportWorker(QThread):
+    """Roda export_obd_batch fora da thread da interface."""
+
+    progress = pyqtSignal(int, int, int)
+    finished_export = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, dat_editor, spr_editor, category, ids, out_dir, parent=None):
+        super().__init__(parent)
+        self.dat_editor = dat_editor
+        self.spr_editor = spr_editor
+        self.category = category
+        self.ids = list(ids)
+        self.out_dir = out_dir
+
+    def run(self):
+        try:
+            report = export_obd_batch(
+                self.dat_editor,
+                self.spr_editor,
+                self.category,
+                self.ids,
+                self.out_dir,
+                progress=lambda done, total, thing_id: self.progress.emit(done, total, thing_id),
+                cancelled=self.isInterruptionRequested,
+            )
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.finished_export.emit(report)
+
+
+class ObdImportWorker(QThread):
+    """Roda import_obd_folder fora da thread da interface (só monta o plano)."""
+
+    progress = pyqtSignal(int, int, str)
+    finished_import = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, dat_editor, spr_editor, category, folder, parent=None):
+        super().__init__(parent)
+        self.dat_editor = dat_editor
+        self.spr_editor = spr_editor
+        self.category = category
+        self.folder = folder
+
+    def run(self):
+        try:
+            plan = import_obd_folder(
+                self.dat_editor,
+                self.spr_editor,
+                self.category,
+                self.folder,
+                progress=lambda done, total, text: self.progress.emit(done, total, text),
+                cancelled=self.isInterruptionRequested,
+            )
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.finished_import.emit(plan)
@@ -2,6 +2,9 @@ import zipfile
 import xml.etree.ElementTree as ET
 import io
 import os
+import struct
+
+import numpy as np
 from PIL import Image
 
 # Mapeamento de Flags
@@ -47,112 +50,281 @@ OBD_MAP = {
     "TopEffect": ("TopEffect", bool),
 }
 
+# Versão 2: data.xml com <Texture> (frame groups, patterns, durações) e uma
+# sprite sheet PNG por frame group no lugar de um PNG por sprite
+OBD_VERSION = 2
+
+# Categoria do DAT -> tipo do Object Builder
+OB_TYPES = {
+    "items": "Item",
+    "outfits": "Outfit",
+    "effects": "Effect",
+    "missiles": "Missile",
+}
+
+def group_sprite_count(group):
+    return (group["width"] * group["height"] * group["layers"] * group["pattern_x"]
+            * group["pattern_y"] * group["pattern_z"] * group["frames"])
+
+
+def sheet_size(group):
+    """
+    (largura, altura) da sprite sheet de um frame group. Cada "vista"
+    (width x height sprites, montada como no jogo) é um tile: colunas por
+    pattern x e layer, linhas por frame, pattern z e pattern y.
+    """
+    tile_w, tile_h = group["width"] * 32, group["height"] * 32
+    columns = group["pattern_x"] * group["layers"]
+    rows = group["frames"] * group["pattern_z"] * group["pattern_y"]
+    return columns * tile_w, rows * tile_h
+
+
+def sheet_positions(group):
+    """Posição (x, y) na sheet de cada sprite do grupo, na ordem do texture do DAT."""
+    width, height, layers = group["width"], group["height"], group["layers"]
+    px, py, pz = group["pattern_x"], group["pattern_y"], group["pattern_z"]
+    positions = []
+    for frame in range(group["frames"]):
+        for z in range(pz):
+            for y in range(py):
+                row = (frame * pz + z) * py + y
+                for x in range(px):
+                    for layer in range(layers):
+                        column = x * layers + layer
+                        for sy in range(height):
+                            for sx in range(width):
+                                positions.append((
+                                    (column * width + width - 1 - sx) * 32,
+                                    (row * height + height - 1 - sy) * 32,
+                                ))
+    return positions
+
+
+def compose_sheet(group, sprites):
+    """Sprite sheet (PIL RGBA) do grupo; ``sprites`` são pixels RGBA 32x32 (ou None = vazia)."""
+    w, h = sheet_size(group)
+    canvas = np.zeros((h, w, 4), dtype=np.uint8)
+    for (x, y), rgba in zip(sheet_positions(group), sprites):
+        if rgba:
+            canvas[y:y + 32, x:x + 32] = np.frombuffer(rgba, dtype=np.uint8).reshape(32, 32, 4)
+    return Image.fromarray(canvas, "RGBA")
+
+
+def slice_sheet(sheet, group):
+    """Pixels RGBA de cada sprite do grupo (ordem do texture) a partir da sheet."""
+    if sheet.mode != "RGBA":
+        sheet = sheet.convert("RGBA")
+    if sheet.size != sheet_size(group):
+        raise ValueError(f"sheet {sheet.size} does not match the frame group {sheet_size(group)}")
+    pixels = np.asarray(sheet)
+    return [pixels[y:y + 32, x:x + 32].tobytes() for x, y in sheet_positions(group)]
+
+
 class ObdHandler:
     @staticmethod
-    def load_obd(filepath):
+    def parse_xml(xml_content):
+        """Flags (formato do DatEditor) lidas do data.xml (bytes ou o <Object> já lido)."""
         properties = {}
-        images = []
+        root = xml_content if isinstance(xml_content, ET.Element) else ET.fromstring(xml_content)
+        for attr in root.findall('Attribute'):
+            key = attr.get('key')
+            value = attr.get('value')
+            
+            if key in OBD_MAP:
+                flag_name, flag_type = OBD_MAP[key]
+                if flag_type == bool:
+                    properties[flag_name] = True
+                elif flag_type == int:
+                    try:
+                        properties[flag_name] = True
+                        properties[flag_name + '_data'] = (int(value),)
+                    except: pass
+                elif flag_type == "light" or flag_type == "offset":
+                    try:
+                        parts = value.split(',')
+                        properties[flag_name] = True
+                        properties[flag_name + '_data'] = (int(parts[0]), int(parts[1]))
+                    except: pass
+        return properties
+
+    @staticmethod
+    def frame_names(names):
+        """
+        PNGs do arquivo em ordem numérica (0.png, 1.png, 10.png...). O sort
+        padrão do python ("10.png" < "2.png") causaria erro na ordem da animação.
+        """
+        png_files = [n for n in names if n.lower().endswith('.png')]
         
-        try:
-            if not zipfile.is_zipfile(filepath):
-                return {}, []
+        def get_num(filename):
+            try:
+                name = os.path.basename(filename)
+                return int(os.path.splitext(name)[0])
+            except:
+                return 9999
 
-            with zipfile.ZipFile(filepath, 'r') as z:
-                # 1. XML
-                xml_content = None
-                for name in z.namelist():
-                    if name.endswith('.xml'):
-                        xml_content = z.read(name)
-                        break
-                
-                if xml_content:
-                    root = ET.fromstring(xml_content)
-                    for attr in root.findall('Attribute'):
-                        key = attr.get('key')
-                        value = attr.get('value')
-                        
-                        if key in OBD_MAP:
-                            flag_name, flag_type = OBD_MAP[key]
-                            if flag_type == bool:
-                                properties[flag_name] = True
-                            elif flag_type == int:
-                                try:
-                                    properties[flag_name] = True
-                                    properties[flag_name + '_data'] = (int(value),)
-                                except: pass
-                            elif flag_type == "light" or flag_type == "offset":
-                                try:
-                                    parts = value.split(',')
-                                    properties[flag_name] = True
-                                    properties[flag_name + '_data'] = (int(parts[0]), int(parts[1]))
-                                except: pass
-
-                # 2. Imagens
-                # Filtra apenas PNGs e ordena numericamente (0.png, 1.png, 10.png...)
-                # O sort padrão do python ("10.png" < "2.png") causaria erro na ordem da animação
-                png_files = [n for n in z.namelist() if n.lower().endswith('.png')]
-                
-                def get_num(filename):
-                    try:
-                        name = os.path.basename(filename)
-                        return int(os.path.splitext(name)[0])
-                    except:
-                        return 9999
+        png_files.sort(key=get_num)
+        return png_files
 
-                png_files.sort(key=get_num)
-                
-                for img_name in png_files:
+    @staticmethod
+    def load_obd(filepath):
+        """(props, [imagens RGBA]) com todos os frames decodificados; para ler sob demanda use ObdFile."""
+        try:
+            with ObdFile(filepath) as obd:
+                images = []
+                for frame in obd.frames:
                     try:
-                        img_data = z.read(img_name)
-                        pil_img = Image.open(io.BytesIO(img_data)).convert("RGBA")
-                        images.append(pil_img)
+                        images.append(frame.image())
                     except Exception as img_err:
-                        print(f"Erro lendo imagem {img_name}: {img_err}")
-                    
+                        print(f"Erro lendo imagem {frame.name}: {img_err}")
+                return obd.properties, images
         except Exception as e:
             print(f"Erro fatal load_obd: {e}")
             return {}, []
 
-        return properties, images
+    @staticmethod
+    def build_xml(thing_props, ob_type="Item", groups=None):
+        """
+        data.xml (bytes) com as flags do thing. Com ``groups`` (frame groups
+        do DatEditor.parse_texture) grava também o <Texture> da versão 2.
+        """
+        root = ET.Element("Object")
+        root.set("type", ob_type) 
+        if groups is not None:
+            root.set("version", str(OBD_VERSION))
+        
+        REVERSE_MAP = {v[0]: (k, v[1]) for k, v in OBD_MAP.items()}
+        
+        for flag, val in thing_props.items():
+            if val is True and flag in REVERSE_MAP:
+                xml_key, type_def = REVERSE_MAP[flag]
+                xml_val = ""
+                
+                data = thing_props.get(flag + '_data', (0,0))
+                # Garante que data é tupla/lista acessível
+                if not isinstance(data, (list, tuple)):
+                    data = (data,)
+
+                if type_def == int:
+                    xml_val = str(data[0])
+                elif type_def == "light" or type_def == "offset":
+                    if len(data) >= 2:
+                        xml_val = f"{data[0]},{data[1]}"
+                    else:
+                        xml_val = "0,0"
+                
+                attr_elem = ET.SubElement(root, "Attribute")
+                attr_elem.set("key", xml_key)
+                if xml_val:
+                    attr_elem.set("value", xml_val)
+
+        if groups is not None:
+            ObdHandler.build_texture_xml(root, groups)
+
+        return ET.tostring(root, encoding='utf-8', method='xml')
+
+    @staticmethod
+    def sheet_name(index):
+        return f"sheet{index}.png"
 
     @staticmethod
-    def save_obd(filepath, thing_props, images, ob_type="Item"):
+    def build_texture_xml(root, groups):
+        """<Texture> com um <FrameGroup> por grupo (ids das sprites ficam nas sheets)."""
+        texture = ET.SubElement(root, "Texture")
+        for index, group in enumerate(groups):
+            elem = ET.SubElement(texture, "FrameGroup")
+            elem.set("type", str(group.get("type", 0)))
+            elem.set("width", str(group["width"]))
+            elem.set("height", str(group["height"]))
+            elem.set("crop", str(group.get("crop_size", 32)))
+            elem.set("layers", str(group["layers"]))
+            elem.set("patternX", str(group["pattern_x"]))
+            elem.set("patternY", str(group["pattern_y"]))
+            elem.set("patternZ", str(group["pattern_z"]))
+            elem.set("frames", str(group["frames"]))
+            elem.set("sheet", ObdHandler.sheet_name(index))
+
+            animation = group.get("animation")
+            if animation:
+                anim = ET.SubElement(elem, "Animation")
+                anim.set("async", "1" if animation.get("async") else "0")
+                anim.set("loops", str(animation.get("loop_count", 0)))
+                anim.set("start", str(animation.get("start_frame", 0)))
+                for min_ms, max_ms in animation.get("durations", ()):
+                    duration = ET.SubElement(anim, "Duration")
+                    duration.set("min", str(min_ms))
+                    duration.set("max", str(max_ms))
+
+    @staticmethod
+    def parse_texture_xml(root):
+        """
+        ([frame groups], [nomes das sheets]) do <Texture>, ou (None, []) num
+        .obd antigo. Os sprite_ids vêm zerados. ValueError se estiver inválido.
+        """
+        texture = root.find("Texture")
+        if texture is None:
+            return None, []
+
+        groups = []
+        sheets = []
+        try:
+            for elem in texture.findall("FrameGroup"):
+                group = {
+                    "type": int(elem.get("type", 0)),
+                    "width": int(elem.get("width")),
+                    "height": int(elem.get("height")),
+                    "crop_size": int(elem.get("crop", 32)),
+                    "layers": int(elem.get("layers")),
+                    "pattern_x": int(elem.get("patternX")),
+                    "pattern_y": int(elem.get("patternY")),
+                    "pattern_z": int(elem.get("patternZ")),
+                    "frames": int(elem.get("frames")),
+                    "animation": None,
+                }
+                anim = elem.find("Animation")
+                if anim is not None:
+                    group["animation"] = {
+                        "async": anim.get("async") == "1",
+                        "loop_count": int(anim.get("loops", 0)),
+                        "start_frame": int(anim.get("start", 0)),
+                        "durations": [
+                            (int(d.get("min")), int(d.get("max"))) for d in anim.findall("Duration")
+                        ],
+                    }
+                group["sprite_ids"] = [0] * group_sprite_count(group)
+                groups.append(group)
+                sheets.append(elem.get("sheet") or ObdHandler.sheet_name(len(sheets)))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"invalid <Texture>: {e}")
+        if not groups:
+            raise ValueError("<Texture> without frame groups")
+        return groups, sheets
+
+    @staticmethod
+    def save_obd(filepath, thing_props, images, ob_type="Item", groups=None):
         """
         ob_type: "Item", "Outfit", "Effect", "Missile"
+
+        Com ``groups`` grava a versão 2: ``images`` são as sprites de todos os
+        grupos na ordem do texture, montadas numa sheet por grupo.
         """
         try:
             with zipfile.ZipFile(filepath, 'w', zipfile.ZIP_DEFLATED) as z:
                 # 1. XML
-                root = ET.Element("Object")
-                root.set("type", ob_type) 
-                
-                REVERSE_MAP = {v[0]: (k, v[1]) for k, v in OBD_MAP.items()}
-                
-                for flag, val in thing_props.items():
-                    if val is True and flag in REVERSE_MAP:
-                        xml_key, type_def = REVERSE_MAP[flag]
-                        xml_val = ""
-                        
-                        data = thing_props.get(flag + '_data', (0,0))
-                        # Garante que data é tupla/lista acessível
-                        if not isinstance(data, (list, tuple)):
-                            data = (data,)
-
-                        if type_def == int:
-                            xml_val = str(data[0])
-                        elif type_def == "light" or type_def == "offset":
-                            if len(data) >= 2:
-                                xml_val = f"{data[0]},{data[1]}"
-                            else:
-                                xml_val = "0,0"
-                        
-                        attr_elem = ET.SubElement(root, "Attribute")
-                        attr_elem.set("key", xml_key)
-                        if xml_val:
-                            attr_elem.set("value", xml_val)
-
-                xml_str = ET.tostring(root, encoding='utf-8', method='xml')
-                z.writestr("data.xml", xml_str)
+                z.writestr("data.xml", ObdHandler.build_xml(thing_props, ob_type, groups))
+
+                if groups is not None:
+                    position = 0
+                    for index, group in enumerate(groups):
+                        count = group_sprite_count(group)
+                        sprites = [
+                            img.convert("RGBA").resize((32, 32)).tobytes() if img else None
+                            for img in images[position:position + count]
+                        ]
+                        position += count
+                        img_byte_arr = io.BytesIO()
+                        compose_sheet(group, sprites).save(img_byte_arr, format='PNG')
+                        z.writestr(ObdHandler.sheet_name(index), img_byte_arr.getvalue())
+                    return
                 
                 if not images:
                     img = Image.new("RGBA", (32, 32), (0,0,0,0))
@@ -166,3 +338,143 @@ class ObdHandler:
         except Exception as e:
             print(f"Erro save_obd: {e}")
             raise e
+
+
+class ObdFrame:
+    """
+    Uma sprite do .obd: um PNG (formato antigo) ou um recorte 32x32 de uma
+    sprite sheet (``box``). Só é lida do zip e decodificada quando pedida.
+    """
+
+    __slots__ = ("obd", "name", "box", "_png")
+
+    def __init__(self, obd, name, box=None):
+        self.obd = obd
+        self.name = name
+        self.box = box
+        self._png = None
+
+    def png(self):
+        """Bytes do PNG da sprite (no formato antigo, como estão no arquivo)."""
+        if self._png is None:
+            if self.box is None:
+                self._png = self.obd.read(self.name)
+            else:
+                buffer = io.BytesIO()
+                self.image().save(buffer, format='PNG')
+                self._png = buffer.getvalue()
+        return self._png
+
+    def image(self):
+        """PIL RGBA, decodificado a cada chamada (não fica em memória)."""
+        if self.box is not None:
+            return self.obd.sheet(self.name).crop(self.box)
+        img = Image.open(io.BytesIO(self.png()))
+        img.load()
+        return img.convert("RGBA")
+
+    def rgba(self, size=(32, 32)):
+        """Pixels RGBA crus do frame, redimensionado para ``size`` se preciso."""
+        img = self.image()
+        if size and img.size != size:
+            img = img.resize(size, Image.NEAREST)
+        return img.tobytes()
+
+    def sprite_data(self, transparency):
+        """
+        Frame pronto para SprEditor.set_sprite_data (u16 de tamanho + RLE),
+        codificado direto dos pixels, sem montar a sprite pixel a pixel.
+        """
+        from spriteHash import encode_rgba, normalize_rgba
+
+        encoded = encode_rgba(normalize_rgba(self.rgba(), transparency), transparency)
+        return struct.pack("<H", len(encoded)) + encoded
+
+
+class ObdFile:
+    """
+    .obd aberto sob demanda: o data.xml é lido na abertura e os frames
+    (ObdFrame) só são lidos/decodificados quando acessados. Use com
+    ``with`` ou chame close(); os frames precisam do arquivo aberto.
+
+    Na versão 2 ``groups`` tem os frame groups gravados (sprite_ids
+    zerados) e ``sheets`` o nome da sheet de cada grupo; os frames são as
+    sprites de todos os grupos na ordem do texture. Num .obd antigo
+    ``groups`` é None.
+    """
+
+    def __init__(self, filepath):
+        self.path = filepath
+        self._zip = zipfile.ZipFile(filepath, 'r')
+        self._sheets = {}
+        try:
+            names = self._zip.namelist()
+            xml_name = next((n for n in names if n.endswith('.xml')), None)
+            root = ET.fromstring(self._zip.read(xml_name)) if xml_name else None
+            self.groups, self.sheets = (
+                ObdHandler.parse_texture_xml(root) if root is not None else (None, [])
+            )
+        except Exception:
+            self._zip.close()
+            raise
+        self.ob_type = root.get("type", "Item") if root is not None else "Item"
+        self.properties = ObdHandler.parse_xml(root) if root is not None else {}
+
+        if self.groups is None:
+            self.frames = [ObdFrame(self, n) for n in ObdHandler.frame_names(names)]
+        else:
+            self.frames = [
+                ObdFrame(self, sheet, (x, y, x + 32, y + 32))
+                for group, sheet in zip(self.groups, self.sheets)
+                for x, y in sheet_positions(group)
+            ]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __iter__(self):
+        return iter(self.frames)
+
+    def __getitem__(self, index):
+        return self.frames[index]
+
+    def read(self, name):
+        return self._zip.read(name)
+
+    def close(self):
+        self._zip.close()
+        self._sheets.clear()
+
+    def sheet(self, name):
+        """Sprite sheet decodificada (uma vez por arquivo aberto)."""
+        img = self._sheets.get(name)
+        if img is None:
+            img = Image.open(io.BytesIO(self.read(name)))
+            img.load()
+            img = self._sheets[name] = img.convert("RGBA")
+        return img
+
+    def group_rgba(self, index):
+        """Pixels RGBA de todas as sprites do frame group ``index``, de uma vez."""
+        return slice_sheet(self.sheet(self.sheets[index]), self.groups[index])
+
+    def thumbnail(self, size=(32, 32)):
+        """
+        Primeira vista do objeto (ou None), reduzida para caber em ``size``:
+        o tile inteiro (width x height) na versão 2, o primeiro PNG no formato antigo.
+        """
+        if not self.frames:
+            return None
+        if self.groups is None:
+            img = self.frames[0].image()
+        else:
+            group = self.groups[0]
+            img = self.sheet(self.sheets[0]).crop((0, 0, group["width"] * 32, group["height"] * 32))
+        img.thumbnail(size, Image.NEAREST)
+        return img
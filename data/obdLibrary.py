@@ -0,0 +1,398 @@
+"""Biblioteca de .obd (pastas compartilhadas com milhares de objetos).
+
+A varredura roda em background e, de cada arquivo, lê só o data.xml e o
+primeiro frame (ObdFile). Tipo, número de frames, flags e a miniatura ficam
+num índice SQLite local, por caminho + mtime/tamanho: uma nova varredura só
+reabre os arquivos que mudaram e remove do índice os que sumiram.
+
+Os objetos da lista podem ser arrastados (como arquivos) para o preview do
+DatSprTab, que importa o .obd no thing aberto.
+"""
+import io
+import json
+import os
+import sqlite3
+
+from PyQt6.QtCore import QMimeData, QSize, Qt, QThread, QUrl, pyqtSignal
+from PyQt6.QtGui import QIcon, QPixmap
+from PyQt6.QtWidgets import (
+    QDialog, QFileDialog, QHBoxLayout, QLabel, QLineEdit, QListView,
+    QListWidget, QListWidgetItem, QProgressBar, QPushButton, QVBoxLayout,
+)
+
+from obdHandler import ObdFile
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LIBRARY_DB = os.path.join(BASE_DIR, "..", "assets", "cache", "obd_library.sqlite")
+
+# Versão 2: miniaturas no tamanho do ícone (antes 32x32)
+SCHEMA_VERSION = 2
+# Miniaturas guardadas no tamanho em que a lista mostra os ícones
+ICON_SIZE = 64
+THUMBNAIL_SIZE = (ICON_SIZE, ICON_SIZE)
+# Arquivos gravados no índice (e enviados para a interface) por vez
+BATCH_SIZE = 200
+
+COLUMNS = ("path", "mtime_ns", "size", "ob_type", "frames", "props", "thumbnail", "error")
+
+
+class LibraryIndex:
+    """Índice SQLite dos .obd: uma linha por arquivo (caminho absoluto)."""
+
+    def __init__(self, db_path=LIBRARY_DB):
+        db_path = os.path.normpath(db_path)
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            self.conn.execute("DROP TABLE IF EXISTS objects")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS objects ("
+            " path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, ob_type TEXT,"
+            " frames INTEGER, props TEXT, thumbnail BLOB, error TEXT)"
+        )
+        self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    @staticmethod
+    def _range(root):
+        # Todos os caminhos dentro de root, sem LIKE (nomes com % e _)
+        prefix = os.path.join(os.path.abspath(root), "")
+        return prefix, prefix + "\U0010ffff"
+
+    def stamps(self, root):
+        """caminho -> (mtime_ns, tamanho) dos arquivos indexados dentro de ``root``."""
+        rows = self.conn.execute(
+            "SELECT path, mtime_ns, size FROM objects WHERE path >= ? AND path < ?",
+            self._range(root),
+        )
+        return {path: (mtime_ns, size) for path, mtime_ns, size in rows}
+
+    def entries(self, root):
+        """Entradas (dicts com COLUMNS) dentro de ``root``, em ordem de caminho."""
+        rows = self.conn.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM objects WHERE path >= ? AND path < ? ORDER BY path",
+            self._range(root),
+        )
+        return [_entry(row) for row in rows]
+
+    def store(self, entries):
+        self.conn.executemany(
+            f"INSERT OR REPLACE INTO objects ({', '.join(COLUMNS)})"
+            f" VALUES ({', '.join('?' * len(COLUMNS))})",
+            [
+                (e["path"], e["mtime_ns"], e["size"], e["ob_type"], e["frames"],
+                 json.dumps(e["props"]), e["thumbnail"], e["error"])
+                for e in entries
+            ],
+        )
+        self.conn.commit()
+
+    def remove(self, paths):
+        self.conn.executemany("DELETE FROM objects WHERE path = ?", [(p,) for p in paths])
+        self.conn.commit()
+
+
+def _entry(row):
+    entry = dict(zip(COLUMNS, row))
+    entry["props"] = json.loads(entry["props"]) if entry["props"] else {}
+    return entry
+
+
+def read_entry(path, stat):
+    """Entrada do índice para um .obd: só o XML e o primeiro frame são lidos."""
+    entry = {
+        "path": path,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "ob_type": None,
+        "frames": 0,
+        "props": {},
+        "thumbnail": None,
+        "error": None,
+    }
+    try:
+        with ObdFile(path) as obd:
+            entry["ob_type"] = obd.ob_type
+            entry["frames"] = len(obd)
+            entry["props"] = obd.properties
+            thumb = obd.thumbnail(THUMBNAIL_SIZE)
+        if thumb is not None:
+            buffer = io.BytesIO()
+            thumb.save(buffer, format="PNG")
+            entry["thumbnail"] = buffer.getvalue()
+    except Exception as e:
+        # Fica no índice com o erro, para não ser reaberto até mudar
+        entry["error"] = str(e) or type(e).__name__
+    return entry
+
+
+def find_obd_files(root):
+    """Caminhos absolutos dos .obd dentro de ``root`` (recursivo)."""
+    found = []
+    for folder, dirs, files in os.walk(os.path.abspath(root)):
+        dirs.sort()
+        found.extend(os.path.join(folder, name) for name in sorted(files) if name.lower().endswith(".obd"))
+    return found
+
+
+def scan_library(root, index, progress=None, updated=None, cancelled=None):
+    """
+    Atualiza ``index`` com os .obd de ``root``. Arquivos com o mesmo mtime e
+    tamanho do índice não são abertos. ``updated(entries)`` recebe as
+    entradas novas/alteradas em blocos.
+
+    Retorna {"total", "unchanged", "updated", "failed", "removed": [caminhos]}
+    ou None se cancelado (o que já foi gravado fica).
+    """
+    stamps = index.stamps(root)
+    files = find_obd_files(root)
+    total = len(files)
+    report = {"total": total, "unchanged": 0, "updated": 0, "failed": 0, "removed": []}
+
+    batch = []
+
+    def flush():
+        if batch:
+            index.store(batch)
+            if updated:
+                updated(list(batch))
+            batch.clear()
+
+    for done, path in enumerate(files, start=1):
+        if cancelled and cancelled():
+            flush()
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        if stamps.pop(path, None) == (stat.st_mtime_ns, stat.st_size):
+            report["unchanged"] += 1
+        else:
+            entry = read_entry(path, stat)
+            report["failed" if entry["error"] else "updated"] += 1
+            batch.append(entry)
+            if len(batch) >= BATCH_SIZE:
+                flush()
+        if progress:
+            progress(done, total)
+    flush()
+
+    # O que sobrou no índice não existe mais em disco
+    report["removed"] = sorted(stamps)
+    index.remove(report["removed"])
+    return report
+
+
+class LibraryScanWorker(QThread):
+    """Roda scan_library fora da thread da interface (com conexão SQLite própria)."""
+
+    progress = pyqtSignal(int, int)
+    entries_updated = pyqtSignal(object)
+    finished_scan = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, root, db_path=LIBRARY_DB, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.db_path = db_path
+
+    def run(self):
+        try:
+            index = LibraryIndex(self.db_path)
+            try:
+                report = scan_library(
+                    self.root,
+                    index,
+                    progress=lambda done, total: self.progress.emit(done, total),
+                    updated=self.entries_updated.emit,
+                    cancelled=self.isInterruptionRequested,
+                )
+            finally:
+                index.close()
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.finished_scan.emit(report)
+
+
+class ObdLibraryList(QListWidget):
+    """Lista de miniaturas; arrastar um item leva o caminho do .obd (como URL de arquivo)."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setViewMode(QListView.ViewMode.IconMode)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+        self.setIconSize(QSize(*THUMBNAIL_SIZE))
+        self.setGridSize(QSize(96, 96))
+        self.setUniformItemSizes(True)
+        self.setSelectionMode(QListWidget.SelectionMode.ExtendedSelection)
+        self.setDragEnabled(True)
+        self.setDragDropMode(QListWidget.DragDropMode.DragOnly)
+
+    def mimeData(self, items):
+        mime_data = QMimeData()
+        mime_data.setUrls([QUrl.fromLocalFile(item.data(Qt.ItemDataRole.UserRole)) for item in items])
+        return mime_data
+
+
+class ObdLibraryWindow(QDialog):
+    """Navegador da biblioteca de .obd; duplo clique ou arrastar importa no DAT editor."""
+
+    obdActivated = pyqtSignal(str)
+
+    def __init__(self, parent=None, db_path=LIBRARY_DB):
+        super().__init__(parent)
+        self.setWindowTitle("OBD Library")
+        self.resize(720, 520)
+        self.db_path = db_path
+        self.root = None
+        self.worker = None
+        self.items = {}   # caminho -> QListWidgetItem
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        folder_row = QHBoxLayout()
+        self.folder_entry = QLineEdit()
+        self.folder_entry.setReadOnly(True)
+        self.folder_entry.setPlaceholderText("Choose a folder with .obd files")
+        folder_row.addWidget(self.folder_entry, 1)
+
+        self.browse_button = QPushButton("Browse...")
+        self.browse_button.clicked.connect(self.choose_folder)
+        folder_row.addWidget(self.browse_button)
+
+        self.rescan_button = QPushButton("Rescan")
+        self.rescan_button.setEnabled(False)
+        self.rescan_button.clicked.connect(self.start_scan)
+        folder_row.addWidget(self.rescan_button)
+        layout.addLayout(folder_row)
+
+        self.filter_entry = QLineEdit()
+        self.filter_entry.setPlaceholderText("Filter by name, type or flag...")
+        self.filter_entry.textChanged.connect(self.apply_filter)
+        layout.addWidget(self.filter_entry)
+
+        self.list_widget = ObdLibraryList()
+        self.list_widget.itemActivated.connect(
+            lambda item: self.obdActivated.emit(item.data(Qt.ItemDataRole.UserRole))
+        )
+        layout.addWidget(self.list_widget, 1)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.hide()
+        layout.addWidget(self.progress_bar)
+
+        self.status_label = QLabel("Drag objects to the preview to import them.")
+        layout.addWidget(self.status_label)
+
+    def choose_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "OBD library folder", self.root or "")
+        if folder:
+            self.open_folder(folder)
+
+    def open_folder(self, folder):
+        """Mostra na hora o que já está no índice e varre a pasta em background."""
+        self.stop_scan()
+        self.root = os.path.abspath(folder)
+        self.folder_entry.setText(self.root)
+        self.rescan_button.setEnabled(True)
+
+        self.list_widget.clear()
+        self.items.clear()
+        index = LibraryIndex(self.db_path)
+        try:
+            self.update_entries(index.entries(self.root))
+        finally:
+            index.close()
+        self.start_scan()
+
+    def start_scan(self):
+        if not self.root or (self.worker and self.worker.isRunning()):
+            return
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.status_label.setText("Scanning...")
+
+        self.worker = LibraryScanWorker(self.root, self.db_path, self)
+        self.worker.progress.connect(self.on_scan_progress)
+        self.worker.entries_updated.connect(self.update_entries)
+        self.worker.finished_scan.connect(self.on_scan_finished)
+        self.worker.failed.connect(self.on_scan_failed)
+        self.worker.start()
+
+    def stop_scan(self):
+        if self.worker and self.worker.isRunning():
+            # Sinais ainda na fila seriam da pasta anterior
+            self.worker.disconnect()
+            self.worker.requestInterruption()
+            self.worker.wait()
+        self.progress_bar.hide()
+
+    def on_scan_progress(self, done, total):
+        self.progress_bar.setMaximum(total)
+        self.progress_bar.setValue(done)
+
+    def on_scan_finished(self, report):
+        self.progress_bar.hide()
+        if report is None:
+            self.status_label.setText("Scan cancelled.")
+            return
+        for path in report["removed"]:
+            item = self.items.pop(path, None)
+            if item is not None:
+                self.list_widget.takeItem(self.list_widget.row(item))
+        self.status_label.setText(
+            f"{report['total']} objects: {report['updated']} updated, "
+            f"{report['unchanged']} unchanged, {report['failed']} unreadable, "
+            f"{len(report['removed'])} removed."
+        )
+
+    def on_scan_failed(self, message):
+        self.progress_bar.hide()
+        self.status_label.setText(f"Scan failed: {message}")
+
+    def update_entries(self, entries):
+        for entry in entries:
+            item = self.items.get(entry["path"])
+            if item is None:
+                item = QListWidgetItem()
+                item.setData(Qt.ItemDataRole.UserRole, entry["path"])
+                self.list_widget.addItem(item)
+                self.items[entry["path"]] = item
+
+            name = os.path.splitext(os.path.basename(entry["path"]))[0]
+            item.setText(name)
+            pixmap = QPixmap()
+            if entry["thumbnail"]:
+                pixmap.loadFromData(entry["thumbnail"], "PNG")
+            item.setIcon(QIcon(pixmap))
+
+            if entry["error"]:
+                details = f"Unreadable: {entry['error']}"
+            else:
+                flags = ", ".join(sorted(k for k in entry["props"] if not k.endswith("_data")))
+                details = f"{entry['ob_type']} - {entry['frames']} frame(s)\n{flags}"
+            item.setToolTip(f"{entry['path']}\n{details}")
+            # Texto usado pelo filtro
+            item.setData(Qt.ItemDataRole.UserRole + 1, f"{name}\n{details}".lower())
+            item.setHidden(not self.matches_filter(item))
+
+    def matches_filter(self, item):
+        text = self.filter_entry.text().strip().lower()
+        return not text or text in item.data(Qt.ItemDataRole.UserRole + 1)
+
+    def apply_filter(self):
+        for item in self.items.values():
+            item.setHidden(not self.matches_filter(item))
+
+    def closeEvent(self, event):
+        self.stop_scan()
+        super().closeEvent(event)
@@ -0,0 +1,129 @@
+"""Checagem de consistência items.otb <-> Tibia.dat.
+
+Reporta client ids do OTB que não existem no DAT, itens do DAT que nenhum
+item do OTB usa e diferenças de flags/speed/light entre os dois. Roda sem
+interface:
+
+    python data/otbChecker.py items.otb Tibia.dat --extended --json report.json
+
+Sai com código 1 quando encontra alguma inconsistência.
+"""
+import argparse
+import datetime
+import json
+import sys
+
+import numpy as np
+
+from datspr import DatEditor
+from otbFlags import MAPPED_OTB_FLAGS, DatItemTable, compute_reload, describe_flags
+from otbParser import OtbFile
+
+
+def check_consistency(otb, dat_editor, dat_table=None):
+    """
+    Compara um OtbFile carregado com um DatEditor carregado, usando os
+    índices por client id dos dois lados. Retorna o relatório como dict
+    (pronto para json.dump).
+    """
+    if dat_table is None:
+        dat_table = DatItemTable(dat_editor)
+
+    items = otb.items
+    changes, summary = compute_reload(items, dat_table, flag_mask=MAPPED_OTB_FLAGS)
+
+    client_ids = np.fromiter((item.client_id for item in items), dtype=np.int64, count=len(items))
+    _safe, found = dat_table.lookup(client_ids)
+    missing_in_dat = [
+        {"server_id": items[i].server_id, "client_id": items[i].client_id}
+        for i in np.flatnonzero((client_ids > 0) & ~found).tolist()
+    ]
+
+    referenced = np.zeros(len(dat_table), dtype=bool)
+    referenced[[cid for cid in otb.items_by_client_id if cid < len(dat_table)]] = True
+    missing_in_otb = np.flatnonzero(dat_table.present & ~referenced).tolist()
+
+    mismatches = []
+    for change in changes:
+        entry = {"server_id": change["server_id"], "client_id": change["client_id"]}
+        if change["flags"]:
+            otb_flags, dat_flags = change["flags"]
+            otb_flags &= MAPPED_OTB_FLAGS
+            entry["flags"] = {
+                "otb": otb_flags,
+                "dat": dat_flags,
+                "only_otb": describe_flags(otb_flags & ~dat_flags),
+                "only_dat": describe_flags(dat_flags & ~otb_flags),
+            }
+        if change["speed"]:
+            entry["speed"] = {"otb": change["speed"][0], "dat": change["speed"][1]}
+        if change["light"]:
+            entry["light"] = {"otb": list(change["light"][0]), "dat": list(change["light"][1])}
+        mismatches.append(entry)
+
+    return {
+        "generated": datetime.datetime.now().isoformat(timespec="seconds"),
+        "summary": {
+            "otb_items": len(items),
+            "dat_items": int(dat_table.present.sum()),
+            "missing_in_dat": len(missing_in_dat),
+            "missing_in_otb": len(missing_in_otb),
+            "flags": summary["flags"],
+            "speed": summary["speed"],
+            "light": summary["light"],
+        },
+        "missing_in_dat": missing_in_dat,
+        "missing_in_otb": missing_in_otb,
+        "mismatches": mismatches,
+    }
+
+
+def has_issues(report):
+    s = report["summary"]
+    return bool(s["missing_in_dat"] or s["missing_in_otb"] or s["flags"] or s["speed"] or s["light"])
+
+
+def format_summary(report):
+    s = report["summary"]
+    return "\n".join([
+        f"OTB items: {s['otb_items']}  DAT items: {s['dat_items']}",
+        f"OTB client ids missing in the DAT: {s['missing_in_dat']}",
+        f"DAT items missing in the OTB: {s['missing_in_otb']}",
+        f"Flag mismatches: {s['flags']}",
+        f"Speed mismatches: {s['speed']}",
+        f"Light mismatches: {s['light']}",
+    ])
+
+
+def save_report_json(report, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="items.otb <-> Tibia.dat consistency check")
+    parser.add_argument("otb", help="items.otb")
+    parser.add_argument("dat", help="Tibia.dat")
+    parser.add_argument("--extended", action="store_true", help="DAT with u32 sprite ids")
+    parser.add_argument("--json", help="write the full report to this file")
+    args = parser.parse_args(argv)
+
+    otb = OtbFile()
+    otb.load(args.otb)
+    dat = DatEditor(args.dat, extended=args.extended)
+    dat.load()
+
+    report = check_consistency(otb, dat)
+    report["otb"] = args.otb
+    report["dat"] = args.dat
+
+    print(format_summary(report))
+    if args.json:
+        save_report_json(report, args.json)
+        print(f"Report written to {args.json}")
+
+    return 1 if has_issues(report) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
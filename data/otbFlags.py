@@ -0,0 +1,254 @@
+import numpy as np
+
+from datspr import REVERSE_METADATA_FLAGS
+
+# --- FLAGS do nó de item no OTB ---
+OTB_FLAG_BLOCK_SOLID        = 1 << 0
+OTB_FLAG_BLOCK_PROJECTILE   = 1 << 1
+OTB_FLAG_BLOCK_PATHFIND     = 1 << 2
+OTB_FLAG_HAS_HEIGHT         = 1 << 3
+OTB_FLAG_USEABLE            = 1 << 4
+OTB_FLAG_PICKUPABLE         = 1 << 5
+OTB_FLAG_MOVEABLE           = 1 << 6
+OTB_FLAG_STACKABLE          = 1 << 7
+OTB_FLAG_FLOORCHANGEDOWN    = 1 << 8
+OTB_FLAG_FLOORCHANGENORTH   = 1 << 9
+OTB_FLAG_FLOORCHANGEEAST    = 1 << 10
+OTB_FLAG_FLOORCHANGESOUTH   = 1 << 11
+OTB_FLAG_FLOORCHANGEWEST    = 1 << 12
+OTB_FLAG_ALWAYSONTOP        = 1 << 13
+OTB_FLAG_READABLE           = 1 << 14
+OTB_FLAG_ROTATABLE          = 1 << 15
+OTB_FLAG_HANGABLE           = 1 << 16
+OTB_FLAG_VERTICAL           = 1 << 17
+OTB_FLAG_HORIZONTAL         = 1 << 18
+OTB_FLAG_CANNOTDECAY        = 1 << 19
+OTB_FLAG_ALLOWDISTREAD      = 1 << 20
+OTB_FLAG_CORPSE             = 1 << 21
+OTB_FLAG_CLIENTCHARGES      = 1 << 22
+OTB_FLAG_LOOKTHROUGH        = 1 << 23
+OTB_FLAG_ANIMATION          = 1 << 24
+OTB_FLAG_FULLGROUND         = 1 << 25
+OTB_FLAG_FORCEUSE           = 1 << 26
+
+# Flag do DAT (nome em METADATA_FLAGS) -> flag do OTB
+DAT_TO_OTB_FLAGS = {
+    "Unpassable":     OTB_FLAG_BLOCK_SOLID,
+    "BlockMissile":   OTB_FLAG_BLOCK_PROJECTILE,
+    "BlockPathfind":  OTB_FLAG_BLOCK_PATHFIND,
+    "HasElevation":   OTB_FLAG_HAS_HEIGHT,
+    "Usable":         OTB_FLAG_USEABLE,
+    "Pickupable":     OTB_FLAG_PICKUPABLE,
+    "Stackable":      OTB_FLAG_STACKABLE,
+    "OnTop":          OTB_FLAG_ALWAYSONTOP,
+    "Rotatable":      OTB_FLAG_ROTATABLE,
+    "Hangable":       OTB_FLAG_HANGABLE,
+    "HookVertical":   OTB_FLAG_VERTICAL,
+    "HookHorizontal": OTB_FLAG_HORIZONTAL,
+    "AnimateAlways":  OTB_FLAG_ANIMATION,
+    "FullGround":     OTB_FLAG_FULLGROUND,
+    "ForceUse":       OTB_FLAG_FORCEUSE,
+    # Não existe direto no DAT, é inferida
+    "ShowOnMinimap":  OTB_FLAG_LOOKTHROUGH,
+    "Writable":       OTB_FLAG_READABLE,
+    "WritableOnce":   OTB_FLAG_READABLE,
+    # Lógica inversa: MOVEABLE quando o DAT NÃO tem Unmoveable (ver INVERTED_OTB_FLAGS)
+    "Unmoveable":     OTB_FLAG_MOVEABLE,
+}
+INVERTED_OTB_FLAGS = OTB_FLAG_MOVEABLE
+
+# Flags do OTB que o DAT define; as outras (corpse, floor change, ...) só
+# existem no OTB
+MAPPED_OTB_FLAGS = 0
+for _flag in DAT_TO_OTB_FLAGS.values():
+    MAPPED_OTB_FLAGS |= _flag
+del _flag
+
+# Flags do DAT vão de 0x00 a 0x27: cabem em 6 bytes de máscara
+_MASK_BYTES = 6
+
+
+def _build_translation_tables():
+    """
+    Uma tabela de 256 entradas por byte da máscara do DAT: tabela[n][valor]
+    é o OR das flags do OTB ligadas pelos bits de ``valor`` no byte ``n``.
+    A tradução de uma máscara inteira vira _MASK_BYTES consultas.
+    """
+    tables = np.zeros((_MASK_BYTES, 256), dtype=np.uint32)
+    for name, otb_flag in DAT_TO_OTB_FLAGS.items():
+        bit = REVERSE_METADATA_FLAGS[name]
+        byte_index, bit_in_byte = divmod(bit, 8)
+        values = np.arange(256)
+        tables[byte_index, (values >> bit_in_byte) & 1 == 1] |= otb_flag
+    return tables
+
+
+TRANSLATION_TABLES = _build_translation_tables()
+
+
+class DatItemTable:
+    """
+    Arrays indexados pelo client id com o que o reload precisa de cada item
+    do DAT: máscara de flags (bit n = flag n de METADATA_FLAGS), speed do
+    chão e luz. Montado uma vez por reload/checagem.
+
+    ``progress(feitos, total)`` é chamado a cada 1024 itens, para quem roda
+    isso numa thread (uma exceção no callback interrompe a montagem).
+    """
+
+    def __init__(self, dat_editor, progress=None):
+        items = dat_editor.things.get("items", {})
+        size = (max(items) if items else 0) + 1
+
+        self.present = np.zeros(size, dtype=bool)
+        self.flags = np.zeros(size, dtype=np.uint64)
+        self.speed = np.zeros(size, dtype=np.uint32)
+        self.light_level = np.zeros(size, dtype=np.uint32)
+        self.light_color = np.zeros(size, dtype=np.uint32)
+
+        reverse = REVERSE_METADATA_FLAGS
+        total = len(items)
+        for done, (cid, thing) in enumerate(items.items(), start=1):
+            if progress and done % 1024 == 0:
+                progress(done, total)
+
+            props = thing.get("props", {})
+            mask = 0
+            for key in props:
+                bit = reverse.get(key)
+                if bit is not None:
+                    mask |= 1 << bit
+            self.present[cid] = True
+            self.flags[cid] = mask
+
+            if "Ground" in props and "Ground_data" in props:
+                try:
+                    self.speed[cid] = int(props["Ground_data"][0])
+                except (TypeError, ValueError, IndexError):
+                    pass
+            if "HasLight" in props and "HasLight_data" in props:
+                try:
+                    level, color = props["HasLight_data"]
+                    self.light_level[cid] = int(level)
+                    self.light_color[cid] = int(color)
+                except (TypeError, ValueError):
+                    pass
+
+    def __len__(self):
+        return len(self.present)
+
+    def lookup(self, client_ids):
+        """Índices seguros para os arrays + máscara dos ids que existem no DAT."""
+        client_ids = np.asarray(client_ids, dtype=np.int64)
+        in_range = (client_ids > 0) & (client_ids < len(self.present))
+        safe = np.where(in_range, client_ids, 0)
+        return safe, in_range & self.present[safe]
+
+
+def translate_flags(dat_masks):
+    """Converte máscaras do DAT (array uint64) para flags do OTB (uint32)."""
+    dat_masks = np.asarray(dat_masks, dtype=np.uint64)
+    otb = np.zeros(dat_masks.shape, dtype=np.uint32)
+    for byte_index in range(_MASK_BYTES):
+        values = (dat_masks >> np.uint64(byte_index * 8)) & np.uint64(0xFF)
+        otb |= TRANSLATION_TABLES[byte_index][values.astype(np.intp)]
+    return otb ^ np.uint32(INVERTED_OTB_FLAGS)
+
+
+def compute_reload(otb_items, dat_table, flag_mask=0xFFFFFFFF):
+    """
+    Calcula flags/speed/light novos de todos os itens do OTB numa passada
+    vetorizada. Não altera nada; retorna (changes, summary):
+
+    - changes: um dict por item com alguma diferença real
+      {"item", "server_id", "client_id", "flags", "speed", "light"}, onde
+      cada campo é (antigo, novo) ou None quando não mudou;
+    - summary: contagens (processed, missing, changed, flags, speed, light).
+
+    Só os bits de ``flag_mask`` contam como diferença de flags (a checagem
+    usa MAPPED_OTB_FLAGS para ignorar as flags que só existem no OTB).
+    """
+    count = len(otb_items)
+    client_ids = np.fromiter((item.client_id for item in otb_items), dtype=np.int64, count=count)
+    old_flags = np.fromiter((item.flags for item in otb_items), dtype=np.uint32, count=count)
+    old_speed = np.fromiter((item.speed for item in otb_items), dtype=np.uint32, count=count)
+    old_level = np.fromiter((item.light_level for item in otb_items), dtype=np.uint32, count=count)
+    old_color = np.fromiter((item.light_color for item in otb_items), dtype=np.uint32, count=count)
+
+    safe, found = dat_table.lookup(client_ids)
+
+    new_flags = translate_flags(dat_table.flags[safe])
+    new_speed = dat_table.speed[safe]
+    new_level = dat_table.light_level[safe]
+    new_color = dat_table.light_color[safe]
+
+    mask = np.uint32(flag_mask)
+    flags_changed = found & ((new_flags & mask) != (old_flags & mask))
+    speed_changed = found & (new_speed != old_speed)
+    light_changed = found & ((new_level != old_level) | (new_color != old_color))
+    changed = flags_changed | speed_changed | light_changed
+
+    changes = []
+    indexes = np.flatnonzero(changed)
+    columns = zip(
+        indexes.tolist(),
+        flags_changed[indexes].tolist(), old_flags[indexes].tolist(), new_flags[indexes].tolist(),
+        speed_changed[indexes].tolist(), old_speed[indexes].tolist(), new_speed[indexes].tolist(),
+        light_changed[indexes].tolist(),
+        old_level[indexes].tolist(), old_color[indexes].tolist(),
+        new_level[indexes].tolist(), new_color[indexes].tolist(),
+    )
+    for (i, f_changed, f_old, f_new, s_changed, s_old, s_new,
+         l_changed, l_old, c_old, l_new, c_new) in columns:
+        item = otb_items[i]
+        changes.append({
+            "item": item,
+            "server_id": item.server_id,
+            "client_id": item.client_id,
+            "flags": (f_old, f_new) if f_changed else None,
+            "speed": (s_old, s_new) if s_changed else None,
+            "light": ((l_old, c_old), (l_new, c_new)) if l_changed else None,
+        })
+
+    summary = {
+        "processed": int(found.sum()),
+        "missing": int(np.count_nonzero((client_ids > 0) & ~found)),
+        "changed": len(changes),
+        "flags": int(flags_changed.sum()),
+        "speed": int(speed_changed.sum()),
+        "light": int(light_changed.sum()),
+    }
+    return changes, summary
+
+
+def apply_changes(changes):
+    """Grava nos OtbItem os valores novos calculados por compute_reload."""
+    for change in changes:
+        item = change["item"]
+        if change["flags"]:
+            item.flags = change["flags"][1]
+        if change["speed"]:
+            item.speed = change["speed"][1]
+        if change["light"]:
+            item.light_level, item.light_color = change["light"][1]
+
+
+def revert_changes(changes):
+    """Desfaz apply_changes (volta os valores antigos)."""
+    for change in changes:
+        item = change["item"]
+        if change["flags"]:
+            item.flags = change["flags"][0]
+        if change["speed"]:
+            item.speed = change["speed"][0]
+        if change["light"]:
+            item.light_level, item.light_color = change["light"][0]
+
+
+def describe_flags(flags):
+    """Nomes das OTB_FLAG_* ligadas em ``flags`` (para logs/relatórios)."""
+    return [
+        name[len("OTB_FLAG_"):]
+        for name, value in globals().items()
+        if name.startswith("OTB_FLAG_") and flags & value
+    ]
@@ -1,3 +1,4 @@
+import re
 import struct
 
 # Constantes OTB
@@ -5,8 +6,8 @@ NODE_START = 0xFE
 NODE_END   = 0xFF
 ESCAPE     = 0xFD
 
-# Tipos de Atributos (Baseado no TFS)
-ATTR_SERVERID    = 0x10 # As vezes muda dependendo da versão, mas o padrão OTB usa mapeamento
+# Tipos de Atributos (itemattrib_t do TFS / ItemEditor)
+ATTR_SERVERID    = 0x10
 ATTR_CLIENTID    = 0x11
 ATTR_NAME        = 0x12
 ATTR_DESCR       = 0x13
@@ -20,17 +21,53 @@ ATTR_ARMOR       = 0x1A
 ATTR_MAGLEVEL    = 0x1B
 ATTR_MAGFIELD    = 0x1C
 ATTR_WRITEABLE   = 0x1D
-ATTR_ROTATABLE   = 0x1E
-ATTR_CAPACITY    = 0x1F
-ATTR_DECAY       = 0x20
-ATTR_SPRITEHASH  = 0x21
-ATTR_MINIMAPCOLOR= 0x22
-ATTR_07          = 0x23
-ATTR_08          = 0x24
-ATTR_LIGHT       = 0x25
-
-# Tipos usados no seu código original (mapeamento direto por byte lido)
+ATTR_ROTATETO    = 0x1E
+ATTR_DECAY       = 0x1F
+ATTR_SPRITEHASH  = 0x20
+ATTR_MINIMAPCOLOR= 0x21
+ATTR_07          = 0x22
+ATTR_08          = 0x23
+ATTR_LIGHT       = 0x24
+ATTR_DECAY2      = 0x25
+ATTR_WEAPON2     = 0x26
+ATTR_AMMU2       = 0x27
+ATTR_ARMOR2      = 0x28
+ATTR_WRITEABLE2  = 0x29
+ATTR_LIGHT2      = 0x2A
+ATTR_TOPORDER    = 0x2B
+ATTR_WRITEABLE3  = 0x2C
+ATTR_WAREID      = 0x2D
+
+# Intervalo (em nós) entre chamadas do callback de progresso do save()
+PROGRESS_STEP = 1024
+
+# Qualquer byte que precisa de escape dentro dos dados de um nó
+_SPECIAL_BYTES = re.compile(b"[\xFD\xFE\xFF]")
+
+# Atributos copiados para campos do OtbItem em _parse_single_attribute
+_DECODED_ATTRS = frozenset((ATTR_SERVERID, ATTR_CLIENTID, ATTR_SPEED, ATTR_LIGHT, ATTR_LIGHT2))
+
+
+def _escape(data):
+    """Coloca o ESCAPE (0xFD) antes de cada 0xFD/0xFE/0xFF de ``data``."""
+    return _SPECIAL_BYTES.sub(b"\xFD\\g<0>", data)
+
+
 class OtbItem:
+    """
+    Nó do OTB (raiz ou item).
+
+    Os atributos ficam nos bytes lidos do arquivo (``_raw``); a lista
+    ``attributes`` de (tipo, memoryview) só é montada no primeiro acesso, os
+    payloads apontam para ``_raw`` sem cópia. Server/client id, speed e light
+    também ficam nos campos abaixo e são os valores usados pelo save().
+    """
+
+    __slots__ = (
+        "type_id", "server_id", "client_id", "flags", "speed",
+        "light_level", "light_color", "children", "_raw", "_attributes",
+    )
+
     def __init__(self):
         self.type_id = 0
         self.server_id = 0
@@ -39,13 +76,55 @@ class OtbItem:
         self.speed = 0
         self.light_level = 0
         self.light_color = 0
-        self.attribs = b""  
         self.children = []
+        self._raw = b""
+        self._attributes = None
+
+    @property
+    def attributes(self):
+        """Lista [(tipo, memoryview)] na ordem do arquivo."""
+        if self._attributes is None:
+            self._attributes = list(self.iter_attributes())
+        return self._attributes
+
+    def iter_attributes(self):
+        """(tipo, payload) sem montar a lista quando ela ainda não existe."""
+        if self._attributes is not None:
+            yield from self._attributes
+            return
+
+        raw = memoryview(self._raw)
+        pos = 0
+        end = len(raw)
+        while pos < end:
+            size = raw[pos + 1] | (raw[pos + 2] << 8)
+            yield raw[pos], raw[pos + 3:pos + 3 + size]
+            pos += 3 + size
+
+    def get_attribute(self, attr_type):
+        """Payload (memoryview) do atributo ou None."""
+        for atype, payload in self.attributes:
+            if atype == attr_type:
+                return payload
+        return None
+
+    def set_attribute(self, attr_type, payload):
+        """Substitui o payload do atributo ou adiciona no fim."""
+        payload = memoryview(bytes(payload))
+        for i, (atype, _old) in enumerate(self.attributes):
+            if atype == attr_type:
+                self.attributes[i] = (attr_type, payload)
+                return
+        self.attributes.append((attr_type, payload))
+
 
 class OtbFile:
     def __init__(self):
         self.root_children = []
         self.version_data = b""
+        self.items = []
+        self.items_by_server_id = {}
+        self.items_by_client_id = {}
 
     def load(self, path):
         with open(path, "rb") as f:
@@ -55,170 +134,205 @@ class OtbFile:
             raise ValueError("Arquivo muito pequeno para ser um OTB.")
 
         self.version_data = data[:4]
-        pos = 4
-        
         self.root_children = []
 
-        while pos < len(data) and data[pos] != NODE_START:
-            pos += 1
-        
-        if pos >= len(data):
+        pos = data.find(bytes([NODE_START]), 4)
+        if pos < 0:
             raise ValueError("Nenhum nó raiz (0xFE) encontrado no OTB.")
 
-        # Parse recursivo a partir da Raiz
-        self.root_children, _ = self._parse_node_contents(data, pos)
+        self.root_children = [self._parse_tree(data, pos)]
+        self.build_indexes()
+
+    def build_indexes(self):
+        """
+        Monta a lista plana de itens e os índices server_id -> item e
+        client_id -> [itens]. Feito uma vez no load; chame de novo depois de
+        alterar server/client ids em massa.
+        """
+        items = []
+        by_server = {}
+        by_client = {}
+
+        stack = list(reversed(self.root_children))
+        while stack:
+            node = stack.pop()
+            if node.server_id > 0 or node.client_id > 0:
+                items.append(node)
+                if node.server_id:
+                    by_server[node.server_id] = node
+                if node.client_id:
+                    by_client.setdefault(node.client_id, []).append(node)
+            stack.extend(reversed(node.children))
+
+        self.items = items
+        self.items_by_server_id = by_server
+        self.items_by_client_id = by_client
 
-    def _parse_node_contents(self, data, pos):
+    def _parse_tree(self, data, pos):
         """
-        Lê um nó a partir do byte NODE_START (0xFE) atual.
-        Retorna (lista_de_filhos, nova_posicao).
-        Para a raiz, retorna os grupos/itens.
+        Lê a árvore que começa no NODE_START (0xFE) em ``pos`` e retorna o nó raiz.
+
+        Sem recursão: cada nó aberto fica numa pilha junto com os pedaços
+        (memoryviews entre um byte especial e o próximo) das suas
+        propriedades. Quando o nó fecha (0xFF) os pedaços são juntados, tipo,
+        flags e atributos são decodificados e ele é adicionado aos filhos do
+        nó de cima.
         """
-        # Validação inicial
-        if pos >= len(data) or data[pos] != NODE_START:
-            return [], pos
-
-        pos += 1 # Consome 0xFE
-        
-        if pos >= len(data): return [], pos
-
-        # Tipo do Nó (1 byte)
-        node_type = data[pos]
-        pos += 1
-
-        current_node = OtbItem()
-        current_node.type_id = node_type
-
-        children = []
-
-        while pos < len(data):
-            val = data[pos]
-
-            if val == NODE_END: # 0xFF
-                pos += 1
-
-                current_node.children = children
-                return [current_node], pos
-
-            elif val == NODE_START: # 0xFE (Filho)
-                sub_children, new_pos = self._parse_node_contents(data, pos)
-
-                children.extend(sub_children)
-                pos = new_pos
-            
-            else:
-
-                attr_type = val
-                pos += 1
-                
-
-                if pos + 2 > len(data):
-
-                    break
-                
-                size = struct.unpack("<H", data[pos:pos+2])[0]
-                pos += 2
-                
-                if pos + size > len(data):
-                    # Fim inesperado no meio dos dados
-                    break
-                
-                payload = data[pos:pos+size]
-                pos += size
-                
-                self._parse_single_attribute(current_node, attr_type, payload)
-
-        return [current_node], pos
-
-    def _parse_single_attribute(self, item, attr_type, payload):
-        """Decodifica payload de atributos conhecidos ou salva no blob."""
-        try:
-            # Mapeamento baseado na ordem comum do OTB (TFS)
-            # Server ID (TypeID) = 16 (0x10)
-            if attr_type == 0x10 and len(payload) >= 2:
-                item.server_id = struct.unpack("<H", payload)[0]
-                
-            # Client ID (SpriteID) = 17 (0x11)
-            elif attr_type == 0x11 and len(payload) >= 2:
-                item.client_id = struct.unpack("<H", payload)[0]
-            
-            # Speed = 20 (0x14)
-            elif attr_type == 0x14 and len(payload) >= 2:
-                item.speed = struct.unpack("<H", payload)[0]
-            
-            # Light = 37 (0x25)
-            elif attr_type == 0x25 and len(payload) >= 4:
-                 item.light_level = payload[0]
-                 item.light_color = payload[1]
-                 
-            item.attribs += bytes([attr_type]) + struct.pack("<H", len(payload)) + payload
-            
-        except Exception:
-            pass
+        view = memoryview(data)
+        search = _SPECIAL_BYTES.search
+        size = len(data)
+        stack = []
+
+        while True:
+            match = search(data, pos)
+            if match is None:
+                raise ValueError("OTB truncado: nó sem fim (0xFF).")
+
+            idx = match.start()
+            marker = data[idx]
+
+            if idx > pos and stack:
+                stack[-1][1].append(view[pos:idx])
+
+            if marker == ESCAPE:
+                if idx + 1 >= size:
+                    raise ValueError("OTB truncado: escape (0xFD) no fim do arquivo.")
+                stack[-1][1].append(view[idx + 1:idx + 2])
+                pos = idx + 2
+
+            elif marker == NODE_START:
+                stack.append((OtbItem(), []))
+                pos = idx + 1
+
+            else:  # NODE_END
+                if not stack:
+                    raise ValueError(f"Fim de nó (0xFF) inesperado em 0x{idx:X}.")
+                node, parts = stack.pop()
+                self._parse_node_props(node, b"".join(parts), idx)
+                pos = idx + 1
+
+                if not stack:
+                    return node
+                stack[-1][0].children.append(node)
+
+    def _parse_node_props(self, node, props, offset):
+        """Decodifica tipo (1 byte), flags (u32) e a lista de atributos do nó."""
+        if len(props) < 5:
+            raise ValueError(f"Nó OTB incompleto antes de 0x{offset:X}.")
+
+        node.type_id = props[0]
+        node.flags = struct.unpack_from("<I", props, 1)[0]
+
+        pos = 5
+        end = len(props)
+        while pos < end:
+            if pos + 3 > end:
+                raise ValueError(f"Atributo OTB truncado antes de 0x{offset:X}.")
+            attr_type = props[pos]
+            attr_size = struct.unpack_from("<H", props, pos + 1)[0]
+            pos += 3
+            if pos + attr_size > end:
+                raise ValueError(f"Atributo 0x{attr_type:02X} truncado antes de 0x{offset:X}.")
+
+            if attr_type in _DECODED_ATTRS:
+                self._parse_single_attribute(node, attr_type, props, pos, attr_size)
+            pos += attr_size
+
+        node._raw = props[5:]
+
+    def _parse_single_attribute(self, item, attr_type, data, pos, size):
+        """Copia os atributos conhecidos para os campos do item."""
+        if attr_type == ATTR_SERVERID and size >= 2:
+            item.server_id = struct.unpack_from("<H", data, pos)[0]
+
+        elif attr_type == ATTR_CLIENTID and size >= 2:
+            item.client_id = struct.unpack_from("<H", data, pos)[0]
+
+        elif attr_type == ATTR_SPEED and size >= 2:
+            item.speed = struct.unpack_from("<H", data, pos)[0]
+
+        elif attr_type in (ATTR_LIGHT, ATTR_LIGHT2) and size >= 4:
+            item.light_level, item.light_color = struct.unpack_from("<HH", data, pos)
 
     def get_all_items(self):
-        """Retorna lista plana de todos os itens encontrados na árvore recursiva."""
-        items = []
-        
-        def traverse(nodes):
-            for node in nodes:
-                if node.server_id > 0 or node.client_id > 0:
-                    items.append(node)
-                traverse(node.children)
-        
-        traverse(self.root_children)
-        return items
-
-    def save(self, path):
-        output = self.version_data
-        
-        def write_node(node):
-            res = b""
-            res += b"\xFE" # Start
-            res += bytes([node.type_id]) # Type
-            
-            
-            current_attribs = node.attribs
-            p = 0
-            final_attribs = b""
-            
-            updated_types = set()
-            
-            while p < len(current_attribs):
-                atype = current_attribs[p]
-                p += 1
-                asize = struct.unpack("<H", current_attribs[p:p+2])[0]
-                p += 2
-                adata = current_attribs[p:p+asize]
-                p += asize
-                
-                # Substituição
-                if atype == 0x11: # Client ID (Update)
-                    final_attribs += bytes([atype]) + struct.pack("<H", 2) + struct.pack("<H", node.client_id)
-                    updated_types.add(atype)
-                elif atype == 0x14: # Speed
-                    final_attribs += bytes([atype]) + struct.pack("<H", 2) + struct.pack("<H", node.speed)
-                    updated_types.add(atype)
-                elif atype == 0x25: # Light
-                    final_attribs += bytes([atype]) + struct.pack("<H", 4) + struct.pack("<H", node.light_level) + struct.pack("<H", node.light_color)
-                    updated_types.add(atype)
-                else:
-                    # Mantém original
-                    final_attribs += bytes([atype]) + struct.pack("<H", asize) + adata
-           
-            
-            res += final_attribs
-            
-            # Escreve Filhos
-            for child in node.children:
-                res += write_node(child)
-                
-            res += b"\xFF" # End
-            return res
-
-        for root in self.root_children:
-            output += write_node(root)
+        """Retorna lista plana de todos os itens (montada no load)."""
+        return self.items
+
+    def get_item(self, server_id):
+        return self.items_by_server_id.get(server_id)
+
+    def get_items_by_client_id(self, client_id):
+        return self.items_by_client_id.get(client_id, [])
+
+    def save(self, path, progress=None):
+        """
+        Grava o OTB num único bytearray (tempo linear).
+
+        Tipo, flags e atributos de cada nó são montados sem escape e depois
+        escapados de uma vez (0xFD antes de cada 0xFD/0xFE/0xFF). Sem
+        alterações o arquivo sai idêntico ao lido.
+
+        ``progress(feitos, total)`` é chamado a cada PROGRESS_STEP nós; o
+        arquivo só é aberto no fim, então uma exceção levantada pelo callback
+        cancela o save sem deixar arquivo pela metade.
+        """
+        output = bytearray(self.version_data)
+        total = len(self.items) + 1
+        done = 0
+
+        # None marca o fim (0xFF) do nó aberto antes dele na pilha
+        stack = list(reversed(self.root_children))
+        while stack:
+            node = stack.pop()
+            if node is None:
+                output.append(NODE_END)
+                continue
+
+            done += 1
+            if progress and done % PROGRESS_STEP == 0:
+                progress(min(done, total), total)
+
+            output.append(NODE_START)
+            output += _escape(self._build_node_props(node))
+
+            stack.append(None)
+            stack.extend(reversed(node.children))
 
         with open(path, "wb") as f:
             f.write(output)
 
+        if progress:
+            progress(total, total)
+
+    def _build_node_props(self, node):
+        """Tipo + flags + atributos do nó, com os campos do OtbItem aplicados."""
+        props = bytearray((node.type_id,))
+        props += struct.pack("<I", node.flags & 0xFFFFFFFF)
+
+        has_speed = has_light = False
+        for atype, adata in node.iter_attributes():
+            asize = len(adata)
+
+            # Substituição pelos valores atuais do item
+            if atype == ATTR_SERVERID and asize == 2:
+                adata = struct.pack("<H", node.server_id)
+            elif atype == ATTR_CLIENTID and asize == 2:
+                adata = struct.pack("<H", node.client_id)
+            elif atype == ATTR_SPEED and asize == 2:
+                adata = struct.pack("<H", node.speed)
+                has_speed = True
+            elif atype in (ATTR_LIGHT, ATTR_LIGHT2) and asize == 4:
+                adata = struct.pack("<HH", node.light_level, node.light_color)
+                has_light = True
+
+            props.append(atype)
+            props += struct.pack("<H", len(adata))
+            props += adata
+
+        # Valores novos (ex.: vindos do reload do DAT) em itens sem o atributo
+        if node.speed and not has_speed:
+            props += struct.pack("<BHH", ATTR_SPEED, 2, node.speed)
+        if (node.light_level or node.light_color) and not has_light:
+            props += struct.pack("<BHHH", ATTR_LIGHT2, 4, node.light_level, node.light_color)
+
+        return props
@@ -1,40 +1,166 @@
 import os
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QPushButton, 
-                             QTextEdit, QFileDialog, QMessageBox, QFrame)
-from PyQt6.QtCore import Qt
+import time
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, 
+                             QTextEdit, QFileDialog, QMessageBox, QFrame, QProgressBar)
+from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from PyQt6.QtGui import QFont, QColor
 
 # Assumindo que você tem o otbparser na pasta ou no path
 from otbParser import OtbFile
 
-# --- FLAGS (Mantidas iguais) ---
-OTB_FLAG_BLOCK_SOLID        = 1 << 0
-OTB_FLAG_BLOCK_PROJECTILE   = 1 << 1
-OTB_FLAG_BLOCK_PATHFIND     = 1 << 2
-OTB_FLAG_HAS_HEIGHT         = 1 << 3
-OTB_FLAG_USEABLE            = 1 << 4
-OTB_FLAG_PICKUPABLE         = 1 << 5
-OTB_FLAG_MOVEABLE           = 1 << 6
-OTB_FLAG_STACKABLE          = 1 << 7
-OTB_FLAG_FLOORCHANGEDOWN    = 1 << 8
-OTB_FLAG_FLOORCHANGENORTH   = 1 << 9
-OTB_FLAG_FLOORCHANGEEAST    = 1 << 10
-OTB_FLAG_FLOORCHANGESOUTH   = 1 << 11
-OTB_FLAG_FLOORCHANGEWEST    = 1 << 12
-OTB_FLAG_ALWAYSONTOP        = 1 << 13
-OTB_FLAG_READABLE           = 1 << 14
-OTB_FLAG_ROTATABLE          = 1 << 15
-OTB_FLAG_HANGABLE           = 1 << 16
-OTB_FLAG_VERTICAL           = 1 << 17
-OTB_FLAG_HORIZONTAL         = 1 << 18
-OTB_FLAG_CANNOTDECAY        = 1 << 19
-OTB_FLAG_ALLOWDISTREAD      = 1 << 20
-OTB_FLAG_CORPSE             = 1 << 21
-OTB_FLAG_CLIENTCHARGES      = 1 << 22
-OTB_FLAG_LOOKTHROUGH        = 1 << 23
-OTB_FLAG_ANIMATION          = 1 << 24
-OTB_FLAG_FULLGROUND         = 1 << 25
-OTB_FLAG_FORCEUSE           = 1 << 26
+# otbFlags / otbChecker / spriteHash (numpy, datspr) são importados nos
+# workers e handlers que os usam, fora do caminho de inicialização.
+
+# Quantas alterações listar no log depois do reload
+MAX_LOGGED_CHANGES = 200
+
+
+class ReloadCancelled(Exception):
+    pass
+
+
+class OtbReloadWorker(QThread):
+    """
+    Reload DAT -> OTB + save fora da thread da GUI.
+
+    Progresso: tabela do DAT 0-60%, cálculo/aplicação 60-70%, save 70-100%.
+    Cancelar (requestInterruption) desfaz as alterações já aplicadas nos
+    itens; o save só grava o arquivo no fim, então nada fica pela metade.
+    """
+
+    progress = pyqtSignal(int)
+    log = pyqtSignal(str)
+    finished_reload = pyqtSignal(object)
+
+    def __init__(self, otb, dat_editor, output_path, parent=None):
+        super().__init__(parent)
+        self.otb = otb
+        self.dat = dat_editor
+        self.output_path = output_path
+
+    def _step(self, start, span):
+        """Callback de progresso que também checa o cancelamento."""
+        def callback(done, total):
+            if self.isInterruptionRequested():
+                raise ReloadCancelled()
+            self.progress.emit(start + int(span * done / max(total, 1)))
+        return callback
+
+    def run(self):
+        from otbFlags import DatItemTable, apply_changes, compute_reload, revert_changes
+
+        report = {
+            "path": self.output_path,
+            "changes": [],
+            "summary": None,
+            "cancelled": False,
+            "error": None,
+            "elapsed": 0.0,
+        }
+        started = time.perf_counter()
+        changes = []
+        applied = False
+
+        try:
+            self.log.emit("Reading DAT flags...")
+            dat_table = DatItemTable(self.dat, progress=self._step(0, 60))
+
+            self.log.emit("Comparing with the OTB...")
+            changes, summary = compute_reload(self.otb.items, dat_table)
+            report["changes"] = changes
+            report["summary"] = summary
+            self._step(60, 10)(1, 2)
+
+            apply_changes(changes)
+            applied = True
+            self._step(60, 10)(2, 2)
+
+            self.log.emit(f"Saving {os.path.basename(self.output_path)}...")
+            self.otb.save(self.output_path, progress=self._step(70, 30))
+
+        except ReloadCancelled:
+            report["cancelled"] = True
+        except Exception as e:
+            report["error"] = str(e)
+
+        if applied and (report["cancelled"] or report["error"]):
+            revert_changes(changes)
+
+        report["elapsed"] = time.perf_counter() - started
+        self.finished_reload.emit(report)
+
+class SpriteHashWorker(QThread):
+    """
+    Sprite hash dos itens (ver spriteHash) fora da thread da GUI.
+
+    mode "HASH": calcula o hash de cada item no client carregado e grava no OTB.
+    mode "MATCH": calcula os hashes do client carregado e remapeia o client id
+    dos itens do OTB pelo hash gravado neles (client reordenado/compactado).
+    Nos dois casos o OTB é salvo em ``output_path`` no fim.
+    """
+
+    progress = pyqtSignal(int)
+    log = pyqtSignal(str)
+    finished_hash = pyqtSignal(object)
+
+    def __init__(self, otb, dat_editor, spr_editor, output_path, mode="HASH", parent=None):
+        super().__init__(parent)
+        self.otb = otb
+        self.dat = dat_editor
+        self.spr = spr_editor
+        self.output_path = output_path
+        self.mode = mode
+
+    def run(self):
+        from spriteHash import (compute_item_hashes, match_client_ids, restore_items,
+                                snapshot_items, write_sprite_hashes)
+
+        report = {
+            "mode": self.mode,
+            "path": self.output_path,
+            "hashed": 0,
+            "written": 0,
+            "match": None,
+            "cancelled": False,
+            "error": None,
+            "elapsed": 0.0,
+        }
+        started = time.perf_counter()
+        snapshot = None
+
+        try:
+            self.log.emit("Hashing item sprites...")
+            hashes = compute_item_hashes(
+                self.dat,
+                self.spr,
+                progress=lambda done, total: self.progress.emit(int(80 * done / max(total, 1))),
+                cancelled=self.isInterruptionRequested,
+            )
+            if hashes is None:
+                report["cancelled"] = True
+            else:
+                report["hashed"] = len(hashes)
+                snapshot = snapshot_items(self.otb)
+                if self.mode == "MATCH":
+                    report["match"] = match_client_ids(self.otb, hashes)
+                else:
+                    report["written"] = write_sprite_hashes(self.otb, hashes)
+
+                self.log.emit(f"Saving {os.path.basename(self.output_path)}...")
+                self.progress.emit(80)
+                self.otb.save(
+                    self.output_path,
+                    progress=lambda done, total: self.progress.emit(80 + int(20 * done / max(total, 1))),
+                )
+        except Exception as e:
+            report["error"] = str(e)
+            # Erro (ex: no save): o OTB em memória volta a ser o de antes
+            if snapshot is not None:
+                restore_items(self.otb, snapshot)
+
+        report["elapsed"] = time.perf_counter() - started
+        self.finished_hash.emit(report)
+
 
 class OtbReloadTab(QWidget):
     def __init__(self, parent_ignored=None):
@@ -42,6 +168,7 @@ class OtbReloadTab(QWidget):
 
         self.otb = None
         self.otb_path = None
+        self.worker = None
         
         self.init_ui()
 
@@ -87,6 +214,40 @@ class OtbReloadTab(QWidget):
         self.btn_apply.clicked.connect(self.apply_reload)
         layout.addWidget(self.btn_apply)
 
+        # Button Check
+        self.btn_check = QPushButton("Check OTB <-> DAT consistency")
+        self.btn_check.setEnabled(False)
+        self.btn_check.clicked.connect(self.check_consistency)
+        layout.addWidget(self.btn_check)
+
+        # Sprite hash
+        hash_row = QHBoxLayout()
+        self.btn_hash = QPushButton("Write sprite hashes")
+        self.btn_hash.setToolTip("Compute each item's sprite hash from the loaded DAT/SPR and store it in the OTB.")
+        self.btn_hash.setEnabled(False)
+        self.btn_hash.clicked.connect(lambda: self.start_sprite_hash("HASH"))
+        hash_row.addWidget(self.btn_hash)
+
+        self.btn_match = QPushButton("Auto-match client ids")
+        self.btn_match.setToolTip("Find the new client id of every OTB item by its stored sprite hash\n"
+                                  "(after the SPR/DAT was reordered or compacted).")
+        self.btn_match.setEnabled(False)
+        self.btn_match.clicked.connect(lambda: self.start_sprite_hash("MATCH"))
+        hash_row.addWidget(self.btn_match)
+        layout.addLayout(hash_row)
+
+        # Progress + Cancel
+        progress_row = QHBoxLayout()
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setStyleSheet("QProgressBar { text-align: center; }")
+        progress_row.addWidget(self.progress_bar)
+
+        self.btn_cancel = QPushButton("Cancel")
+        self.btn_cancel.setEnabled(False)
+        self.btn_cancel.clicked.connect(self.cancel_reload)
+        progress_row.addWidget(self.btn_cancel)
+        layout.addLayout(progress_row)
+
         # Log Box
         self.log_box = QTextEdit()
         self.log_box.setReadOnly(True)
@@ -112,9 +273,12 @@ class OtbReloadTab(QWidget):
             self.path_label.setText(os.path.basename(path))
             self.path_label.setStyleSheet("color: #4FC3F7; font-weight: bold;")
             self.btn_apply.setEnabled(True)
+            self.btn_check.setEnabled(True)
+            self.btn_hash.setEnabled(True)
+            self.btn_match.setEnabled(True)
             
             self.log(f"OTB loaded: {path}")
-            self.log(f"Total items read: {len(self.otb.get_all_items())}")
+            self.log(f"Total items read: {len(self.otb.items)}")
             
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to read OTB: {str(e)}")
@@ -122,6 +286,34 @@ class OtbReloadTab(QWidget):
     def log(self, text):
         self.log_box.append(text)
 
+    def log_reload_summary(self, changes, summary):
+        from otbFlags import describe_flags
+
+        self.log(f"Items processed: {summary['processed']}")
+        self.log(f"Items changed: {summary['changed']} "
+                 f"(flags: {summary['flags']}, speed: {summary['speed']}, light: {summary['light']})")
+        if summary["missing"]:
+            self.log(f"Client ids not found in the DAT: {summary['missing']}")
+
+        for change in changes[:MAX_LOGGED_CHANGES]:
+            parts = []
+            if change["flags"]:
+                old_flags, new_flags = change["flags"]
+                added = describe_flags(new_flags & ~old_flags)
+                removed = describe_flags(old_flags & ~new_flags)
+                if added:
+                    parts.append("+" + " +".join(added))
+                if removed:
+                    parts.append("-" + " -".join(removed))
+            if change["speed"]:
+                parts.append("speed {} -> {}".format(*change["speed"]))
+            if change["light"]:
+                parts.append("light {} -> {}".format(*change["light"]))
+            self.log(f"  {change['server_id']} (client {change['client_id']}): {', '.join(parts)}")
+
+        if len(changes) > MAX_LOGGED_CHANGES:
+            self.log(f"  ... {len(changes) - MAX_LOGGED_CHANGES} more")
+
     def get_dat_editor(self):
         # Acessa a janela principal (App)
         main_window = self.window()
@@ -134,6 +326,17 @@ class OtbReloadTab(QWidget):
         
         return None
 
+    def get_spr_editor(self):
+        main_window = self.window()
+        if hasattr(main_window, 'datspr_module'):
+            return getattr(main_window.datspr_module, 'spr', None)
+        return None
+
+    def updated_otb_path(self):
+        base_dir = os.path.dirname(self.otb_path)
+        filename = os.path.basename(self.otb_path)
+        return os.path.join(base_dir, filename.replace(".otb", "_updated.otb"))
+
     def apply_reload(self):
         dat_editor = self.get_dat_editor()
         
@@ -145,98 +348,132 @@ class OtbReloadTab(QWidget):
         if not self.otb:
             return
 
-        updated_count = 0
-        items_list = self.otb.get_all_items()
-        
+        new_path = self.updated_otb_path()
+
         self.log("Starting update...")
-        # Força atualização visual da UI antes do loop pesado
-        QApplication.processEvents()
+        self.progress_bar.setValue(0)
+        self.set_running(True)
 
-        try:
-            for item in items_list:
-                cid = item.client_id
-                
-                # Ignora ID 0 ou inválidos
-                if cid == 0: continue
-                    
-                # dat_editor.things é um dict {category: {id: object}}
-                # 'items' é a categoria de itens
-                if 'items' not in dat_editor.things: continue
-                
-                dat_thing = dat_editor.things['items'].get(cid)
-                if not dat_thing: continue
-                    
-                props = dat_thing.get('props', {})
-                
-                new_flags = 0
-                
-                # Mapeamento de Flags
-                if 'Unpassable' in props:      new_flags |= OTB_FLAG_BLOCK_SOLID
-                if 'BlockMissile' in props:    new_flags |= OTB_FLAG_BLOCK_PROJECTILE
-                if 'BlockPathfind' in props:   new_flags |= OTB_FLAG_BLOCK_PATHFIND
-                if 'HasElevation' in props:    new_flags |= OTB_FLAG_HAS_HEIGHT
-                if 'Usable' in props:          new_flags |= OTB_FLAG_USEABLE
-                if 'Pickupable' in props:      new_flags |= OTB_FLAG_PICKUPABLE
-                if 'Stackable' in props:       new_flags |= OTB_FLAG_STACKABLE
-                if 'OnTop' in props:           new_flags |= OTB_FLAG_ALWAYSONTOP
-                if 'Rotatable' in props:       new_flags |= OTB_FLAG_ROTATABLE
-                if 'Hangable' in props:        new_flags |= OTB_FLAG_HANGABLE
-                if 'HookVertical' in props:    new_flags |= OTB_FLAG_VERTICAL
-                if 'HookHorizontal' in props:  new_flags |= OTB_FLAG_HORIZONTAL
-                if 'AnimateAlways' in props:   new_flags |= OTB_FLAG_ANIMATION
-                if 'FullGround' in props:      new_flags |= OTB_FLAG_FULLGROUND
-                if 'ForceUse' in props:        new_flags |= OTB_FLAG_FORCEUSE
-                
-                # Exemplo de flag que não existe diretamente no DAT, mas é inferida
-                if 'ShowOnMinimap' in props:   new_flags |= OTB_FLAG_LOOKTHROUGH # Ajuste conforme sua lógica
-
-                # Lógica Inversa
-                if 'Unmoveable' not in props:
-                    new_flags |= OTB_FLAG_MOVEABLE
-                    
-                if 'Writable' in props or 'WritableOnce' in props:
-                    new_flags |= OTB_FLAG_READABLE
-
-                # Atualiza flags
-                if item.flags != new_flags:
-                    item.flags = new_flags
-
-                # Attributes (Speed)
-                if 'Ground' in props and 'Ground_data' in props:
-                    try:
-                        speed_val = int(props['Ground_data'][0])
-                        item.speed = speed_val
-                    except: pass
-                else:
-                    item.speed = 0
-
-                # Attributes (Light)
-                if 'HasLight' in props and 'HasLight_data' in props:
-                    try:
-                        l_level, l_color = props['HasLight_data']
-                        item.light_level = int(l_level)
-                        item.light_color = int(l_color)
-                    except: pass
-                else:
-                    item.light_level = 0
-                    item.light_color = 0
+        self.worker = OtbReloadWorker(self.otb, dat_editor, new_path, self)
+        self.worker.progress.connect(self.progress_bar.setValue)
+        self.worker.log.connect(self.log)
+        self.worker.finished_reload.connect(self.on_reload_finished)
+        self.worker.start()
 
-                updated_count += 1
+    def cancel_reload(self):
+        if self.worker and self.worker.isRunning():
+            self.worker.requestInterruption()
+            self.btn_cancel.setEnabled(False)
+            self.log("Cancelling...")
 
-            # Save
-            base_dir = os.path.dirname(self.otb_path)
-            filename = os.path.basename(self.otb_path)
-            new_path = os.path.join(base_dir, filename.replace(".otb", "_updated.otb"))
-            
-            self.otb.save(new_path)
-            
-            self.log("--------------------------------")
-            self.log(f"SUCCESS! File saved at:\n{new_path}")
-            self.log(f"Items processed: {updated_count}")
-            
-            QMessageBox.information(self, "Completed", f"OTB Updated!\nSaved as: {os.path.basename(new_path)}")
+    def set_running(self, running):
+        self.btn_search.setEnabled(not running)
+        self.btn_apply.setEnabled(not running and self.otb is not None)
+        self.btn_check.setEnabled(not running and self.otb is not None)
+        self.btn_hash.setEnabled(not running and self.otb is not None)
+        self.btn_match.setEnabled(not running and self.otb is not None)
+        self.btn_cancel.setEnabled(running)
 
-        except Exception as e:
-            self.log(f"Error during update: {str(e)}")
-            QMessageBox.critical(self, "Save Error", str(e))
+    def on_reload_finished(self, report):
+        self.worker = None
+        self.set_running(False)
+
+        if report["cancelled"]:
+            self.progress_bar.setValue(0)
+            self.log("Update cancelled. The OTB was not changed.")
+            return
+
+        if report["error"]:
+            self.log(f"Error during update: {report['error']}")
+            QMessageBox.critical(self, "Save Error", report["error"])
+            return
+
+        new_path = report["path"]
+        self.log("--------------------------------")
+        self.log(f"SUCCESS! File saved at:\n{new_path}")
+        self.log_reload_summary(report["changes"], report["summary"])
+        self.log(f"Done in {report['elapsed']:.2f} s")
+
+        QMessageBox.information(self, "Completed", f"OTB Updated!\nSaved as: {os.path.basename(new_path)}")
+
+    def check_consistency(self):
+        dat_editor = self.get_dat_editor()
+        if not dat_editor:
+            QMessageBox.warning(self, "Warning", 
+                "The Tibia.dat file is not loaded in the ‘Spr/Dat Editor’ tab.\nPlease load the .dat first.")
+            return
+        if not self.otb:
+            return
+
+        from otbChecker import check_consistency, format_summary, save_report_json
+
+        report = check_consistency(self.otb, dat_editor)
+        report["otb"] = self.otb_path
+        report["dat"] = getattr(dat_editor, "dat_path", "")
+
+        self.log("--------------------------------")
+        self.log("Consistency check:")
+        for line in format_summary(report).splitlines():
+            self.log("  " + line)
+
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Save consistency report", "otb_dat_report.json", "JSON Files (*.json)"
+        )
+        if path:
+            try:
+                save_report_json(report, path)
+                self.log(f"Report saved at: {path}")
+            except OSError as e:
+                QMessageBox.critical(self, "Error", f"Failed to save report: {str(e)}")
+
+    def start_sprite_hash(self, mode):
+        dat_editor = self.get_dat_editor()
+        spr_editor = self.get_spr_editor()
+        if not dat_editor or not spr_editor:
+            QMessageBox.warning(self, "Warning", 
+                "Tibia.dat and Tibia.spr must be loaded in the ‘Spr/Dat Editor’ tab.")
+            return
+        if not self.otb:
+            return
+
+        self.log("--------------------------------")
+        self.log("Writing sprite hashes..." if mode == "HASH" else "Matching client ids by sprite hash...")
+        self.progress_bar.setValue(0)
+        self.set_running(True)
+
+        self.worker = SpriteHashWorker(
+            self.otb, dat_editor, spr_editor, self.updated_otb_path(), mode, self
+        )
+        self.worker.progress.connect(self.progress_bar.setValue)
+        self.worker.log.connect(self.log)
+        self.worker.finished_hash.connect(self.on_sprite_hash_finished)
+        self.worker.start()
+
+    def on_sprite_hash_finished(self, report):
+        self.worker = None
+        self.set_running(False)
+
+        if report["cancelled"]:
+            self.progress_bar.setValue(0)
+            self.log("Cancelled. The OTB was not changed.")
+            return
+        if report["error"]:
+            self.log(f"Error: {report['error']}")
+            QMessageBox.critical(self, "Error", report["error"])
+            return
+
+        self.log(f"Items hashed: {report['hashed']}")
+        if report["mode"] == "HASH":
+            self.log(f"Sprite hashes updated: {report['written']}")
+        else:
+            match = report["match"]
+            self.log(f"Unchanged: {match['unchanged']}  Remapped: {len(match['remapped'])}  "
+                     f"Ambiguous: {len(match['ambiguous'])}  Not found: {len(match['unmatched'])}  "
+                     f"Without hash: {match['no_hash']}")
+            for server_id, old_cid, new_cid in match["remapped"][:MAX_LOGGED_CHANGES]:
+                self.log(f"  {server_id}: client {old_cid} -> {new_cid}")
+            for server_id, old_cid, candidates in match["ambiguous"][:MAX_LOGGED_CHANGES]:
+                self.log(f"  {server_id}: client {old_cid} ambiguous {candidates[:8]}")
 
+        self.log(f"SUCCESS! File saved at:\n{report['path']}")
+        self.log(f"Done in {report['elapsed']:.2f} s")
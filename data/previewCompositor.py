@@ -0,0 +1,86 @@
+from collections import OrderedDict
+
+import profiler
+
+
+class PreviewCompositor:
+    """Cache of rendered preview pixmaps.
+
+    Entries are keyed by whatever identifies a view of a thing (category, id,
+    frame group, frame, direction, addon/mount/mask toggles). An entry stays
+    valid while the thing's texture_bytes and the raw SPR data of every sprite
+    it was built from are unchanged, so edits done anywhere (drops, imports,
+    the optimizer writing sprites_data directly) are picked up without explicit
+    invalidation calls.
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, key, texture_bytes, spr, build):
+        """Returns the cached pixmap for ``key`` or calls ``build()``, which
+        must return ``(pixmap, sprite_ids_used)`` or ``(pixmap,
+        sprite_ids_used, slots_drawn)``; slots are positions in the frame
+        group's sprite id list and let ``patch_thing`` keep unaffected views."""
+        entry = self._entries.get(key)
+        if entry is not None and self._is_valid(entry, texture_bytes, spr):
+            self._entries.move_to_end(key)
+            profiler.count("preview_cache.hit")
+            return entry[2]
+
+        profiler.count("preview_cache.miss")
+        pixmap, sprite_ids, *rest = build()
+        slots = frozenset(rest[0]) if rest else None
+        data = spr.sprites_data
+        refs = tuple((sid, data.get(sid)) for sid in set(sprite_ids))
+        self._entries[key] = (texture_bytes, refs, pixmap, slots)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return pixmap
+
+    @staticmethod
+    def _is_valid(entry, texture_bytes, spr):
+        cached_texture, refs, _pixmap, _slots = entry
+        if cached_texture is not texture_bytes and cached_texture != texture_bytes:
+            return False
+        data = spr.sprites_data
+        for sid, raw in refs:
+            if data.get(sid) is not raw:
+                return False
+        return True
+
+    def invalidate_thing(self, category, thing_id):
+        for key in [k for k in self._entries if k[0] == category and k[1] == thing_id]:
+            del self._entries[key]
+
+    def patch_thing(self, category, thing_id, slot, texture_bytes, group_index=None):
+        """After one sprite id of a thing's texture was replaced in place
+        (DatEditor.set_sprite_at): drops only the views that drew ``slot``
+        and moves the others over to the new ``texture_bytes``. Keys are
+        (category, thing_id, frame group, ...); with ``group_index`` views of
+        other frame groups are kept as well."""
+        for key, (_texture, refs, pixmap, slots) in list(self._entries.items()):
+            if key[0] != category or key[1] != thing_id:
+                continue
+            other_group = group_index is not None and key[2] != group_index
+            if other_group or (slots is not None and slot not in slots):
+                self._entries[key] = (texture_bytes, refs, pixmap, slots)
+            else:
+                del self._entries[key]
+
+    def invalidate_sprite(self, sprite_id):
+        stale = [
+            key
+            for key, (_texture, refs, _pixmap, _slots) in self._entries.items()
+            if any(sid == sprite_id for sid, _raw in refs)
+        ]
+        for key in stale:
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,201 @@
+"""Lightweight timers and counters for the editor hot paths.
+
+Disabled by default. Start ItemManager with ``--profile`` or set
+``ITEMMANAGER_PROFILE=1`` before launching; the state is read once at import,
+so with profiling off ``@profiled`` returns the function untouched and
+``timed()`` returns a shared no-op context manager.
+
+    @profiled("SprEditor.load")
+    def load(self): ...
+
+    with timed("preview.compose"):
+        ...
+
+    count("sprite_cache.hit")
+"""
+import atexit
+import functools
+import os
+import time
+from collections import deque
+
+ENABLED = os.environ.get("ITEMMANAGER_PROFILE", "") not in ("", "0")
+
+# Only the most recent samples are kept for the percentile estimate; count and
+# total stay exact.
+MAX_SAMPLES = 10000
+
+
+class _Timer:
+    __slots__ = ("count", "total", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=MAX_SAMPLES)
+
+    def add(self, elapsed):
+        self.count += 1
+        self.total += elapsed
+        self.samples.append(elapsed)
+
+    def percentile(self, pct):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        idx = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return ordered[idx]
+
+
+_timers = {}
+_counters = {}
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timed:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def record(name, elapsed):
+    """Adds one sample of ``elapsed`` seconds to the timer ``name``."""
+    timer = _timers.get(name)
+    if timer is None:
+        timer = _timers[name] = _Timer()
+    timer.add(elapsed)
+
+
+def timed(name):
+    if not ENABLED:
+        return _NULL_TIMER
+    return _Timed(name)
+
+
+def profiled(name):
+    """Decorator form of timed(); a no-op when profiling is disabled."""
+
+    def decorator(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+def count(name, amount=1):
+    """Increments a counter. Pairs named ``<x>.hit``/``<x>.miss`` are
+    reported together as a cache hit rate."""
+    if not ENABLED:
+        return
+    _counters[name] = _counters.get(name, 0) + amount
+
+
+def reset():
+    _timers.clear()
+    _counters.clear()
+
+
+def snapshot():
+    """Returns the collected stats as plain dicts (milliseconds)."""
+    timers = {}
+    for name, timer in _timers.items():
+        timers[name] = {
+            "count": timer.count,
+            "total_ms": timer.total * 1000.0,
+            "mean_ms": timer.total * 1000.0 / timer.count if timer.count else 0.0,
+            "p95_ms": timer.percentile(95) * 1000.0,
+        }
+
+    caches = {}
+    for name in _counters:
+        if not name.endswith((".hit", ".miss")):
+            continue
+        base = name.rsplit(".", 1)[0]
+        hits = _counters.get(base + ".hit", 0)
+        misses = _counters.get(base + ".miss", 0)
+        total = hits + misses
+        caches[base] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+        }
+
+    return {"timers": timers, "counters": dict(_counters), "caches": caches}
+
+
+def report():
+    """Formats snapshot() as a fixed-width text table."""
+    snap = snapshot()
+    lines = [
+        f"{'operation':<36} {'count':>8} {'total ms':>11} {'mean ms':>9} {'p95 ms':>9}"
+    ]
+    for name, row in sorted(
+        snap["timers"].items(), key=lambda kv: kv[1]["total_ms"], reverse=True
+    ):
+        lines.append(
+            f"{name:<36} {row['count']:>8} {row['total_ms']:>11.2f} "
+            f"{row['mean_ms']:>9.3f} {row['p95_ms']:>9.3f}"
+        )
+
+    if snap["caches"]:
+        lines.append("")
+        lines.append(f"{'cache':<36} {'hits':>8} {'misses':>11} {'hit rate':>9}")
+        for name, row in sorted(snap["caches"].items()):
+            lines.append(
+                f"{name:<36} {row['hits']:>8} {row['misses']:>11} "
+                f"{row['hit_rate'] * 100:>8.1f}%"
+            )
+
+    plain = {
+        name: value
+        for name, value in snap["counters"].items()
+        if not name.endswith((".hit", ".miss"))
+    }
+    if plain:
+        lines.append("")
+        for name, value in sorted(plain.items()):
+            lines.append(f"{name:<36} {value:>8}")
+
+    return "\n".join(lines)
+
+
+def _dump_at_exit():
+    if _timers or _counters:
+        print("---------- ItemManager profile ----------")
+        print(report())
+
+
+if ENABLED:
+    atexit.register(_dump_at_exit)
@@ -0,0 +1,389 @@
+"""Busca por nome/atributo em itens, monstros e spells.
+
+Índice invertido em memória (token -> {documento: peso}) com busca por
+prefixo: cada palavra da consulta precisa casar com o começo de algum token
+do documento. Os documentos vêm de fontes (o items.xml, cada arquivo de
+monstro, o spells.xml); ``replace_source`` troca os documentos de uma fonte,
+que é como os editores de monstro/spell atualizam o índice ao salvar.
+
+A montagem completa (741 monstros + items.xml) roda no SearchIndexWorker.
+"""
+import bisect
+import glob
+import heapq
+import os
+import re
+import xml.etree.ElementTree as ET
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSETS_XML_DIR = os.path.normpath(os.path.join(BASE_DIR, "..", "assets", "xml"))
+MONSTERS_DIR = os.path.join(ASSETS_XML_DIR, "monsters")
+SPELLS_XML = os.path.join(ASSETS_XML_DIR, "spells", "spells.xml")
+
+ITEMS_SOURCE = "items"
+
+# Prefixos até esse tamanho casam com milhares de documentos: o resultado
+# por prefixo fica em cache (invalidado só para os prefixos afetados)
+SHORT_PREFIX = 2
+
+# Peso de cada campo no ranking
+WEIGHT_NAME = 4
+WEIGHT_ALIAS = 2
+WEIGHT_ATTRIBUTE = 1
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text.casefold()) if text else []
+
+
+class SearchIndex:
+    """
+    Documentos identificados por (kind, id): ("item", client id),
+    ("monster", caminho do xml), ("spell", nome). Cada documento guarda
+    title/detail para exibição e os campos ("payload") que a interface usa
+    para abrir o resultado.
+    """
+
+    def __init__(self):
+        self.docs = {}        # (kind, id) -> dict do documento
+        self.postings = {}    # token -> {(kind, id): peso}
+        self.sources = {}     # fonte -> {(kind, id)}
+        self._doc_tokens = {}  # (kind, id) -> [tokens]
+        self._folded_titles = {}  # (kind, id) -> título normalizado (ranking)
+        self._tokens = []     # tokens ordenados (busca por prefixo)
+        self._tokens_dirty = False
+        self._prefix_cache = {}  # prefixo curto -> {(kind, id): peso}
+        self._ranked_cache = {}  # consulta de um prefixo curto -> ranking completo
+
+    def __len__(self):
+        return len(self.docs)
+
+    def add(self, source, kind, doc_id, title, fields, detail="", payload=None):
+        """
+        ``fields`` é uma lista de (texto, peso). Um token que aparece em
+        vários campos fica com o maior peso.
+        """
+        key = (kind, doc_id)
+        if key in self.docs:
+            self.remove(key)
+
+        weights = {}
+        for text, weight in fields:
+            for token in tokenize(text):
+                if weights.get(token, 0) < weight:
+                    weights[token] = weight
+
+        postings = self.postings
+        for token, weight in weights.items():
+            bucket = postings.get(token)
+            if bucket is None:
+                postings[token] = bucket = {}
+                self._tokens_dirty = True
+            bucket[key] = weight
+        self._invalidate_prefixes(weights)
+
+        self.docs[key] = {
+            "kind": kind,
+            "id": doc_id,
+            "title": title,
+            "detail": detail,
+            "payload": payload or {},
+            "source": source,
+        }
+        self._folded_titles[key] = " ".join(tokenize(title))
+        self._doc_tokens[key] = list(weights)
+        self.sources.setdefault(source, set()).add(key)
+
+    def remove(self, key):
+        doc = self.docs.pop(key, None)
+        if doc is None:
+            return
+        self._folded_titles.pop(key, None)
+        tokens = self._doc_tokens.pop(key, ())
+        self._invalidate_prefixes(tokens)
+        for token in tokens:
+            bucket = self.postings.get(token)
+            if bucket is None:
+                continue
+            bucket.pop(key, None)
+            if not bucket:
+                del self.postings[token]
+                self._tokens_dirty = True
+        keys = self.sources.get(doc["source"])
+        if keys is not None:
+            keys.discard(key)
+
+    def replace_source(self, source, documents):
+        """Troca todos os documentos de ``source`` por ``documents`` (kwargs de add)."""
+        for key in list(self.sources.pop(source, ())):
+            self.remove(key)
+        for doc in documents:
+            self.add(source, **doc)
+
+    def _invalidate_prefixes(self, tokens):
+        cache = self._prefix_cache
+        ranked = self._ranked_cache
+        if not cache and not ranked:
+            return
+        for token in tokens:
+            for size in range(1, SHORT_PREFIX + 1):
+                cache.pop(token[:size], None)
+                ranked.pop(token[:size], None)
+
+    def _prefix_tokens(self, prefix):
+        if self._tokens_dirty:
+            self._tokens = sorted(self.postings)
+            self._tokens_dirty = False
+        tokens = self._tokens
+        start = bisect.bisect_left(tokens, prefix)
+        end = bisect.bisect_left(tokens, prefix + "\U0010FFFF", start)
+        return tokens[start:end]
+
+    def _term_scores(self, term, restrict=None):
+        """{documento: peso} dos tokens que começam com ``term`` (igual vale o dobro)."""
+        term_scores = {}
+        postings = self.postings
+        for token in self._prefix_tokens(term):
+            exact = token == term
+            for key, weight in postings[token].items():
+                if restrict is not None and key not in restrict:
+                    continue
+                value = weight * 2 if exact else weight
+                if term_scores.get(key, 0) < value:
+                    term_scores[key] = value
+        return term_scores
+
+    def warm(self):
+        """Preenche o cache das consultas de uma letra (roda junto com a montagem)."""
+        for token in self._prefix_tokens(""):
+            first = token[:1]
+            if first not in self._ranked_cache:
+                self.search(first, limit=1)
+
+    def search(self, query, limit=50, kinds=None):
+        """
+        Documentos que casam com todas as palavras de ``query`` (prefixo),
+        do mais relevante para o menos. Token igual à palavra vale o dobro
+        do que só começa com ela; título que começa com a consulta ganha
+        bônus; empate vai para o título mais curto.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        cacheable = len(terms) == 1 and len(terms[0]) <= SHORT_PREFIX and not kinds
+        if cacheable and terms[0] in self._ranked_cache:
+            ranked = self._ranked_cache[terms[0]]
+            return self._results(ranked[:limit] if limit else ranked)
+
+        # Palavras mais longas primeiro: costumam ter menos documentos
+        terms = sorted(set(terms), key=len, reverse=True)
+        scores = None
+        for term in terms:
+            if len(term) <= SHORT_PREFIX:
+                term_scores = self._prefix_cache.get(term)
+                if term_scores is None:
+                    term_scores = self._prefix_cache[term] = self._term_scores(term)
+                if scores is not None:
+                    scores = {key: scores[key] + value
+                              for key, value in term_scores.items() if key in scores}
+                else:
+                    scores = term_scores
+            else:
+                term_scores = self._term_scores(term, scores)
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {key: scores[key] + value for key, value in term_scores.items()}
+            if not scores:
+                return []
+
+        if kinds:
+            scores = {key: value for key, value in scores.items() if key[0] in kinds}
+
+        phrase = " ".join(tokenize(query))
+        folded_titles = self._folded_titles
+        exact_bonus = 2 * WEIGHT_NAME
+        ranked = []
+        for key, score in scores.items():
+            folded = folded_titles[key]
+            if folded.startswith(phrase):
+                score += exact_bonus if len(folded) == len(phrase) else WEIGHT_NAME
+            ranked.append((-score, len(folded), folded, key))
+
+        if cacheable:
+            ranked.sort()
+            self._ranked_cache[terms[0]] = ranked
+            ranked = ranked[:limit] if limit else ranked
+        elif limit and len(ranked) > limit:
+            ranked = heapq.nsmallest(limit, ranked)
+        else:
+            ranked.sort()
+        return self._results(ranked)
+
+    def _results(self, ranked):
+        docs = self.docs
+        return [dict(docs[key], score=-neg) for neg, _, _, key in ranked]
+
+
+def item_documents(item_names):
+    """Documentos dos itens (client id) a partir de um itemsXml.ItemNameIndex."""
+    documents = []
+    items_xml = item_names.items_xml
+    for cid, sids in item_names.server_ids.items():
+        name = item_names.name(cid)
+        if not name:
+            continue
+        fields = [(name, WEIGHT_NAME)]
+        for sid in sids:
+            entry = items_xml.get(sid)
+            if not entry:
+                continue
+            if entry[0] != name:
+                fields.append((entry[0], WEIGHT_ALIAS))
+            fields.extend((f"{k} {v}", WEIGHT_ATTRIBUTE) for k, v in entry[2])
+        documents.append({
+            "kind": "item",
+            "doc_id": cid,
+            "title": name,
+            "fields": fields,
+            "detail": f"client {cid} / server {', '.join(map(str, sids))}",
+            "payload": {"client_id": cid, "server_ids": sids},
+        })
+    return documents
+
+
+def monster_document(path):
+    """Documento de um arquivo de monstro (None se não for um <monster>)."""
+    root = ET.parse(path).getroot()
+    if root.tag != "monster":
+        return None
+    name = root.get("name", "") or os.path.splitext(os.path.basename(path))[0]
+    fields = [(name, WEIGHT_NAME), (root.get("nameDescription", ""), WEIGHT_ALIAS),
+              (root.get("race", ""), WEIGHT_ATTRIBUTE)]
+    for tag in ("attacks/attack", "defenses/defense", "summons/summon"):
+        fields.extend((elem.get("name", ""), WEIGHT_ATTRIBUTE) for elem in root.iterfind(tag))
+
+    look = root.find("look")
+    looktype = corpse = 0
+    if look is not None:
+        try:
+            looktype = int(look.get("type", 0))
+            corpse = int(look.get("corpse", 0))
+        except ValueError:
+            pass
+
+    return {
+        "kind": "monster",
+        "doc_id": os.path.abspath(path),
+        "title": name,
+        "fields": fields,
+        "detail": f"looktype {looktype}" + (f" / corpse {corpse}" if corpse else ""),
+        "payload": {"file": os.path.abspath(path), "looktype": looktype, "corpse": corpse},
+    }
+
+
+def spell_documents(path):
+    """Documentos das spells (instant/rune/conjure) de um spells.xml."""
+    root = ET.parse(path).getroot()
+    documents = []
+    for tag in ("instant", "rune", "conjure"):
+        for elem in root.iter(tag):
+            name = elem.get("name", "")
+            if not name:
+                continue
+            words = elem.get("words", "")
+            vocations = [v.get("name", "") for v in elem.iter("vocation")]
+            fields = [(name, WEIGHT_NAME), (words, WEIGHT_NAME),
+                      (elem.get("group", ""), WEIGHT_ATTRIBUTE), (tag, WEIGHT_ATTRIBUTE)]
+            fields.extend((v, WEIGHT_ATTRIBUTE) for v in vocations)
+            documents.append({
+                "kind": "spell",
+                "doc_id": name,
+                "title": name,
+                "fields": fields,
+                "detail": f"{tag} {words}".strip(),
+                "payload": {"file": os.path.abspath(path), "words": words, "type": tag},
+            })
+    return documents
+
+
+def update_monster_file(index, path):
+    """Reindexa um arquivo de monstro (ex.: depois de salvo no editor)."""
+    path = os.path.abspath(path)
+    try:
+        doc = monster_document(path)
+    except (OSError, ET.ParseError):
+        doc = None
+    index.replace_source(path, [doc] if doc else [])
+    index.warm()
+
+
+def update_spells_file(index, path):
+    """Reindexa um spells.xml (ex.: depois de salvo no Spell Maker)."""
+    path = os.path.abspath(path)
+    try:
+        documents = spell_documents(path)
+    except (OSError, ET.ParseError):
+        documents = []
+    index.replace_source(path, documents)
+    index.warm()
+
+
+def build_search_index(item_names=None, monsters_dir=MONSTERS_DIR, spells_path=SPELLS_XML,
+                       progress=None, cancelled=None):
+    """
+    Monta o índice completo. ``progress(feitos, total)`` e ``cancelled()``
+    são opcionais; cancelado retorna None. Arquivos inválidos são pulados.
+    """
+    index = SearchIndex()
+    if item_names is not None:
+        index.replace_source(ITEMS_SOURCE, item_documents(item_names))
+
+    monster_files = sorted(glob.glob(os.path.join(monsters_dir, "*.xml"))) if monsters_dir else []
+    total = len(monster_files)
+    for done, path in enumerate(monster_files, start=1):
+        if cancelled and cancelled():
+            return None
+        try:
+            doc = monster_document(path)
+        except (OSError, ET.ParseError):
+            doc = None
+        if doc:
+            index.replace_source(doc["doc_id"], [doc])
+        if progress and done % 50 == 0:
+            progress(done, total)
+
+    if spells_path and os.path.isfile(spells_path):
+        update_spells_file(index, spells_path)
+
+    index.warm()
+    return index
+
+
+class SearchIndexWorker(QThread):
+    """Monta o SearchIndex fora da thread da interface."""
+
+    progress = pyqtSignal(int, int)
+    finished_index = pyqtSignal(object)
+
+    def __init__(self, item_names=None, monsters_dir=MONSTERS_DIR, spells_path=SPELLS_XML,
+                 parent=None):
+        super().__init__(parent)
+        self.item_names = item_names
+        self.monsters_dir = monsters_dir
+        self.spells_path = spells_path
+
+    def run(self):
+        index = build_search_index(
+            self.item_names,
+            self.monsters_dir,
+            self.spells_path,
+            progress=lambda done, total: self.progress.emit(done, total),
+            cancelled=self.isInterruptionRequested,
+        )
+        self.finished_index.emit(index)
@@ -73,6 +73,8 @@ class LuaSyntaxHighlighter(QSyntaxHighlighter):
 
 class SpellMakerWindow(QDialog):
 
+    # Caminho do spells.xml salvo (o DatSprTab reindexa a busca)
+    spellsSaved = pyqtSignal(str)
     
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -781,6 +783,7 @@ class SpellMakerWindow(QDialog):
             with open(filepath, 'w', encoding='utf-8') as f:
                 f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
                 f.write(xml_string)
+            self.spellsSaved.emit(filepath)
             
             QMessageBox.information(self, "Success", f"Saved {len(self.spells_data)} spells to:\n{filepath}")
             
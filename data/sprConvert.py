@@ -0,0 +1,189 @@
+"""Conversão de SPR entre o formato padrão (RGB) e o com transparência (RGBA).
+
+A conversão é em streaming: as sprites são lidas do .spr de origem em
+blocos (pela tabela de offsets, sem carregar o arquivo inteiro),
+recodificadas num pool de processos e gravadas em ordem direto no .spr
+novo; a tabela de offsets é escrita no fim. Só ficam em memória a tabela
+e os blocos em andamento.
+
+RGB -> RGBA não perde nada; RGBA -> RGB segue o SprEditor: alpha < 10
+vira transparente e o resto opaco. O color key (FF 00 FF) antes do
+tamanho, quando existe, é mantido.
+
+Como spriteHash, este módulo não importa PyQt; com spawn os processos do
+pool reimportam também o ``__main__``, por isso o ItemManager.py chama
+``multiprocessing.freeze_support()`` (builds congelados).
+
+    python data/sprConvert.py Tibia.spr Tibia_rgba.spr --to-transparency
+"""
+import argparse
+import os
+import struct
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from spriteHash import decode_rgba, encode_rgba, normalize_rgba
+
+COLOR_KEY = b"\xFF\x00\xFF"
+# Sprites por tarefa do pool
+CHUNK_SIZE = 1024
+# Blocos em andamento por processo (limita a memória)
+CHUNKS_PER_WORKER = 2
+
+
+def read_header(f):
+    """(assinatura, quantidade, [offsets]) de um .spr aberto em modo binário."""
+    header = f.read(8)
+    if len(header) < 8:
+        raise ValueError("Invalid SPR file.")
+    signature, count = struct.unpack("<II", header)
+    table = f.read(count * 4)
+    if len(table) < count * 4:
+        raise ValueError("Truncated SPR offset table.")
+    return signature, count, list(struct.unpack(f"<{count}I", table))
+
+
+def read_sprite(f, offset):
+    """Bytes da sprite (color key opcional + u16 de tamanho + pixels) em ``offset``."""
+    if not offset:
+        return b""
+    f.seek(offset)
+    head = f.read(5)
+    prefix = COLOR_KEY if head[:3] == COLOR_KEY else b""
+    size_at = len(prefix)
+    if len(head) < size_at + 2:
+        return b""
+    size = struct.unpack_from("<H", head, size_at)[0]
+    f.seek(offset + size_at + 2)
+    return prefix + head[size_at:size_at + 2] + f.read(size)
+
+
+def convert_sprite(raw, from_transparency, to_transparency):
+    """Uma sprite (formato de sprites_data) recodificada no outro formato."""
+    if not raw:
+        return b""
+    prefix = COLOR_KEY if raw[:3] == COLOR_KEY else b""
+    rgba = normalize_rgba(decode_rgba(raw, from_transparency), to_transparency)
+    encoded = encode_rgba(rgba, to_transparency)
+    return prefix + struct.pack("<H", len(encoded)) + encoded
+
+
+def _convert_chunk(from_transparency, to_transparency, raws):
+    """Tarefa do pool: [raw] -> [raw convertido]."""
+    return [convert_sprite(raw, from_transparency, to_transparency) for raw in raws]
+
+
+def convert_spr(src_path, dst_path, to_transparency, from_transparency=None, workers=None,
+                progress=None, cancelled=None):
+    """
+    Grava em ``dst_path`` o .spr ``src_path`` recodificado. Por padrão a
+    origem é o formato oposto de ``to_transparency``; com os dois iguais a
+    sprite é só normalizada. Grava num .tmp e troca no fim, então cancelar
+    (``cancelled()`` verdadeiro, retorna None) não deixa arquivo pela metade.
+
+    ``progress(feitos, total)``. Retorna {"sprites", "empty", "bytes_in",
+    "bytes_out"}.
+    """
+    if from_transparency is None:
+        from_transparency = not to_transparency
+    if os.path.abspath(src_path) == os.path.abspath(dst_path):
+        raise ValueError("The converted SPR must be written to another file.")
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    tmp_path = dst_path + ".tmp"
+    report = {"sprites": 0, "empty": 0, "bytes_in": 0, "bytes_out": 0}
+
+    try:
+        with open(src_path, "rb") as src, open(tmp_path, "wb") as dst:
+            signature, count, offsets = read_header(src)
+            report["sprites"] = count
+            dst.write(struct.pack("<II", signature, count))
+            dst.write(bytes(count * 4))
+            new_offsets = []
+            position = 8 + count * 4
+
+            def chunks():
+                for start in range(0, count, CHUNK_SIZE):
+                    raws = [read_sprite(src, offset) for offset in offsets[start:start + CHUNK_SIZE]]
+                    report["bytes_in"] += sum(len(raw) for raw in raws)
+                    yield raws
+
+            def write(converted):
+                nonlocal position
+                for data in converted:
+                    if data:
+                        new_offsets.append(position)
+                        dst.write(data)
+                        position += len(data)
+                    else:
+                        new_offsets.append(0)
+                        report["empty"] += 1
+                if progress:
+                    progress(len(new_offsets), count)
+
+            finished = True
+            if workers <= 1 or count <= CHUNK_SIZE:
+                for raws in chunks():
+                    if cancelled and cancelled():
+                        finished = False
+                        break
+                    write(_convert_chunk(from_transparency, to_transparency, raws))
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    pending = deque()
+                    for raws in chunks():
+                        pending.append(
+                            pool.submit(_convert_chunk, from_transparency, to_transparency, raws)
+                        )
+                        if len(pending) >= workers * CHUNKS_PER_WORKER:
+                            write(pending.popleft().result())
+                        if cancelled and cancelled():
+                            finished = False
+                            break
+                    while finished and pending:
+                        write(pending.popleft().result())
+                    for future in pending:
+                        future.cancel()
+
+            if finished:
+                dst.seek(8)
+                dst.write(struct.pack(f"<{count}I", *new_offsets))
+                report["bytes_out"] = position
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    if not finished:
+        os.remove(tmp_path)
+        return None
+    os.replace(tmp_path, dst_path)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a SPR between RGB and RGBA sprites")
+    parser.add_argument("src")
+    parser.add_argument("dst")
+    direction = parser.add_mutually_exclusive_group(required=True)
+    direction.add_argument("--to-transparency", action="store_true", help="RGB -> RGBA")
+    direction.add_argument("--to-standard", action="store_true", help="RGBA -> RGB")
+    parser.add_argument("--workers", type=int, help="processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    def show(done, total):
+        print(f"\r{done}/{total}", end="", flush=True)
+
+    report = convert_spr(args.src, args.dst, args.to_transparency, workers=args.workers,
+                         progress=show)
+    print(
+        f"\n{report['sprites']} sprites ({report['empty']} empty): "
+        f"{report['bytes_in']} -> {report['bytes_out']} bytes written to {args.dst}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
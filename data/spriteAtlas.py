@@ -0,0 +1,376 @@
+"""Exportação/importação de sprites em atlas (PNG grande + manifesto JSON).
+
+Serve para levar milhares de sprites de um client para outro de uma vez.
+A exportação grava as sprites escolhidas (faixa de ids ou as usadas pelos
+things de uma categoria) em atlas de ``columns x rows`` sprites; sprites
+idênticas ocupam um único slot e as vazias não ocupam slot. O manifesto
+(``<nome>.json``) diz em que atlas/slot está cada sprite id:
+
+    {"version": 1, "sprite_size": 32, "columns": 64, "transparency": false,
+     "atlases": [{"file": "sprites_0.png", "count": 4096}, ...],
+     "sprites": {"123": [0, 17], ...}, "empty": [ids]}
+
+A importação fatia cada atlas com numpy (um atlas inteiro por vez),
+normaliza os pixels para o SPR de destino, compara pelo hash com as sprites
+que já existem (SpriteHashIndex) e só codifica e anexa as novas. O
+resultado é um plano com o mapeamento id do manifesto -> id no SPR.
+
+Também roda sem interface:
+
+    python data/spriteAtlas.py export Tibia.spr out/ --ids 1-5000
+    python data/spriteAtlas.py export Tibia.spr out/ --dat Tibia.dat --extended --category outfits
+    python data/spriteAtlas.py import Tibia.spr out/sprites.json -o Tibia_new.spr
+"""
+import argparse
+import hashlib
+import json
+import os
+import struct
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from spriteHash import SpriteHashIndex, decode_rgba, encode_rgba, normalize_rgba
+
+MANIFEST_VERSION = 1
+SPRITE_SIZE = 32
+# 64 x 64 sprites = atlas de 2048 x 2048
+ATLAS_COLUMNS = 64
+ATLAS_ROWS = 64
+# Atlas grandes: nível 1 do zlib, como nas sheets do OBD
+ATLAS_COMPRESS_LEVEL = 1
+
+
+def parse_id_ranges(text):
+    """"1-100, 250" -> [1, ..., 100, 250] (ordenado, sem repetidos). ValueError se inválido."""
+    ids = set()
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = map(int, part.split("-"))
+            ids.update(range(start, end + 1))
+        else:
+            ids.add(int(part))
+    return sorted(ids)
+
+
+def things_sprite_ids(dat_editor, category, thing_ids=None):
+    """Sprite ids (distintos, em ordem) usados pelos things de ``category``."""
+    from obdBatch import thing_sprite_ids
+
+    things = dat_editor.things.get(category, {})
+    if thing_ids is None:
+        thing_ids = list(things)
+
+    sprite_ids = set()
+    for thing_id in thing_ids:
+        thing = things.get(thing_id)
+        if not thing:
+            continue
+        try:
+            sprite_ids.update(thing_sprite_ids(thing, category, dat_editor.extended))
+        except ValueError:
+            continue
+    sprite_ids.discard(0)
+    return sorted(sprite_ids)
+
+
+def _encode_atlas(pixels, path):
+    Image.fromarray(pixels, "RGBA").save(path, format="PNG", compress_level=ATLAS_COMPRESS_LEVEL)
+
+
+def export_atlas(spr_editor, sprite_ids, out_dir, name="sprites", columns=ATLAS_COLUMNS,
+                 rows=ATLAS_ROWS, progress=None, cancelled=None):
+    """
+    Grava ``sprite_ids`` em ``out_dir/<name>_<n>.png`` + ``out_dir/<name>.json``.
+
+    ``progress(feitos, total)``; com ``cancelled()`` verdadeiro para e
+    retorna None. Retorna o manifesto.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    per_atlas = columns * rows
+    sprites = spr_editor.sprites_data
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "sprite_size": SPRITE_SIZE,
+        "columns": columns,
+        "transparency": spr_editor.transparency,
+        "atlases": [],
+        "sprites": {},
+        "empty": [],
+    }
+
+    slots = {}      # raw -> (atlas, slot): sprites idênticas dividem o slot
+    pixels = None
+    futures = []
+    total = len(sprite_ids)
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+
+        def finish_atlas():
+            # Codifica o atlas cheio em paralelo com a decodificação do próximo
+            index = len(manifest["atlases"])
+            filename = f"{name}_{index}.png"
+            count = len(slots) - index * per_atlas
+            used_rows = -(-count // columns)
+            futures.append(pool.submit(
+                _encode_atlas, pixels[:used_rows * SPRITE_SIZE], os.path.join(out_dir, filename)
+            ))
+            manifest["atlases"].append({"file": filename, "count": count})
+
+        for done, sprite_id in enumerate(sprite_ids, start=1):
+            if done % 256 == 0 and cancelled and cancelled():
+                return None
+            raw = sprites.get(sprite_id)
+            if not raw:
+                manifest["empty"].append(sprite_id)
+                continue
+
+            position = slots.get(raw)
+            if position is None:
+                slot = len(slots) % per_atlas
+                if slot == 0:
+                    if pixels is not None:
+                        finish_atlas()
+                    pixels = np.zeros((rows * SPRITE_SIZE, columns * SPRITE_SIZE, 4), dtype=np.uint8)
+                position = slots[raw] = (len(slots) // per_atlas, slot)
+                y = (slot // columns) * SPRITE_SIZE
+                x = (slot % columns) * SPRITE_SIZE
+                pixels[y:y + SPRITE_SIZE, x:x + SPRITE_SIZE] = np.frombuffer(
+                    decode_rgba(raw, spr_editor.transparency), dtype=np.uint8
+                ).reshape(SPRITE_SIZE, SPRITE_SIZE, 4)
+            manifest["sprites"][str(sprite_id)] = list(position)
+
+            if progress and done % 256 == 0:
+                progress(done, total)
+
+        if pixels is not None:
+            finish_atlas()
+        for future in futures:
+            future.result()
+
+    with open(os.path.join(out_dir, f"{name}.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    if progress:
+        progress(total, total)
+    return manifest
+
+
+def read_manifest(path):
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("sprite_size") != SPRITE_SIZE:
+        raise ValueError(f"unsupported atlas manifest: {path}")
+    return manifest
+
+
+def slice_atlas(png_path, columns, count):
+    """Matriz (count, 4096) com os pixels RGBA de cada slot do atlas."""
+    with Image.open(png_path) as img:
+        pixels = np.asarray(img.convert("RGBA"))
+    rows = pixels.shape[0] // SPRITE_SIZE
+    if pixels.shape[1] != columns * SPRITE_SIZE or rows * columns < count:
+        raise ValueError(f"{os.path.basename(png_path)}: size {pixels.shape[1]}x{pixels.shape[0]} "
+                         f"does not hold {count} sprites in {columns} columns")
+    tiles = pixels[:rows * SPRITE_SIZE].reshape(rows, SPRITE_SIZE, columns, SPRITE_SIZE, 4)
+    return tiles.transpose(0, 2, 1, 3, 4).reshape(rows * columns, -1)[:count]
+
+
+def import_atlas(spr_editor, manifest_path, hash_index=None, workers=None, progress=None,
+                 cancelled=None):
+    """
+    Prepara a importação das sprites de um manifesto de atlas para o SPR.
+    Não altera nada: retorna o plano para apply_atlas_import, ou None se
+    cancelado.
+
+    Plano: {"sprites": {novo id: dados}, "mapping": {id do manifesto: id no
+    SPR}, "reused": slots que já existiam no SPR}. Vazias viram 0.
+    """
+    manifest = read_manifest(manifest_path)
+    folder = os.path.dirname(os.path.abspath(manifest_path))
+    transparency = spr_editor.transparency
+
+    if hash_index is None:
+        hash_index = SpriteHashIndex.from_spr(
+            spr_editor,
+            workers=workers,
+            progress=(lambda done, total: progress(done, total, "Indexing sprites")) if progress else None,
+            cancelled=cancelled,
+        )
+        if hash_index is None:
+            return None
+
+    plan = {"sprites": {}, "mapping": {}, "reused": 0}
+    next_sprite_id = spr_editor.sprite_count + 1
+    slot_ids = []   # por atlas: id no SPR de cada slot
+    atlases = manifest["atlases"]
+
+    for index, atlas in enumerate(atlases):
+        if cancelled and cancelled():
+            return None
+        if progress:
+            progress(index, len(atlases), atlas["file"])
+
+        tiles = slice_atlas(os.path.join(folder, atlas["file"]), manifest["columns"], atlas["count"])
+        # Normaliza o atlas inteiro de uma vez (o SPR de destino pode ser outro formato)
+        tiles = np.frombuffer(normalize_rgba(tiles.tobytes(), transparency), dtype=np.uint8)
+        tiles = tiles.reshape(atlas["count"], -1)
+
+        ids = []
+        for tile in tiles:
+            rgba = tile.tobytes()
+            digest = hashlib.md5(rgba).digest()
+            sid = hash_index.get(digest)
+            if sid is None:
+                sid = next_sprite_id
+                next_sprite_id += 1
+                hash_index.add(digest, sid)
+                encoded = encode_rgba(rgba, transparency)
+                plan["sprites"][sid] = struct.pack("<H", len(encoded)) + encoded
+            else:
+                plan["reused"] += 1
+            ids.append(sid)
+        slot_ids.append(ids)
+
+    for sprite_id, (atlas, slot) in manifest["sprites"].items():
+        plan["mapping"][int(sprite_id)] = slot_ids[atlas][slot]
+    for sprite_id in manifest["empty"]:
+        plan["mapping"][sprite_id] = 0
+
+    if progress:
+        progress(len(atlases), len(atlases), "Done")
+    return plan
+
+
+def apply_atlas_import(plan, spr_editor):
+    """Anexa ao SPR as sprites novas do plano de import_atlas."""
+    for sid in sorted(plan["sprites"]):
+        spr_editor.set_sprite_data(sid, plan["sprites"][sid])
+
+
+def save_mapping(plan, path):
+    """Grava o mapeamento id do manifesto -> id no SPR (JSON)."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({str(k): v for k, v in sorted(plan["mapping"].items())}, f, indent=1)
+
+
+class AtlasExportWorker(QThread):
+    """Roda export_atlas fora da thread da interface."""
+
+    progress = pyqtSignal(int, int)
+    finished_export = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, spr_editor, sprite_ids, out_dir, name="sprites", parent=None):
+        super().__init__(parent)
+        self.spr_editor = spr_editor
+        self.sprite_ids = list(sprite_ids)
+        self.out_dir = out_dir
+        self.name = name
+
+    def run(self):
+        try:
+            manifest = export_atlas(
+                self.spr_editor,
+                self.sprite_ids,
+                self.out_dir,
+                self.name,
+                progress=lambda done, total: self.progress.emit(done, total),
+                cancelled=self.isInterruptionRequested,
+            )
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.finished_export.emit(manifest)
+
+
+class AtlasImportWorker(QThread):
+    """Roda import_atlas fora da thread da interface (só monta o plano)."""
+
+    progress = pyqtSignal(int, int, str)
+    finished_import = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, spr_editor, manifest_path, parent=None):
+        super().__init__(parent)
+        self.spr_editor = spr_editor
+        self.manifest_path = manifest_path
+
+    def run(self):
+        try:
+            plan = import_atlas(
+                self.spr_editor,
+                self.manifest_path,
+                progress=lambda done, total, text: self.progress.emit(done, total, text),
+                cancelled=self.isInterruptionRequested,
+            )
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.finished_import.emit(plan)
+
+
+def main(argv=None):
+    from datspr import DatEditor, SprEditor
+
+    parser = argparse.ArgumentParser(description="Sprite atlas export/import")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export_cmd = sub.add_parser("export", help="write sprites to atlas PNGs + manifest")
+    export_cmd.add_argument("spr", help="Tibia.spr")
+    export_cmd.add_argument("out_dir")
+    export_cmd.add_argument("--ids", help="sprite ids (Ex: 1-5000, 7000)")
+    export_cmd.add_argument("--dat", help="Tibia.dat, to export the sprites of --category")
+    export_cmd.add_argument("--category", default="items",
+                            choices=["items", "outfits", "effects", "missiles"])
+    export_cmd.add_argument("--things", help="thing ids of --category (default: all)")
+    export_cmd.add_argument("--extended", action="store_true", help="DAT with u32 sprite ids")
+    export_cmd.add_argument("--transparency", action="store_true", help="SPR with alpha channel")
+    export_cmd.add_argument("--name", default="sprites", help="atlas/manifest base name")
+
+    import_cmd = sub.add_parser("import", help="append the sprites of a manifest to a SPR")
+    import_cmd.add_argument("spr", help="Tibia.spr")
+    import_cmd.add_argument("manifest", help="<name>.json written by export")
+    import_cmd.add_argument("-o", "--output", required=True, help="SPR to write")
+    import_cmd.add_argument("--transparency", action="store_true", help="SPR with alpha channel")
+    import_cmd.add_argument("--mapping", help="write manifest id -> new id as JSON")
+
+    args = parser.parse_args(argv)
+
+    spr = SprEditor(args.spr, transparency=args.transparency)
+    spr.load()
+
+    if args.command == "export":
+        if args.dat:
+            dat = DatEditor(args.dat, extended=args.extended)
+            dat.load()
+            things = parse_id_ranges(args.things) if args.things else None
+            sprite_ids = things_sprite_ids(dat, args.category, things)
+        elif args.ids:
+            sprite_ids = parse_id_ranges(args.ids)
+        else:
+            sprite_ids = list(range(1, spr.sprite_count + 1))
+        manifest = export_atlas(spr, sprite_ids, args.out_dir, args.name)
+        print(f"{len(manifest['sprites'])} sprites in {len(manifest['atlases'])} atlases "
+              f"({len(manifest['empty'])} empty) written to {args.out_dir}")
+        return 0
+
+    plan = import_atlas(spr, args.manifest)
+    apply_atlas_import(plan, spr)
+    spr.save(args.output)
+    print(f"{len(plan['sprites'])} sprites appended, {plan['reused']} reused; "
+          f"{spr.sprite_count} sprites in {args.output}")
+    if args.mapping:
+        save_mapping(plan, args.mapping)
+        print(f"Mapping written to {args.mapping}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
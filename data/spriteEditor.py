@@ -1,3 +1,4 @@
+import importlib.util
 import io
 import re
 import sys
@@ -220,22 +221,28 @@ class DraggableLayerItem(QGraphicsPixmapItem):
         super().hoverLeaveEvent(event)
 
 
-try:
-    import torch
-    from basicsr.archs.rrdbnet_arch import RRDBNet
-    from realesrgan import RealESRGANer
-    from realesrgan.archs.srvgg_arch import SRVGGNetCompact
+_BACKEND_CACHE = {}
 
-    REALESRGAN_AVAILABLE = True
-except ImportError:
-    REALESRGAN_AVAILABLE = False
-    print("⚠️ Real-ESRGAN não está instalado.")
 
-try:
-    from rembg import remove
-    REMBG_AVAILABLE = True
-except ImportError:
-    REMBG_AVAILABLE = False
+def _backend_available(*modules):
+    """Checks that optional modules are installed without importing them.
+
+    torch/Real-ESRGAN/rembg take seconds to import, so they are only loaded
+    by the action that uses them.
+    """
+    if modules not in _BACKEND_CACHE:
+        _BACKEND_CACHE[modules] = all(
+            importlib.util.find_spec(name) is not None for name in modules
+        )
+    return _BACKEND_CACHE[modules]
+
+
+def realesrgan_available():
+    return _backend_available("torch", "basicsr", "realesrgan")
+
+
+def rembg_available():
+    return _backend_available("rembg")
 
 
 
@@ -833,7 +840,7 @@ class SliceWindow(QWidget):
         self.btn_remove_bg_ai.clicked.connect(self.remove_background_ai)
         self.btn_remove_bg_ai.setEnabled(False)
 
-        if not REMBG_AVAILABLE:  # ← Use a variável global
+        if not rembg_available():
             self.btn_remove_bg_ai.setToolTip("rembg não instalado")
         else:
             self.btn_remove_bg_ai.setToolTip("Remove background usando IA (U2Net)")
@@ -1279,7 +1286,7 @@ class SliceWindow(QWidget):
         )
         self.btn_apply_upscale.clicked.connect(self.apply_ai_upscale)
 
-        if not REALESRGAN_AVAILABLE:
+        if not realesrgan_available():
             self.btn_apply_upscale.setEnabled(False)
             self.btn_apply_upscale.setToolTip("Real-ESRGAN não instalado")
         else:
@@ -1292,7 +1299,7 @@ class SliceWindow(QWidget):
         self.lbl_upscale_status.setStyleSheet("color: #aaa; font-size: 10px;")
         self.lbl_upscale_status.setWordWrap(True)
 
-        if not REALESRGAN_AVAILABLE:
+        if not realesrgan_available():
             self.lbl_upscale_status.setText("⚠️ Real-ESRGAN não disponível")
 
         upscale_layout.addWidget(self.lbl_upscale_status, 5, 0, 1, 2)
@@ -2232,7 +2239,7 @@ class SliceWindow(QWidget):
         if not self.current_image_pil:
             return
 
-        if not REMBG_AVAILABLE:  # ← Use a variável global aqui
+        if not rembg_available():
             QMessageBox.critical(
                 self,
                 "Biblioteca Faltando",
@@ -2245,7 +2252,7 @@ class SliceWindow(QWidget):
         try:
             import io
 
-            from rembg import remove  # Importa aqui de novo (já foi importado no topo)
+            from rembg import remove
 
             # Mostrar mensagem de progresso
             QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
@@ -2331,7 +2338,7 @@ class SliceWindow(QWidget):
         if not self.current_image_pil:
             return
 
-        if not REALESRGAN_AVAILABLE:
+        if not realesrgan_available():
             QMessageBox.critical(
                 self, "Dependência Faltando", "Real-ESRGAN não está instalado!"
             )
@@ -2349,6 +2356,9 @@ class SliceWindow(QWidget):
         try:
             import cv2
             import numpy as np
+            import torch
+            from basicsr.archs.rrdbnet_arch import RRDBNet
+            from realesrgan import RealESRGANer
 
             # Configurar device
             use_gpu = self.chk_use_gpu.isChecked()
@@ -3456,7 +3466,7 @@ class SliceWindow(QWidget):
                 self.spin_rotate_fine.setEnabled(True)
                 
                 # Onde você habilita os outros botões:
-                if REMBG_AVAILABLE:  # ← Use a variável global
+                if rembg_available():
                     self.btn_remove_bg_ai.setEnabled(True)
 
                 # Cria o layer principal
@@ -3527,8 +3537,8 @@ class SliceWindow(QWidget):
         self.chk_enable_fine_grid.setEnabled(True)
         self.btn_cut_size.setEnabled(True)        
 
-        # IA bg remover depende de REMBG_AVAILABLE
-        if REMBG_AVAILABLE:
+        # IA bg remover depende de rembg_available()
+        if rembg_available():
             self.btn_remove_bg_ai.setEnabled(True)
         else:
             self.btn_remove_bg_ai.setEnabled(False)
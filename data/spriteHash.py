@@ -0,0 +1,384 @@
+"""Sprite hash (ATTR_SPRITEHASH) dos itens do OTB.
+
+O hash de um item é o mesmo que o ItemEditor grava: MD5 das sprites da
+primeira vista do item (frame 0, patterns 0, na ordem layer -> y -> x, igual
+à ordem do texture do DAT), cada uma com as 32 linhas de baixo para cima e
+cada pixel como B, G, R, 0; pixels transparentes ficam 0x11 nos três canais.
+Conferido com o items.otb de assets/xml: os itens com sprites vazias têm
+exatamente esse hash. Serve de "impressão digital" do visual do item:
+gravado no OTB com o client antigo, permite reencontrar o client id de cada
+item depois que o SPR/DAT foi reordenado ou compactado.
+
+sprite_hash (MD5 dos pixels RGBA) é outro hash, usado só para achar sprites
+iguais (SpriteHashIndex).
+
+Decodificação + hash rodam num pool de processos, em blocos de itens. Este
+módulo não importa PyQt, mas com spawn (Windows) os processos do pool também
+reimportam o ``__main__``: o ItemManager.py deixa a interface sob
+``if __name__ == "__main__"`` e chama ``multiprocessing.freeze_support()``
+para builds congelados.
+"""
+import hashlib
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from otbParser import ATTR_SPRITEHASH
+
+SPRITE_PIXELS = 32 * 32
+EMPTY_SPRITE = bytes(SPRITE_PIXELS * 4)
+EMPTY_HASH = hashlib.md5(EMPTY_SPRITE).digest()
+
+# Cor dos pixels transparentes no hash do ItemEditor
+ITEM_HASH_TRANSPARENT = 0x11
+EMPTY_ITEM_HASH_PIXELS = bytes([ITEM_HASH_TRANSPARENT] * 3 + [0]) * SPRITE_PIXELS
+
+# Itens por tarefa do pool
+CHUNK_SIZE = 512
+# Abaixo disso o pool custa mais do que economiza
+MIN_ITEMS_FOR_POOL = 2000
+
+
+def decode_rgba(raw, transparency):
+    """Pixels RGBA (4096 bytes) de uma sprite como guardada em SprEditor.sprites_data."""
+    if not raw:
+        return EMPTY_SPRITE
+
+    start = 0
+    if len(raw) >= 3 and raw[0] == 0xFF and raw[1] == 0x00 and raw[2] == 0xFF:
+        start = 3
+    if start + 2 <= len(raw):
+        start += 2
+    data = raw[start:]
+
+    out = bytearray(SPRITE_PIXELS * 4)
+    size = len(data)
+    p = 0
+    pixel = 0
+    while p + 4 <= size and pixel < SPRITE_PIXELS:
+        transparent, colored = struct.unpack_from("<HH", data, p)
+        p += 4
+        pixel += transparent
+        if pixel >= SPRITE_PIXELS:
+            break
+        drawn = min(colored, SPRITE_PIXELS - pixel)
+        o = pixel * 4
+
+        if transparency:
+            if p + colored * 4 > size:
+                break
+            out[o:o + drawn * 4] = data[p:p + drawn * 4]
+            # Mesmo ajuste do SprEditor: alpha 0 com cor vira opaco
+            alphas = out[o + 3:o + drawn * 4:4]
+            if 0 in alphas:
+                for i in range(drawn):
+                    k = o + i * 4
+                    if out[k + 3] == 0 and (out[k] or out[k + 1] or out[k + 2]):
+                        out[k + 3] = 255
+            p += colored * 4
+        else:
+            if p + colored * 3 > size:
+                break
+            end = o + drawn * 4
+            out[o:end:4] = data[p:p + drawn * 3:3]
+            out[o + 1:end:4] = data[p + 1:p + drawn * 3:3]
+            out[o + 2:end:4] = data[p + 2:p + drawn * 3:3]
+            out[o + 3:end:4] = b"\xFF" * drawn
+            p += colored * 3
+
+        pixel += drawn
+
+    return bytes(out)
+
+
+def normalize_rgba(rgba, transparency):
+    """
+    Pixels RGBA como ficam depois de gravados no SPR e lidos de volta:
+    no SPR padrão alpha < 10 vira transparente e o resto opaco; no SPR com
+    transparência só alpha 0 é transparente. Com isso o hash de uma imagem
+    importada bate com o de uma sprite igual que já está no SPR.
+    """
+    pixels = np.frombuffer(rgba, dtype=np.uint8).reshape(-1, 4).copy()
+    if transparency:
+        pixels[pixels[:, 3] == 0] = 0
+    else:
+        pixels[pixels[:, 3] < 10] = 0
+        pixels[pixels[:, 3] != 0, 3] = 255
+    return pixels.tobytes()
+
+
+def encode_rgba(rgba, transparency):
+    """
+    Codifica pixels RGBA normalizados (normalize_rgba) no formato do SPR,
+    sem o u16 de tamanho. Mesmos bytes de SprEditor._encode_standard /
+    _encode_1098_rgba, sem passar pelo PIL pixel a pixel.
+    """
+    pixels = np.frombuffer(rgba, dtype=np.uint8).reshape(-1, 4)
+    colored = pixels[:, 3] != 0
+    channels = 4 if transparency else 3
+
+    # Início de cada trecho (transparente ou colorido)
+    changes = np.flatnonzero(colored[1:] != colored[:-1]) + 1
+    starts = [0] + changes.tolist()
+    ends = changes.tolist() + [len(colored)]
+
+    out = bytearray()
+    transparent = 0
+    for start, end in zip(starts, ends):
+        if not colored[start]:
+            transparent = end - start
+            continue
+        out += struct.pack("<HH", transparent, end - start)
+        out += pixels[start:end, :channels].tobytes()
+        transparent = 0
+    if transparent:
+        out += struct.pack("<HH", transparent, 0)
+    return bytes(out)
+
+
+def sprite_hash(sprite_raws, transparency):
+    """MD5 (16 bytes) dos pixels das sprites, na ordem dada."""
+    md5 = hashlib.md5()
+    for raw in sprite_raws:
+        md5.update(decode_rgba(raw, transparency))
+    return md5.digest()
+
+
+def item_hash_pixels(raw, transparency):
+    """Os 4096 bytes de uma sprite no layout do hash do ItemEditor (ver o topo)."""
+    if not raw:
+        return EMPTY_ITEM_HASH_PIXELS
+
+    start = 0
+    if len(raw) >= 3 and raw[0] == 0xFF and raw[1] == 0x00 and raw[2] == 0xFF:
+        start = 3
+    if start + 2 <= len(raw):
+        start += 2
+    data = raw[start:]
+
+    rgb = bytearray([ITEM_HASH_TRANSPARENT]) * (SPRITE_PIXELS * 3)
+    channels = 4 if transparency else 3
+    size = len(data)
+    p = 0
+    pixel = 0
+    while p + 4 <= size and pixel < SPRITE_PIXELS:
+        transparent, colored = struct.unpack_from("<HH", data, p)
+        p += 4
+        pixel += transparent
+        if pixel >= SPRITE_PIXELS or p + colored * channels > size:
+            break
+        drawn = min(colored, SPRITE_PIXELS - pixel)
+        o = pixel * 3
+        if transparency:
+            # O alpha é ignorado: todo pixel de um trecho colorido entra com a cor
+            for c in range(3):
+                rgb[o + c:o + drawn * 3:3] = data[p + c:p + drawn * 4:4]
+        else:
+            rgb[o:o + drawn * 3] = data[p:p + drawn * 3]
+        p += colored * channels
+        pixel += drawn
+
+    out = np.zeros((32, 32, 4), dtype=np.uint8)
+    out[:, :, :3] = np.frombuffer(bytes(rgb), dtype=np.uint8).reshape(32, 32, 3)[::-1, :, ::-1]
+    return out.tobytes()
+
+
+def item_sprite_hash(sprite_raws, transparency):
+    """Hash do item no formato do ItemEditor (16 bytes), sprites na ordem dada."""
+    md5 = hashlib.md5()
+    for raw in sprite_raws:
+        md5.update(item_hash_pixels(raw, transparency))
+    return md5.digest()
+
+
+def _hash_chunk(hash_func, transparency, chunk):
+    """Tarefa do pool: [(id, [raw, ...])] -> [(id, hash)]."""
+    return [(cid, hash_func(raws, transparency)) for cid, raws in chunk]
+
+
+def first_view_sprite_ids(texture_bytes, extended):
+    """Ids das sprites de frame 0 / patterns 0 (layers * height * width)."""
+    # datspr (PyQt) só é importado no processo principal
+    from datspr import DatEditor
+
+    groups = DatEditor.parse_texture(texture_bytes, is_outfit=False, extended=extended)
+    if not groups:
+        return []
+    group = groups[0]
+    count = group["width"] * group["height"] * group["layers"]
+    return group["sprite_ids"][:count]
+
+
+def compute_item_hashes(dat_editor, spr_editor, client_ids=None, workers=None,
+                        progress=None, cancelled=None):
+    """
+    Hash de cada item do DAT (client id -> 16 bytes), no formato do ItemEditor.
+
+    ``progress(feitos, total)`` e ``cancelled()`` são opcionais; com
+    cancelled() verdadeiro o pool é encerrado e retorna None.
+    """
+    items = dat_editor.things.get("items", {})
+    if client_ids is None:
+        client_ids = list(items)
+
+    sprites = spr_editor.sprites_data
+    tasks = []
+    for cid in client_ids:
+        thing = items.get(cid)
+        if not thing:
+            continue
+        try:
+            sprite_ids = first_view_sprite_ids(thing.get("texture_bytes", b""), dat_editor.extended)
+        except ValueError:
+            continue
+        tasks.append((cid, [sprites.get(sid, b"") for sid in sprite_ids]))
+
+    return _run_hash_tasks(tasks, spr_editor.transparency, workers, progress, cancelled,
+                           hash_func=item_sprite_hash)
+
+
+def compute_sprite_hashes(spr_editor, workers=None, progress=None, cancelled=None):
+    """Hash de cada sprite do SPR (sprite id -> 16 bytes); vazias ficam de fora."""
+    tasks = [(sid, [raw]) for sid, raw in spr_editor.sprites_data.items() if raw]
+    return _run_hash_tasks(tasks, spr_editor.transparency, workers, progress, cancelled)
+
+
+def _run_hash_tasks(tasks, transparency, workers, progress, cancelled, hash_func=sprite_hash):
+    """[(id, [raw, ...])] -> {id: hash_func(raws)}, em blocos no pool (ou em série)."""
+    total = len(tasks)
+    chunks = [tasks[i:i + CHUNK_SIZE] for i in range(0, total, CHUNK_SIZE)]
+    hashes = {}
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1 or total < MIN_ITEMS_FOR_POOL:
+        for chunk in chunks:
+            if cancelled and cancelled():
+                return None
+            hashes.update(_hash_chunk(hash_func, transparency, chunk))
+            if progress:
+                progress(len(hashes), total)
+        return hashes
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_hash_chunk, hash_func, transparency, chunk) for chunk in chunks]
+        for future in as_completed(futures):
+            if cancelled and cancelled():
+                for f in futures:
+                    f.cancel()
+                return None
+            hashes.update(future.result())
+            if progress:
+                progress(len(hashes), total)
+
+    return hashes
+
+
+def write_sprite_hashes(otb, hashes):
+    """Grava o hash (pelo client id) em cada item do OTB. Retorna quantos mudaram."""
+    changed = 0
+    for item in otb.items:
+        digest = hashes.get(item.client_id)
+        if digest is None:
+            continue
+        current = item.get_attribute(ATTR_SPRITEHASH)
+        if current is not None and bytes(current) == digest:
+            continue
+        item.set_attribute(ATTR_SPRITEHASH, digest)
+        changed += 1
+    return changed
+
+
+def match_client_ids(otb, hashes):
+    """
+    Reencontra o client id de cada item do OTB pelo sprite hash gravado nele,
+    usando ``hashes`` (client id -> hash) calculado no client novo.
+
+    Só remapeia quando o hash aponta para um único client id; o resto fica
+    como está e vai para o relatório. Reconstrói os índices do OTB.
+    """
+    by_hash = {}
+    for cid, digest in hashes.items():
+        by_hash.setdefault(digest, []).append(cid)
+
+    report = {"unchanged": 0, "no_hash": 0, "remapped": [], "ambiguous": [], "unmatched": []}
+
+    for item in otb.items:
+        stored = item.get_attribute(ATTR_SPRITEHASH)
+        if stored is None or len(stored) != 16:
+            report["no_hash"] += 1
+            continue
+        stored = bytes(stored)
+
+        if hashes.get(item.client_id) == stored:
+            report["unchanged"] += 1
+            continue
+
+        candidates = by_hash.get(stored, [])
+        if len(candidates) == 1:
+            report["remapped"].append((item.server_id, item.client_id, candidates[0]))
+            item.client_id = candidates[0]
+        elif candidates:
+            report["ambiguous"].append((item.server_id, item.client_id, sorted(candidates)))
+        else:
+            report["unmatched"].append((item.server_id, item.client_id))
+
+    if report["remapped"]:
+        otb.build_indexes()
+    return report
+
+
+def snapshot_items(otb):
+    """(item, client id, hash gravado) de cada item do OTB, para restore_items."""
+    return [(item, item.client_id, item.get_attribute(ATTR_SPRITEHASH)) for item in otb.items]
+
+
+def restore_items(otb, snapshot):
+    """Desfaz write_sprite_hashes / match_client_ids (snapshot_items de antes)."""
+    remapped = False
+    for item, client_id, digest in snapshot:
+        if item.client_id != client_id:
+            item.client_id = client_id
+            remapped = True
+        current = item.get_attribute(ATTR_SPRITEHASH)
+        if digest is None:
+            if current is not None:
+                item.attributes[:] = [
+                    (atype, payload) for atype, payload in item.attributes
+                    if atype != ATTR_SPRITEHASH
+                ]
+        elif current is None or bytes(current) != bytes(digest):
+            item.set_attribute(ATTR_SPRITEHASH, digest)
+    if remapped:
+        otb.build_indexes()
+
+
+class SpriteHashIndex:
+    """
+    hash dos pixels -> sprite id, para reaproveitar sprites iguais na
+    importação. Com várias sprites iguais no SPR fica a de menor id; a
+    sprite vazia é sempre o id 0.
+    """
+
+    def __init__(self, hashes=None):
+        self.ids = {}
+        for sid in sorted(hashes or ()):
+            self.ids.setdefault(hashes[sid], sid)
+        self.ids[EMPTY_HASH] = 0
+
+    @classmethod
+    def from_spr(cls, spr_editor, workers=None, progress=None, cancelled=None):
+        hashes = compute_sprite_hashes(spr_editor, workers, progress, cancelled)
+        return None if hashes is None else cls(hashes)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def get(self, digest):
+        return self.ids.get(digest)
+
+    def add(self, digest, sprite_id):
+        self.ids.setdefault(digest, sprite_id)
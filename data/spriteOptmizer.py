@@ -7,6 +7,8 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
 
+from profiler import profiled
+
 class OptimizerWorker(QThread):
     progress = pyqtSignal(int)
     log = pyqtSignal(str)
@@ -45,6 +47,7 @@ class OptimizerWorker(QThread):
         except:
             return False
 
+    @profiled("Optimizer.scan")
     def scan_sprites(self):
         self.log.emit("Starting scan...")
         
@@ -98,6 +101,7 @@ class OptimizerWorker(QThread):
         self.progress.emit(100)
         self.finished_scan.emit(remap, duplicates_count, empty_found_count)
 
+    @profiled("Optimizer.apply")
     def apply_optimization(self):
         if not self.remap_table:
             self.log.emit("Nothing to do.")